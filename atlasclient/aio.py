@@ -0,0 +1,745 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+An asyncio flavour of the Atlas client.
+
+It exposes the same entry points as atlasclient.client.Atlas, but the methods
+doing HTTP requests (inflate, refresh, create, update, delete, wait) are
+coroutines, so that a single event loop can keep many requests in flight:
+
+    async with AsyncAtlas(host, port=21000, username='admin', password='admin') as atlas:
+        entity = await atlas.entity_guid(GUID).inflate()
+        bulks = await asyncio.gather(*[atlas.entity_bulk(guid=chunk).inflate()
+                                       for chunk in chunks])
+
+The model classes are the ones from atlasclient.models, extended on the fly with
+awaitable versions of their I/O methods.  Attributes are not lazy-loaded in this
+mode: inflate (or refresh) a model before reading its fields.
+
+This module requires Python 3.6+ and the optional 'aiohttp' dependency
+(pip install atlasclient[async]).
+"""
+
+import asyncio
+import collections
+import io
+import json
+import logging
+import tarfile
+import timeit
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from atlasclient import base, columnar, exceptions, lineage, models, registry, retry, utils, metrics as request_metrics
+from atlasclient.client import ENTRY_POINTS, AtlasJsonEncoder, endpoint_path
+
+LOG = logging.getLogger(__name__)
+LOG.addHandler(utils.NullHandler())
+
+HTTP_METHODS = ('get', 'post', 'put', 'delete', 'head', 'patch', 'options')
+# the transport errors retried by the retry policy, for the idempotent methods
+TRANSIENT_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError) if aiohttp is not None else ()
+
+
+class AsyncAtlas(object):
+    """The asyncio Atlas client
+
+    This is the counterpart of atlasclient.client.Atlas for asyncio programs.
+    The session is opened lazily and should be closed with close(), or by
+    using the client as an asynchronous context manager.
+    """
+    def __init__(self, host, port=None, username=None, password=None,
+                 identifier=None, protocol=None, validate_ssl=True,
+                 timeout=10, max_connections=100, auth=None,
+                 bulk_chunk_size=100, entity_cache=None, compact_models=False, metrics=True,
+                 retry_policy=True):
+
+        self.base_url = utils.generate_base_url(host, port=port, protocol=protocol)
+
+        if identifier is None:
+            identifier = 'python-atlasclient'
+
+        self.client = AsyncHttpClient(host=self.base_url, username=username,
+                                      password=password, identifier=identifier,
+                                      validate_ssl=validate_ssl, timeout=timeout,
+                                      max_connections=max_connections, auth=auth,
+                                      metrics=metrics, retry_policy=retry_policy)
+        self.bulk_chunk_size = bulk_chunk_size
+        self.entity_cache = entity_cache
+        self.compact_models = compact_models
+        self._version = None
+
+    @property
+    def metrics(self):
+        """The atlasclient.metrics.RequestMetrics of the requests sent, or None."""
+        return self.client.metrics
+
+    def __dir__(self):
+        d1 = {}
+        d1.update(self.__dict__)
+        d1.update(ENTRY_POINTS)
+        return d1.keys()
+
+    def __getattr__(self, attr):
+        if attr in ENTRY_POINTS:
+            rel_class = async_model_class(ENTRY_POINTS[attr])
+            return rel_class.collection_class(self, rel_class)
+
+        if attr in HTTP_METHODS or attr == 'request':
+            # forward get/post/put/head/delete to the http client
+            return getattr(self.client, attr)
+
+        raise AttributeError(attr)
+
+    async def close(self):
+        await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class AsyncHttpClient(object):
+    """Our asyncio REST client, based on aiohttp.
+
+    It behaves like atlasclient.client.HttpClient: requests and responses are
+    (de)serialized from/to JSON, and error responses are converted to the same
+    exceptions.  The underlying connection pool is bounded by max_connections.
+    The requests are recorded in metrics, and retried according to
+    retry_policy, as with HttpClient.
+    """
+    def __init__(self, host, username, password, identifier, validate_ssl=True,
+                 timeout=10, max_connections=100, auth=None, metrics=True, retry_policy=True):
+        if aiohttp is None:
+            raise exceptions.ClientError("The asyncio client requires 'aiohttp' "
+                                         "(pip install atlasclient[async])")
+        basic_token = utils.generate_http_basic_token(username=username, password=password)
+        self.host = host
+        self.headers = {'X-Requested-By': identifier,
+                        'Authorization': 'Basic {}'.format(basic_token)}
+        self.validate_ssl = validate_ssl
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.auth = auth
+        if metrics is True:
+            metrics = request_metrics.RequestMetrics()
+        self.metrics = metrics or None
+        if retry_policy is True:
+            retry_policy = retry.RetryPolicy()
+        self.retry_policy = retry_policy or None
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections,
+                                             ssl=None if self.validate_ssl else False)
+            self._session = aiohttp.ClientSession(
+                connector=connector, auth=self.auth,
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request(self, method, url, content_type=None, **kwargs):
+        headers = dict(self.headers)
+        headers.update(kwargs.pop('headers', None) or {})
+        headers['Content-type'] = content_type or 'application/json'
+        LOG.debug("Request headers: %s", headers)
+
+        data = kwargs.pop('data', None)
+        if isinstance(data, dict):
+            data = json.dumps(data, cls=AtlasJsonEncoder)
+            LOG.debug("Request body: %s", data)
+        elif isinstance(data, (str, list)):
+            data = json.dumps(data)
+
+        params = _expand_params(kwargs.pop('params', None))
+
+        start = timeit.default_timer()
+        attempt = 0
+        while True:
+            try:
+                response, body, text = await self._send(method, url, params, data, headers, kwargs)
+                break
+            except Exception as error:  # pylint: disable=broad-except
+                delay = None
+                if self.retry_policy is not None:
+                    delay = self.retry_policy.retry_delay(method, error, attempt, timeit.default_timer() - start,
+                                                          TRANSIENT_ERRORS)
+                if delay is None:
+                    raise
+                LOG.warning("Retrying %s %s in %.1fs (retry %s): %s", method, url, delay, attempt + 1, error)
+                if self.metrics is not None:
+                    self.metrics.record_retry(endpoint_path(url), method)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+        LOG.debug("Response headers: %s", response.headers)
+        LOG.debug("Response: %s", text)
+
+        content_type = response.headers.get('content-type') or ''
+        if text:
+            if content_type == 'application/x-ustar':
+                tarstream = io.BytesIO(body)
+                tarstream.seek(0)
+                return tarfile.open(fileobj=tarstream)
+            elif 'application/json' not in content_type:
+                # Log bad methods so we can report them
+                LOG.debug("Wrong response content-type for %s %s: %s", method,
+                          url, content_type)
+            return json.loads(text)
+
+        return {}
+
+    async def _send(self, method, url, params, data, headers, kwargs):
+        status = None
+        body = b''
+        start = timeit.default_timer()
+        try:
+            async with self.session.request(method.upper(), url, params=params,
+                                            data=data, headers=headers, **kwargs) as response:
+                status = response.status
+                body = await response.read()
+        finally:
+            if self.metrics is not None:
+                self.metrics.record(endpoint_path(url), method, status, timeit.default_timer() - start,
+                                    request_metrics.body_size(data), len(body))
+
+        text = body.decode(response.charset or 'utf-8', 'replace')
+        exceptions.handle_status(response.status, method=method.upper(),
+                                 url=str(response.url), details=text,
+                                 headers=response.headers)
+        return response, body, text
+
+    def __getattr__(self, attr):
+        if attr in HTTP_METHODS:
+            async def method(url, **kwargs):
+                return await self.request(attr, url, **kwargs)
+            return method
+        raise AttributeError(attr)
+
+
+def _expand_params(params):
+    """Convert a requests-style params dict to a list of pairs for aiohttp.
+
+    requests sends list values as repeated keys (guid=a&guid=b), aiohttp
+    needs them spelled out.
+    """
+    if not params:
+        return None
+    pairs = []
+    for key, value in params.items():
+        if isinstance(value, (list, tuple)):
+            pairs.extend((key, str(item)) for item in value)
+        else:
+            pairs.append((key, str(value)))
+    return pairs
+
+
+class AsyncQueryableModelCollection(base.QueryableModelCollection):
+    """Awaitable versions of the QueryableModelCollection I/O methods.
+
+    Iterating with a plain for loop only goes over what is already loaded;
+    use 'async for' to load the collection first.
+    """
+
+    def __iter__(self):
+        self._iter_marker = 0
+        return self
+
+    def next(self):
+        if self._iter_marker >= len(self._models):
+            raise StopIteration
+        model = self._models[self._iter_marker]
+        self._iter_marker += 1
+        return model
+
+    def __aiter__(self):
+        return self._aiter()
+
+    async def _aiter(self):
+        await self.inflate()
+        for model in list(self._models):
+            yield model
+
+    async def inflate(self):
+        if not self._is_inflated:
+            self.load(await self.fetch())
+
+        self._is_inflated = True
+        return self
+
+    async def fetch(self):
+        self.check_version()
+        return await self.client.get(self.url, params=self.query_params())
+
+    async def create(self, *args, **kwargs):
+        href = self.url
+        if len(args) == 1:
+            kwargs[self.model_class.primary_key] = args[0]
+            href = '/'.join([href, args[0]])
+        model = self.model_class(self,
+                                 href=href.replace('classifications/', 'classification/'),
+                                 data=kwargs)
+        await model.create(**kwargs)
+        self._models.append(model)
+        return model
+
+    async def update(self, **kwargs):
+        await self.inflate()
+        for model in self._models:
+            await model.update(**kwargs)
+        return self
+
+    async def delete(self, **kwargs):
+        await self.inflate()
+        for model in list(self._models):
+            await model.delete(**kwargs)
+        return
+
+    async def wait(self, **kwargs):
+        if self.request:
+            await self.request.wait(**kwargs)
+            self.request = None
+        return await self.inflate()
+
+    async def to_dict(self):
+        await self.inflate()
+        return [x.to_dict() for x in self._models]
+
+
+class AsyncQueryableModel(base.QueryableModel):
+    """Awaitable versions of the QueryableModel I/O methods."""
+
+    def __getattr__(self, attr):
+        # related queryable collections have to be asynchronous as well
+        rel_class = self.relationships.get(attr)
+        if (rel_class is not None and issubclass(rel_class, base.QueryableModel)
+                and attr not in self._relationship_cache):
+            rel_class = async_model_class(rel_class)
+            self._relationship_cache[attr] = rel_class.collection_class(
+                self.client, rel_class, parent=self)
+        elif rel_class is None and attr in self.fields:
+            # fields can't be lazy-loaded from a synchronous attribute access
+            return self._data.get(attr)
+        return super(AsyncQueryableModel, self).__getattr__(attr)
+
+    async def inflate(self):
+        if not self._is_inflated:
+            if self._is_inflating:
+                msg = ("There is not enough data to inflate this object.  "
+                       "Need either an href: {} or a {}: {}")
+                msg = msg.format(self._href, self.primary_key, self._data.get(self.primary_key))
+                raise exceptions.ClientError(msg)
+
+            self._is_inflating = True
+
+            try:
+                params = self._data.get('searchParameters') or {}
+                self.load(await self.client.request(self.method, self.url, **params))
+            except Exception:
+                self.load(self._data)
+
+            self._is_inflated = True
+            self._is_inflating = False
+        return self
+
+    async def create(self, **kwargs):
+        self.method = 'post'
+        if self.primary_key in kwargs:
+            del kwargs[self.primary_key]
+        data = self._generate_input_dict(**kwargs)
+        self.load(await self.client.post(self.url, data=data))
+        return self
+
+    async def update(self, **kwargs):
+        self.method = 'put'
+        data = self._generate_input_dict(**kwargs)
+        self.load(await self.client.put(self.url, data=data))
+        return self
+
+    async def delete(self, **kwargs):
+        self.method = 'delete'
+        if len(kwargs) > 0:
+            self.load(await self.client.delete(self.url, params=kwargs))
+        else:
+            self.load(await self.client.delete(self.url))
+        self.parent.remove(self)
+        return
+
+    async def wait(self, **kwargs):
+        if self.request:
+            await self.request.wait(**kwargs)
+            self.request = None
+        return await self.inflate()
+
+    async def to_dict(self):
+        await self.inflate()
+        return self._data
+
+    async def entities_with_relationships(self, attributes=None, max_depth=1):
+        if self.entities and isinstance(self.entities, base.DependentModelCollection):
+            referred_entities = self.referredEntities
+            if referred_entities is None:
+                referred_entities = self._data['referredEntities'] = {}
+            resolver = base.RelationshipResolver([entity._data for entity in self.entities],
+                                                 referred_entities, attributes, max_depth)
+            missing = resolver.missing()
+            while missing is not None:
+                responses = []
+                if missing:
+                    bulk_collection = await self.client.entity_bulk(guid=missing).inflate()
+                    responses = [bulk._data for bulk in bulk_collection]
+                missing = resolver.resolve(responses)
+            return self.entities
+
+
+# Asynchronous versions of the I/O methods overridden in atlasclient.models.
+# They take precedence over the synchronous overrides of the model classes.
+
+class AsyncEntityPostCollectionMixin(object):
+    async def create(self, data, **kwargs):
+        response = await self.client.post(self.url, data=data)
+        models.invalidate_entities(self.client, models.mutated_guids(response))
+        return response
+
+
+class AsyncEntityGuidClassificationCollectionMixin(object):
+    async def update(self, **kwargs):
+        await self.inflate()
+        data = []
+        for cl in self._models:
+            for classification_item in cl.list:
+                class_item_dict = dict()
+                for field in classification_item.fields:
+                    class_item_dict[field] = getattr(classification_item, field)
+                data.append(class_item_dict)
+        self.load(await self.client.put(self.url, data=data))
+        models.invalidate_entities(self.client, [models.url_entity_guid(self.url)])
+        return self
+
+    async def create(self, data, **kwargs):
+        response = await self.client.post(self.url, data=data)
+        models.invalidate_entities(self.client, [models.url_entity_guid(self.url)])
+        return response
+
+
+class AsyncEntityGuidClassificationMixin(object):
+    async def create(self, **kwargs):
+        await AsyncQueryableModel.create(self, **kwargs)
+        models.invalidate_entities(self.client, [models.url_entity_guid(self.url)])
+        return self
+
+    async def update(self, **kwargs):
+        await AsyncQueryableModel.update(self, **kwargs)
+        models.invalidate_entities(self.client, [models.url_entity_guid(self.url)])
+        return self
+
+    async def delete(self, **kwargs):
+        await AsyncQueryableModel.delete(self, **kwargs)
+        models.invalidate_entities(self.client, [models.url_entity_guid(self.url)])
+
+
+class AsyncEntityBulkCollectionMixin(object):
+    async def fetch(self):
+        self.check_version()
+        params = self.query_params()
+        cached, requests = self._plan_requests(params)
+        responses = await asyncio.gather(*[self.client.get(self.url, params=request)
+                                           for request in requests])
+        return self._merge_responses(cached, responses, params)
+
+    async def create(self, data, **kwargs):
+        response = await self.client.post(self.url, data=data)
+        models.invalidate_entities(self.client, models.mutated_guids(response))
+        return response
+
+    async def create_batched(self, entities, batch_size=500, batch_bytes=None, max_workers=None):
+        # max_workers workers pull the batches, so that only the batches being
+        # posted are built
+        batches = enumerate(models.entity_batches(entities, batch_size, batch_bytes))
+        results = []
+
+        async def post(index, batch):
+            try:
+                response = await self.client.post(self.url, data={'entities': batch, 'referredEntities': {}})
+            except Exception as e:  # pylint: disable=broad-except
+                LOG.warning("Batch %s of %s entities failed: %s", index, len(batch), e)
+                models.invalidate_entities(self.client, [entity.get('guid') for entity in batch])
+                return index, batch, e
+            models.invalidate_entities(self.client, models.mutated_guids(response))
+            return index, batch, response
+
+        async def worker():
+            for index, batch in batches:
+                results.append(await post(index, batch))
+
+        await asyncio.gather(*[worker() for _ in range(max_workers or self.client.client.max_connections)])
+        results.sort(key=lambda result: result[0])
+        return models.merge_entity_mutation_responses(results)
+
+    async def delete(self, guid):
+        response = await self.client.delete(self.url, params={'guid': guid})
+        if self.client.entity_cache is not None:
+            for item in (guid if isinstance(guid, list) else [guid]):
+                self.client.entity_cache.invalidate(item)
+        return response
+
+
+class AsyncTypeDefsMixin(object):
+    async def registry(self, path=None, max_age=None):
+        if path is not None:
+            type_registry = registry.TypeRegistry.load(path, max_age=max_age)
+            if type_registry is not None:
+                return type_registry
+        await self.inflate()
+        type_registry = registry.TypeRegistry(self._models[0]._data)
+        if path is not None:
+            type_registry.save(path)
+        return type_registry
+
+    async def create(self, data, **kwargs):
+        await self.client.post(self.url, data=data)
+        return self
+
+    async def update(self, data, **kwargs):
+        await self.client.put(self.url, data=data)
+        return self
+
+    async def delete(self, data, **kwargs):
+        await self.client.delete(self.url, data=data)
+        return self
+
+
+class AsyncEntityGuidMixin(object):
+    async def inflate(self):
+        cached = self._cached_response()
+        if cached is not None:
+            base.QueryableModel.load(self, cached)
+            self._is_inflated = True
+            return self
+        return await AsyncQueryableModel.inflate(self)
+
+    async def delete(self, **kwargs):
+        await AsyncQueryableModel.delete(self, **kwargs)
+        self._invalidate_cache()
+
+    async def update(self, attribute):
+        if attribute not in self.entity['attributes']:
+            raise exceptions.BadRequest(method=self.update,
+                                        details='The attribute {} does not exist for {}'.format(
+                                            attribute, self.entity['typeName']))
+        self.load(await self.client.put(self.url + '?name={}'.format(attribute),
+                                        data=self.entity['attributes'][attribute]))
+        self._invalidate_cache()
+        return self._data
+
+
+class AsyncEntityBulkClassificationMixin(object):
+    async def create(self, data, **kwargs):
+        await self.client.post(self.url, data=data)
+        models.invalidate_entities(self.client, data.get('entityGuids') or [])
+
+
+class AsyncTypeDefMixin(object):
+    async def delete(self):
+        await self.client.delete(self.url, data=self._data)
+        self._data = {}
+        return self
+
+
+class AsyncRelationshipGuidMixin(object):
+    async def update(self, **kwargs):
+        data = self._generate_input_dict(**kwargs)
+        url = self.parent.url + '/relationship'
+        self.load(await self.client.put(url, data=data))
+        return self
+
+
+class AsyncRelationshipMixin(object):
+    async def update(self, **kwargs):
+        data = self._generate_input_dict(**kwargs)
+        await self.client.put(self.url, data=data)
+        return self
+
+    async def create(self, **kwargs):
+        data = self._generate_input_dict(**kwargs)
+        await self.client.post(self.url, data=data)
+        return self
+
+
+class AsyncSearchBasicMixin(object):
+    async def create(self, data, **kwargs):
+        self.load(await self.client.post(self.url, data=data))
+        return self
+
+
+class AsyncSearchCollectionMixin(object):
+    async def iter_pages(self, page_size=None, prefetch=0, raw=False):
+        """Generate the result pages one at a time, as an asynchronous generator:
+
+            async for page in atlas.search_dsl(query='hive_table').iter_pages(page_size=500, prefetch=4):
+                ...
+
+        With prefetch=N, N page requests are kept in flight.
+        """
+        self.check_version()
+        limit, pages = self._page_params(page_size)
+        pending = collections.deque()
+        try:
+            while True:
+                while len(pending) < max(1, prefetch):
+                    pending.append(asyncio.ensure_future(self.client.get(self.url, params=next(pages))))
+                response = await pending.popleft()
+                count = models.search_result_count(response)
+                if raw:
+                    yield response
+                else:
+                    page = self.model_class(self, href=self.url)
+                    page.load(response)
+                    yield page
+                if count < limit:
+                    return
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def iter_entities(self, page_size=None, prefetch=0, compact=None, raw=False):
+        async for page in self.iter_pages(page_size=page_size, prefetch=prefetch, raw=raw):
+            entities = models.search_result_entities(page) if raw else self._page_entities(page, compact)
+            for entity in entities:
+                yield entity
+
+    async def to_columns(self, columns=columnar.ENTITY_COLUMNS, attributes=None, page_size=None, prefetch=0):
+        result = None
+        async for response in self.iter_pages(page_size=page_size, prefetch=prefetch, raw=True):
+            result = self._append_columns(result, response, columns, attributes)
+        return result if result is not None else columnar.Columns(columns, attributes)
+
+
+class AsyncSearchSavedMixin(object):
+    async def inflate(self):
+        if not self._is_inflated:
+            if self._is_inflating:
+                msg = ("There is not enough data to inflate this object.  "
+                       "Need either an href: {} or a {}: {}")
+                msg = msg.format(self._href, self.primary_key, self._data.get(self.primary_key))
+                raise exceptions.ClientError(msg)
+
+            self._is_inflating = True
+
+            try:
+                self.load(await self.client.request(self.method, self.url))
+            except Exception:
+                self.load(self._data)
+
+            self._is_inflated = True
+            self._is_inflating = False
+        return self
+
+    async def create(self, data, **kwargs):
+        await self.client.post(self.url, data=data)
+        return self
+
+    async def update(self, data, **kwargs):
+        self.method = 'put'
+        self.load(await self.client.put(self.parent.url, data=data))
+        return self
+
+
+class AsyncLineageGuidCollectionMixin(object):
+    async def expand(self, guid, direction='INPUT', depth=3, max_depth=None, max_workers=None, graph=None):
+        if graph is None:
+            graph = lineage.LineageGraph()
+        semaphore = asyncio.Semaphore(max_workers or self.client.client.max_connections)
+
+        async def fetch(guid, direction):
+            async with semaphore:
+                return await self.client.get('/'.join([self.url, guid]),
+                                             params={'direction': direction, 'depth': depth})
+
+        for one_direction in (('INPUT', 'OUTPUT') if direction == 'BOTH' else (direction,)):
+            expanded = set()
+            frontier = [guid]
+            while frontier:
+                expanded.update(frontier)
+                candidates = set()
+                for response in await asyncio.gather(*[fetch(item, one_direction) for item in frontier]):
+                    graph.add(response)
+                    candidates |= lineage.response_boundary(response, one_direction)
+                frontier = lineage.next_frontier(graph, guid, one_direction,
+                                                 candidates - expanded, max_depth)
+        return graph
+
+
+class AsyncLineageGuidMixin(object):
+    async def graph(self):
+        return lineage.LineageGraph([await self.to_dict()])
+
+
+ASYNC_OVERRIDES = {
+    models.EntityPostCollection: AsyncEntityPostCollectionMixin,
+    models.EntityGuidClassificationCollection: AsyncEntityGuidClassificationCollectionMixin,
+    models.EntityGuidClassification: AsyncEntityGuidClassificationMixin,
+    models.EntityBulkCollection: AsyncEntityBulkCollectionMixin,
+    models.TypeDefs: AsyncTypeDefsMixin,
+    models.EntityGuid: AsyncEntityGuidMixin,
+    models.EntityBulkClassification: AsyncEntityBulkClassificationMixin,
+    models.TypeDef: AsyncTypeDefMixin,
+    models.RelationshipGuid: AsyncRelationshipGuidMixin,
+    models.Relationship: AsyncRelationshipMixin,
+    models.SearchAttributeCollection: AsyncSearchCollectionMixin,
+    models.SearchBasicCollection: AsyncSearchCollectionMixin,
+    models.SearchBasic: AsyncSearchBasicMixin,
+    models.SearchDslCollection: AsyncSearchCollectionMixin,
+    models.SearchFulltextCollection: AsyncSearchCollectionMixin,
+    models.SearchSaved: AsyncSearchSavedMixin,
+    models.LineageGuidCollection: AsyncLineageGuidCollectionMixin,
+    models.LineageGuid: AsyncLineageGuidMixin,
+}
+
+_ASYNC_CLASSES = {}
+
+
+def _async_class(cls, async_base):
+    if issubclass(async_base, cls):
+        bases = (async_base,)
+    else:
+        bases = (cls, async_base)
+    if cls in ASYNC_OVERRIDES:
+        bases = (ASYNC_OVERRIDES[cls],) + bases
+    return type('Async' + cls.__name__, bases, {})
+
+
+def async_model_class(model_class):
+    """Return the asynchronous counterpart of a QueryableModel class.
+
+    The generated classes are cached, so each model class only gets one
+    asynchronous twin (along with its collection class).
+    """
+    if model_class not in _ASYNC_CLASSES:
+        collection_class = _async_class(model_class.collection_class,
+                                        AsyncQueryableModelCollection)
+        async_class = _async_class(model_class, AsyncQueryableModel)
+        async_class.collection_class = collection_class
+        _ASYNC_CLASSES[model_class] = async_class
+    return _ASYNC_CLASSES[model_class]
@@ -250,20 +250,35 @@ class QueryableModelCollection(ModelCollection):
     def inflate(self):
         """Load the collection from the server, if necessary."""
         if not self._is_inflated:
-            self.check_version()
-            for k, v in self._filter.items():
-                if '[' in v:
-                    try:
-                        self._filter[k] = ast.literal_eval(v)
-                    except SyntaxError:
-                        # In case of DSL Queries, we can specify the list in a query
-                        # but this will try to evaluate this as a list and failed as syntax error.
-                        self._filter[k] = v
-            self.load(self.client.get(self.url, params=self._filter))
+            self.load(self.fetch())
 
         self._is_inflated = True
         return self
 
+    def fetch(self):
+        """Send the request(s) loading the collection and return the decoded response.
+
+        No model is built: this is what inflate() loads the collection from.
+        """
+        self.check_version()
+        return self.client.get(self.url, params=self.query_params())
+
+    def query_params(self):
+        """The query parameters sent when loading the collection.
+
+        List values are JSON-encoded when the collection is called, so they are
+        turned back into lists here to be sent as repeated parameters.
+        """
+        for k, v in self._filter.items():
+            if isinstance(v, six.string_types) and '[' in v:
+                try:
+                    self._filter[k] = ast.literal_eval(v)
+                except (SyntaxError, ValueError):
+                    # In case of DSL Queries, we can specify the list in a query
+                    # but this will try to evaluate this as a list and failed as syntax error.
+                    self._filter[k] = v
+        return self._filter
+
     @events.evented
     def load(self, response):
         """Parse the GET response for the collection.
@@ -340,7 +355,72 @@ class DependentModelCollection(ModelCollection):
     the model objects when a collection is called with a list of dictionaries
     provided by another API response.  There's no lazy-loading here and no way
     to regenerate the collection other than refreshing the parent object.
+
+    The collection keeps the list of dictionaries, and each model is only
+    built the first time it is accessed, by iteration, index or slice:
+
+        entities = page.entities
+        len(entities)     # no model is built
+        entities[:10]     # only the first ten are
+
+    Collections setting source_key are filled with the list found under that
+    key in the data of their parent.
+
+    With compact=True (or the compact_models option of the client), the
+    models are built as CompactModel objects instead.
     """
+    source_key = None
+
+    def __init__(self, client, model_class, parent=None, compact=None):
+        super(DependentModelCollection, self).__init__(client, model_class, parent=parent)
+        self.compact = compact
+        if self.source_key is not None and parent is not None:
+            self._set_items(parent._data.get(self.source_key) or [])
+
+    @property
+    def item_class(self):
+        """The class of the models built by the collection."""
+        compact = self.compact
+        if compact is None:
+            compact = getattr(self.client, 'compact_models', False)
+        return compact_model_class(self.model_class) if compact else self.model_class
+
+    def _set_items(self, items):
+        # the dictionaries are adopted as they are, not copied
+        self._items = items
+        self._built = [None] * len(items)
+
+    @property
+    def _models(self):
+        return [self._model(index) for index in range(len(self._items))]
+
+    @_models.setter
+    def _models(self, models):
+        self._items = [model._data for model in models]
+        self._built = list(models)
+
+    def _model(self, index):
+        model = self._built[index]
+        if model is None:
+            model = self._built[index] = self.item_class(self, data=self._items[index])
+        return model
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._model(i) for i in range(*index.indices(len(self._items)))]
+        if index < 0:
+            index += len(self._items)
+        if not 0 <= index < len(self._items):
+            raise IndexError("collection index out of range")
+        return self._model(index)
+
+    def next(self):
+        self.inflate()
+        if self._iter_marker >= len(self._items):
+            raise StopIteration
+        model = self._model(self._iter_marker)
+        self._iter_marker += 1
+        return model
 
     def __call__(self, *args):
         """Generate the models for this collection.
@@ -372,10 +452,7 @@ class DependentModelCollection(ModelCollection):
                 return None
 
         if len(items) > 0:
-            self._models = []
-            for item in items:
-                model = self.model_class(self, data=item)
-                self._models.append(model)
+            self._set_items(items)
 
         return self
 
@@ -384,11 +461,7 @@ class DependentModelCollection(ModelCollection):
         return self
 
     def __len__(self):
-        if self._is_inflated:
-            return len(self._models)
-        else:
-            self.inflate()
-            return len(self._models)
+        return len(self._items)
 
 
 class Model(object):
@@ -418,16 +491,23 @@ class Model(object):
     min_version = OLDEST_SUPPORTED_VERSION
 
     def __init__(self, parent, data=None):
-        if data is None:
-            data = {}
-
-        self._data = dict((key, value) for key, value in six.iteritems(data)
-                          if key in set(self.fields))
+        # the dictionary is adopted as it is: the fields are filtered when
+        # they are accessed, not copied out of the response
+        self._data = data if data is not None else {}
         self.parent = parent
         self.client = parent.client
         self._is_inflated = False
         self._relationship_cache = {}
 
+    @classmethod
+    def field_set(cls):
+        """The fields of the class as a frozenset, computed once per class."""
+        field_set = cls.__dict__.get('_field_set')
+        if field_set is None:
+            fields = (cls.fields,) if isinstance(cls.fields, six.string_types) else cls.fields
+            field_set = cls._field_set = frozenset(fields)
+        return field_set
+
     def __dir__(self):
         fields_dict = dict()
         for field in self.fields:
@@ -468,7 +548,7 @@ class Model(object):
                 )
             return self._relationship_cache[attr]
 
-        if attr in self.fields:
+        if attr in self.field_set():
             # if it came from a parent inflation, we might only have partial data
             if attr not in self._data:
                 self.inflate()
@@ -539,6 +619,120 @@ class DependentModel(Model):
         self._is_inflated = True
         return self
 
+    def to_dict(self):
+        field_set = self.field_set()
+        return dict((key, value) for key, value in six.iteritems(self._data) if key in field_set)
+
+
+_MISSING = object()
+
+
+class CompactModel(object):
+    """A read-only, memory-efficient variant of a DependentModel.
+
+    Large result sets (e.g. 100k entities of a search) are expensive with
+    regular models: each one has an instance dictionary, a filtered copy of
+    its data and a relationship cache.  A compact model only has two slots,
+    its parent and a tuple of its field values.  The position of each field
+    in the tuple is given by a table shared by all the instances of the
+    class.
+
+    The fields and relationships are accessed as attributes, like on the
+    model class it stands for; use compact_model_class() to get that
+    variant.  Compact models are not instances of their model class.
+    """
+    __slots__ = ('parent', '_values')
+    model_class = None
+    primary_key = None
+    fields = ()
+    relationships = {}
+    _field_index = {}
+
+    def __init__(self, parent, data=None):
+        self.parent = parent
+        if data:
+            self._values = tuple(data.get(field, _MISSING) for field in self.fields)
+        else:
+            self._values = (_MISSING,) * len(self.fields)
+
+    def __getattr__(self, attr):
+        if attr in self.relationships:
+            rel_class = self.relationships[attr]
+            # only the classes having relationships have a _relationship_cache slot
+            cache = getattr(self, '_relationship_cache', None)
+            if cache is None:
+                cache = self._relationship_cache = {}
+            if attr not in cache:
+                if issubclass(rel_class, DependentModel):
+                    cache[attr] = rel_class.collection_class(self.client, rel_class,
+                                                             parent=self, compact=True)
+                else:
+                    cache[attr] = rel_class.collection_class(self.client, rel_class, parent=self)
+            return cache[attr]
+
+        index = self._field_index.get(attr)
+        if index is not None:
+            value = self._values[index]
+            return None if value is _MISSING else value
+
+        raise AttributeError(attr)
+
+    def __dir__(self):
+        return list(self.fields) + list(self.relationships)
+
+    @property
+    def client(self):
+        return self.parent.client
+
+    @property
+    def _data(self):
+        return dict((field, value) for field, value in zip(self.fields, self._values)
+                    if value is not _MISSING)
+
+    @property
+    def identifier(self):
+        if self.primary_key is None:
+            return None
+        return str(getattr(self, self.primary_key))
+
+    def inflate(self):
+        return self
+
+    def refresh(self):
+        return self
+
+    def wait(self, **kwargs):  # pylint: disable=unused-argument
+        return self
+
+    def to_dict(self):
+        return self._data
+
+    def to_json_dict(self):
+        return {self.primary_key: self.identifier}
+
+
+_COMPACT_CLASSES = {}
+
+
+def compact_model_class(model_class):
+    """Return the CompactModel variant of a DependentModel class.
+
+    The generated classes are cached, so that each model class only gets one
+    field index table.
+    """
+    if model_class not in _COMPACT_CLASSES:
+        fields = model_class.fields
+        fields = (fields,) if isinstance(fields, six.string_types) else tuple(fields)
+        slots = ('_relationship_cache',) if model_class.relationships else ()
+        attrs = {'__slots__': slots,
+                 'model_class': model_class,
+                 'primary_key': model_class.primary_key,
+                 'fields': fields,
+                 'relationships': model_class.relationships,
+                 '_field_index': dict((field, index) for index, field in enumerate(fields))}
+        _COMPACT_CLASSES[model_class] = type('Compact' + model_class.__name__, (CompactModel,), attrs)
+    return _COMPACT_CLASSES[model_class]
+
 
 class QueryableModel(Model):
     """A queryable model is a model that is backed by a URL.
@@ -575,6 +769,9 @@ class QueryableModel(Model):
     data_key = None
     relationships = {}
     method = "get"  # To keep track of the method type of each request
+    # seconds a GET response of this endpoint may be served from the client's
+    # response cache, None if it must never be cached
+    cache_ttl = None
 
     def __init__(self, *args, **kwargs):
         self.request = None
@@ -586,6 +783,11 @@ class QueryableModel(Model):
             self._href = None
         self._is_inflating = False
         super(QueryableModel, self).__init__(*args, **kwargs)
+        # the initial data is small and often belongs to the caller (e.g. the
+        # payload of create()), so it is copied before load() merges into it
+        field_set = self.field_set()
+        self._data = dict((key, value) for key, value in six.iteritems(self._data)
+                          if key in field_set)
 
     @property
     def url(self):
@@ -659,7 +861,7 @@ class QueryableModel(Model):
         if 'href' in response:
             self._href = response.pop('href')
         if self.data_key and self.data_key in response:
-            self._data.update(response.pop(self.data_key))
+            self._merge_data(response.pop(self.data_key))
             #  preload related object collections, if received
             for rel in [x for x in self.relationships if x in response and response[x]]:
                 rel_class = self.relationships[rel]
@@ -668,7 +870,14 @@ class QueryableModel(Model):
                 )
                 self._relationship_cache[rel] = collection(response[rel])
         else:
-            self._data.update(response)
+            self._merge_data(response)
+
+    def _merge_data(self, data):
+        """Merge a response into _data, adopting it when _data is still empty."""
+        if self._data or not isinstance(data, dict):
+            self._data.update(data)
+        else:
+            self._data = data
 
     @events.evented
     def create(self, **kwargs):
@@ -724,56 +933,118 @@ class QueryableModel(Model):
             self.request = None
         return self.inflate()
 
-    def entities_with_relationships(self, attributes=None):
+    def entities_with_relationships(self, attributes=None, max_depth=1):
         """
         In some cases Atlas does not provide the relationship attributes in
         referredEntities dictionary. To handle all those corner cases (like searching
         on the parent type etc. this function verifies if attribute is under referredEntities,
         otherwise fetch it and store it for further use.
         :param attributes: A list of relationship attributes.
+        :param max_depth: How many levels of relationship attributes are resolved:
+            1 for the attributes of the entities, 2 for the attributes of the
+            entities they refer to as well, etc.  None resolves every level.
         :return: A list of entities, with detailed relationship attributes.
         """
-
-        def _fix_relationships(client, entities, ref_entities, attrs):
-            rel_attribute_ids = set()
-            for entity in entities:
-                relationship_attrs = entity.relationshipAttributes
-
-                # Only fix the attributes if specified in parameter, else fix all.
-                attrs = attrs or relationship_attrs.keys()
-
-                for attribute in attrs:
-                    rel_attr = relationship_attrs.get(attribute)
-                    if isinstance(rel_attr, list):
-                        for index, item in enumerate(rel_attr):
-                            guid = item.guid if hasattr(item, 'guid') else item.get('guid')
-                            # A check to be on the safe side / and for test cases
-                            if guid:
-                                if guid in ref_entities:
-                                    entity.relationshipAttributes[attribute][index] = ref_entities[guid]
-                                else:
-                                    rel_attribute_ids.add(guid)
-                    if isinstance(rel_attr, dict):
-                        guid = rel_attr.get('guid')
-                        # A check to be on the safe side / and for test cases
-                        if guid:
-                            if guid in ref_entities:
-                                entity.relationshipAttributes[attribute] = ref_entities[guid]
-                            else:
-                                rel_attribute_ids.add(guid)
-
-            if rel_attribute_ids:
-                _rel_attr_collection = client.entity_bulk(guid=list(rel_attribute_ids))
-                # noinspection PyTypeChecker
-                for rel_entities in _rel_attr_collection:
-                    ref_entities.update(dict((rel_entity.guid, rel_entity._data)
-                                             for rel_entity in rel_entities.entities))
-
-                    # Fix remaining entities recursively
-                    entities = _fix_relationships(client, entities, ref_entities, attrs)
-
-            return entities
-
         if self.entities and isinstance(self.entities, DependentModelCollection):
-            referred_entities = self.referredEntities or dict()
-            return _fix_relationships(self.client, self.entities, referred_entities, attributes)
+            referred_entities = self.referredEntities
+            if referred_entities is None:
+                referred_entities = self._data['referredEntities'] = {}
+            resolver = RelationshipResolver([entity._data for entity in self.entities],
+                                            referred_entities, attributes, max_depth)
+            missing = resolver.missing()
+            while missing is not None:
+                responses = []
+                if missing:
+                    responses = [bulk._data for bulk in self.client.entity_bulk(guid=missing)]
+                missing = resolver.resolve(responses)
+            return self.entities
+
+
+class RelationshipResolver(object):
+    """Replaces the relationship attributes referring to entities by these entities, level by level.
+
+    Each round collects the GUIDs that are missing from the referredEntities
+    index for the whole level; they are then fetched with one entity_bulk
+    lookup (chunked and parallelized by the collection), and the level below
+    becomes the next round.  An entity is expanded at most once, and the
+    first level entities are not expanded again when referred to (their
+    references are replaced by the entities found in, or fetched into, the
+    index), which keeps the resolved structures acyclic.
+
+    The relationship attributes of the first level are resolved in place.
+    Deeper levels resolve copies of the referred entities, so that the
+    referredEntities index is left untouched.
+    """
+    def __init__(self, entities, index, attributes=None, max_depth=1):
+        self.level = [entity['relationshipAttributes'] for entity in entities
+                      if entity.get('relationshipAttributes')]
+        self.index = index
+        self.attributes = attributes
+        self.max_depth = max_depth
+        self.depth = 1
+        # the GUIDs left as references, those Atlas did not return
+        self._skipped = set()
+        # the first level entities are being expanded in place
+        self._expanded = set(entity.get('guid') for entity in entities)
+
+    @staticmethod
+    def _guid(item):
+        return item.guid if hasattr(item, 'guid') else item.get('guid')
+
+    def _references(self, relationship_attributes):
+        """Generate the (attribute, index, guid) of the references of a level entity."""
+        for attribute in self.attributes or list(relationship_attributes.keys()):
+            value = relationship_attributes.get(attribute)
+            if isinstance(value, list):
+                for position, item in enumerate(value):
+                    guid = self._guid(item) if item is not None else None
+                    # A check to be on the safe side / and for test cases
+                    if guid:
+                        yield attribute, position, guid
+            elif isinstance(value, dict):
+                guid = value.get('guid')
+                if guid:
+                    yield attribute, None, guid
+
+    def missing(self):
+        """The GUIDs to fetch before the current level is resolved, None when done."""
+        if not self.level or (self.max_depth is not None and self.depth > self.max_depth):
+            return None
+        missing = set()
+        for relationship_attributes in self.level:
+            for _, _, guid in self._references(relationship_attributes):
+                if guid not in self.index and guid not in self._skipped:
+                    missing.add(guid)
+        return sorted(missing)
+
+    def resolve(self, responses):
+        """Index the entity_bulk responses, resolve the current level and return the next missing GUIDs."""
+        for response in responses:
+            for entity in response.get('entities') or []:
+                self.index[entity['guid']] = entity
+            for guid, entity in six.iteritems(response.get('referredEntities') or {}):
+                self.index.setdefault(guid, entity)
+
+        expand = self.max_depth is None or self.depth < self.max_depth
+        next_level = []
+        for relationship_attributes in self.level:
+            for attribute, position, guid in list(self._references(relationship_attributes)):
+                if guid in self._skipped or guid not in self.index:
+                    self._skipped.add(guid)
+                    continue
+                resolved = self.index[guid]
+                if expand and guid not in self._expanded:
+                    self._expanded.add(guid)
+                    resolved = dict(resolved)
+                    resolved['relationshipAttributes'] = dict(
+                        (key, list(value) if isinstance(value, list) else value)
+                        for key, value in six.iteritems(resolved.get('relationshipAttributes') or {}))
+                    next_level.append(resolved['relationshipAttributes'])
+                if position is None:
+                    relationship_attributes[attribute] = resolved
+                else:
+                    relationship_attributes[attribute][position] = resolved
+
+        self.level = next_level
+        self.depth += 1
+        return self.missing()
@@ -0,0 +1,229 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Client-side caches.
+"""
+
+import collections
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from atlasclient.utils import NullHandler
+
+LOG = logging.getLogger(__name__)
+LOG.addHandler(NullHandler())
+
+try:
+    _now = time.monotonic
+except AttributeError:  # Python 2
+    _now = time.time
+
+
+class EntityCache(object):
+    """An LRU cache of entities, keyed by GUID, with an optional time-to-live.
+
+    Pass an instance to the Atlas client to enable it:
+
+        client = Atlas(host, entity_cache=EntityCache(max_entries=50000, ttl=300))
+
+    Every response carrying full entities (entity_guid, entity_unique_attribute,
+    entity_bulk) fills the cache, and entity_guid/entity_bulk lookups are
+    served from it before any request is sent.
+
+    Entities are stored as JSON strings, so that cached entities are never
+    shared with (and modified through) the models, and so that max_bytes
+    bounds the actual size of the cached data.  The cache is thread-safe.
+    """
+    def __init__(self, max_entries=10000, max_bytes=None, ttl=None, clock=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock or _now
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, guid):
+        return self.get(guid, count=False) is not None
+
+    def get(self, guid, count=True):
+        """Return a copy of the cached entity, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(guid)
+            if entry is not None and entry[1] is not None and entry[1] <= self._clock():
+                self._remove(guid)
+                entry = None
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return None
+            if count:
+                self.hits += 1
+            # most recently used entities go at the end
+            del self._entries[guid]
+            self._entries[guid] = entry
+        return json.loads(entry[0])
+
+    def get_many(self, guids):
+        """Return a {guid: entity} dictionary of the cached entities among guids."""
+        found = {}
+        for guid in guids:
+            entity = self.get(guid)
+            if entity is not None:
+                found[guid] = entity
+        return found
+
+    def put(self, entity):
+        """Cache an entity dictionary.  Entities without a GUID are ignored."""
+        guid = entity.get('guid') if isinstance(entity, dict) else None
+        if not guid:
+            return
+        serialized = json.dumps(entity)
+        expires = self._clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._remove(guid)
+            self._entries[guid] = (serialized, expires)
+            self._bytes += len(serialized)
+            self._evict()
+
+    def put_many(self, entities):
+        for entity in entities:
+            self.put(entity)
+
+    def invalidate(self, guid):
+        with self._lock:
+            self._remove(guid)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def size(self):
+        """Number of bytes of JSON held by the cache."""
+        return self._bytes
+
+    def _remove(self, guid):
+        entry = self._entries.pop(guid, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+    def _evict(self):
+        while self._entries and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries) or
+                (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            guid = next(iter(self._entries))
+            LOG.debug("Evicting entity %s from the cache", guid)
+            self._remove(guid)
+
+
+class ResponseCache(object):
+    """Interface of the response caches used by HttpClient.
+
+    A response cache stores the decoded bodies of GET responses under a key
+    built from the request, until their time-to-live expires.  Subclass it to
+    plug in another storage.
+    """
+    def get(self, key):
+        """Return the cached response for key, or None if missing or expired."""
+        raise NotImplementedError("'get' must be defined by subclasses")
+
+    def put(self, key, url, response, ttl):
+        """Cache response under key for ttl seconds."""
+        raise NotImplementedError("'put' must be defined by subclasses")
+
+    def invalidate(self, url):
+        """Drop the cached responses of url and of the resources below it."""
+        raise NotImplementedError("'invalidate' must be defined by subclasses")
+
+    def clear(self):
+        raise NotImplementedError("'clear' must be defined by subclasses")
+
+
+class SQLiteResponseCache(ResponseCache):
+    """A response cache persisted in a SQLite database.
+
+    The cache survives restarts of the process, so that reruns of a job are
+    served locally for as long as the cached responses are fresh:
+
+        client = Atlas(host, response_cache=SQLiteResponseCache('/tmp/atlas.db'))
+
+    Expiration dates are wall clock times, as they must stay meaningful across
+    processes.  The cache is thread-safe, and several processes may share the
+    same database file.
+    """
+    def __init__(self, path=':memory:', timeout=10):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses '
+                '(key TEXT PRIMARY KEY, url TEXT NOT NULL, body TEXT NOT NULL, expires REAL NOT NULL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS responses_url ON responses (url)')
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def get(self, key):
+        with self._lock:
+            row = self._connection.execute('SELECT body, expires FROM responses WHERE key = ?',
+                                           (key,)).fetchone()
+            if row is not None and row[1] <= time.time():
+                with self._connection:
+                    self._connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, url, response, ttl):
+        body = json.dumps(response)
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                                     (key, url, body, time.time() + ttl))
+
+    def invalidate(self, url):
+        # the url itself and its sub resources, but not its siblings
+        pattern = url.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM responses WHERE url = ? OR url LIKE ? ESCAPE '\\'",
+                (url, pattern + '/%'))
+
+    def purge(self):
+        """Delete the expired responses."""
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM responses WHERE expires <= ?', (time.time(),))
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM responses')
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -10,16 +10,21 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import copy
 import functools
 import io
 import json
 import logging
 import tarfile
+import threading
+import timeit
 
 import requests
+import six
+from urllib3.util.retry import Retry
 
-from atlasclient import models, utils, base, exceptions
+from atlasclient import models, utils, base, concurrency, exceptions, limits, retry, metrics as request_metrics
 from atlasclient.exceptions import handle_response
 
 LOG = logging.getLogger(__name__)
@@ -56,6 +61,50 @@ ENTRY_POINTS = {'entity_guid': models.EntityGuid,
                 'admin_metrics': models.AdminMetrics
                }
 
+# the model paths, longest first so that 'entity/bulk/classification' is
+# matched before 'entity/bulk'
+ENDPOINT_PATHS = sorted(set(model.path for model in ENTRY_POINTS.values()), key=len, reverse=True)
+API_PREFIXES = ('/api/atlas/v2/', '/api/atlas/admin/')
+
+
+def endpoint_path(url):
+    """The path of the entry point a request url belongs to, e.g. 'entity/guid'.
+
+    Return None if the url is not one of the Atlas API.
+    """
+    url = url.split('?', 1)[0]
+    for prefix in API_PREFIXES:
+        index = url.find(prefix)
+        if index != -1:
+            path = url[index + len(prefix):]
+            break
+    else:
+        return None
+    for endpoint in ENDPOINT_PATHS:
+        if path == endpoint or path.startswith(endpoint + '/'):
+            return endpoint
+    return None
+
+
+def endpoint_cache_ttls(overrides=None):
+    """The {endpoint path: ttl} map of the response cache.
+
+    The ttls come from the cache_ttl of the ENTRY_POINTS models, and may be
+    overridden with an {entry point name: ttl} dictionary.
+    """
+    ttls = dict((model.path, model.cache_ttl) for model in ENTRY_POINTS.values())
+    for name, ttl in (overrides or {}).items():
+        if name not in ENTRY_POINTS:
+            raise exceptions.ClientError("Unknown entry point '%s'" % name)
+        ttls[ENTRY_POINTS[name].path] = ttl
+    return ttls
+
+
+def endpoint_limits(limits):
+    """A limits dictionary keyed by endpoint paths or families, from one whose keys may be entry point names."""
+    return dict((ENTRY_POINTS[key].path if key in ENTRY_POINTS else key, value)
+                for key, value in (limits or {}).items())
+
 
 class Atlas(object):
     """The Atlas client
@@ -65,7 +114,12 @@ class Atlas(object):
     """
     def __init__(self, host, port=None, username=None, password=None,
                  identifier=None, protocol=None, validate_ssl=True,
-                 timeout=10, max_retries=5, auth=None):
+                 timeout=10, max_retries=5, auth=None,
+                 bulk_chunk_size=100, max_workers=4, entity_cache=None,
+                 conditional_requests=False, response_cache=None, response_cache_ttls=None,
+                 compact_models=False, metrics=True, retry_policy=True,
+                 rate_limits=None, concurrency_limits=None, limits_timeout=None,
+                 adaptive_concurrency=None):
 
         self.base_url = utils.generate_base_url(host, port=port, protocol=protocol)
 
@@ -75,9 +129,42 @@ class Atlas(object):
         self.client = HttpClient(host=self.base_url, username=username,
                                  password=password, identifier=identifier,
                                  validate_ssl=validate_ssl, timeout=timeout,
-                                 max_retries=max_retries, auth=auth)
+                                 max_retries=max_retries, auth=auth,
+                                 conditional_requests=conditional_requests,
+                                 response_cache=response_cache,
+                                 cache_ttls=endpoint_cache_ttls(response_cache_ttls),
+                                 metrics=metrics, retry_policy=retry_policy)
+        # client-side limits of the requests per endpoint, keyed by entry
+        # point name (e.g. 'search_basic'), endpoint path or family (e.g.
+        # 'search'), see atlasclient.limits.EndpointLimiter
+        if rate_limits or concurrency_limits:
+            self.client.limiter = limits.EndpointLimiter(rates=endpoint_limits(rate_limits),
+                                                         concurrency=endpoint_limits(concurrency_limits),
+                                                         timeout=limits_timeout)
+        # how many GUIDs go in one entity_bulk request, and how many
+        # requests may run in parallel for bulk operations
+        self.bulk_chunk_size = bulk_chunk_size
+        self.max_workers = max_workers
+        # with adaptive_concurrency (True, or an AdaptiveConcurrency), the
+        # number of parallel requests of the bulk operations is adjusted to
+        # the load of the server instead, starting from max_workers
+        if adaptive_concurrency is True:
+            adaptive_concurrency = concurrency.AdaptiveConcurrency(initial=max_workers,
+                                                                   max_limit=max(32, max_workers))
+        self.concurrency_controller = adaptive_concurrency or None
+        self.client.concurrency_controller = self.concurrency_controller
+        # an optional atlasclient.cache.EntityCache shared by the entity models
+        self.entity_cache = entity_cache
+        # build the dependent models (e.g. search result entities) as
+        # atlasclient.base.CompactModel objects
+        self.compact_models = compact_models
         self._version = None
 
+    @property
+    def metrics(self):
+        """The atlasclient.metrics.RequestMetrics of the requests sent, or None."""
+        return self.client.metrics
+
     def __dir__(self):
         d1 = {}
         d1.update(self.__dict__)
@@ -92,6 +179,11 @@ class Atlas(object):
                    utils.version_str(base.OLDEST_SUPPORTED_VERSION)))
         return
 
+    @property
+    def raw(self):
+        """The entry points, returning decoded responses instead of models (see RawAtlas)."""
+        return RawAtlas(self)
+
     def __getattr__(self, attr):
         if attr in ENTRY_POINTS:
             rel_class = ENTRY_POINTS[attr]
@@ -104,6 +196,40 @@ class Atlas(object):
         raise AttributeError(attr)
 
 
+class RawAtlas(object):
+    """The read side of the entry points, without the model layer.
+
+    The entry points are called the same way as on the client, and send the
+    same requests, but return the decoded JSON responses instead of models:
+
+        client.raw.entity_guid(GUID)['entity']['attributes']
+        client.raw.entity_bulk(guid=guids)['entities']
+        client.raw.search_dsl(query='hive_table where name="t"')['entities']
+    """
+    def __init__(self, atlas):
+        self.atlas = atlas
+
+    def __dir__(self):
+        return list(ENTRY_POINTS.keys())
+
+    def __getattr__(self, attr):
+        if attr in ENTRY_POINTS:
+            return RawEntryPoint(getattr(self.atlas, attr))
+        raise AttributeError(attr)
+
+
+class RawEntryPoint(object):
+    """An entry point of RawAtlas."""
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __call__(self, *args, **kwargs):
+        target = self.collection(*args, **kwargs)
+        if isinstance(target, base.QueryableModel):
+            return self.collection.client.request(target.method, target.url)
+        return target.fetch()
+
+
 class HttpClient(object):
     """Our HTTP based REST client.
 
@@ -114,9 +240,40 @@ class HttpClient(object):
     a response object, you get a dictionary.  A response of None means no response
     was supplied by the API.  This should be uncommon except for error cases, but
     cases do exist either due to Atlas bugs or other mitigating circumstances.
+
+    With conditional_requests enabled, the ETag and Last-Modified validators of
+    GET responses are remembered per url and query parameters, and sent back
+    on the next GET of the same resource.  When the server answers 304 Not
+    Modified, the previously received body is returned again.  This makes
+    refresh() cheap for resources that seldom change (typedefs, saved searches,
+    metrics...).
+
+    With a response_cache (see atlasclient.cache.ResponseCache), the decoded
+    GET responses of the endpoints having a ttl in cache_ttls are stored, and
+    served from the cache without any request until they expire.  Any other
+    successful request invalidates the cached responses of its url, and the
+    writes to the entity endpoints those of the entities they changed.
+
+    Every request sent is recorded in metrics (see
+    atlasclient.metrics.RequestMetrics), under the path of its entry point.
+    metrics may be True for a new RequestMetrics, or None to record nothing.
+
+    The requests failing with a 429, 502, 503 or 504 response are retried
+    according to retry_policy (see atlasclient.retry.RetryPolicy), True for
+    the default policy or None to never retry them.  The read errors and
+    timeouts of the idempotent methods are retried by the policy as well.
+    Failures to connect are retried by the connection adapter only, up to
+    max_retries times.
+
+    With a limiter (see atlasclient.limits.EndpointLimiter), every request
+    waits for the rate and concurrency limits of its endpoint to allow it.
     """
+    # maximum number of GET responses remembered for conditional requests
+    max_conditional_entries = 1000
+
     def __init__(self, host, username, password, identifier, validate_ssl=True,
-                 timeout=10, max_retries=5, auth=None):
+                 timeout=10, max_retries=5, auth=None, conditional_requests=False,
+                 response_cache=None, cache_ttls=None, metrics=True, retry_policy=True, limiter=None):
         basic_token = utils.generate_http_basic_token(username=username, password=password)
         self.request_params = {
             'headers': {'X-Requested-By': identifier,
@@ -125,11 +282,30 @@ class HttpClient(object):
             'verify': validate_ssl,
             'timeout': timeout,
         }
+        if retry_policy is True:
+            retry_policy = retry.RetryPolicy()
+        self.retry_policy = retry_policy or None
+        self.limiter = limiter
+        # an atlasclient.concurrency.AdaptiveConcurrency told about the
+        # retried overload responses
+        self.concurrency_controller = None
+        if isinstance(max_retries, six.integer_types):
+            # leave the statuses, their Retry-After headers and the read errors
+            # (which may only be retried for the idempotent methods) to the retry policy
+            max_retries = Retry(total=max_retries, read=False, respect_retry_after_header=False)
         # automatically retry requests on connection errors
         self.session = requests.Session()
         self.session.auth = auth
         adapter = requests.adapters.HTTPAdapter(max_retries=max_retries)
         self.session.mount(host, adapter)
+        self.conditional_requests = conditional_requests
+        self._validators = collections.OrderedDict()
+        self._validators_lock = threading.Lock()
+        self.response_cache = response_cache
+        self.cache_ttls = cache_ttls if cache_ttls is not None else endpoint_cache_ttls()
+        if metrics is True:
+            metrics = request_metrics.RequestMetrics()
+        self.metrics = metrics or None
 
     def request(self, method, url, content_type=None, **kwargs):
         # doing it this way keeps the magic for following redirects intact
@@ -151,10 +327,42 @@ class HttpClient(object):
         elif 'data' in params and isinstance(params['data'], list):
             params['data'] = json.dumps(params['data'])
 
-        response = requests_method(url, **params)
+        cache_key = cache_ttl = None
+        if self.response_cache is not None and method == 'get':
+            cache_ttl = self.cache_ttls.get(endpoint_path(url))
+            if cache_ttl:
+                cache_key = self._response_cache_key(method, url, params.get('params'))
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    LOG.debug("Response served from the cache: %s %s", method, url)
+                    return cached
+
+        conditional_key = None
+        if self.conditional_requests and method == 'get':
+            conditional_key = self._conditional_key(url, params.get('params'))
+            validators = self._get_validators(conditional_key)
+            if validators is not None:
+                if validators['etag']:
+                    params['headers']['If-None-Match'] = validators['etag']
+                if validators['last_modified']:
+                    params['headers']['If-Modified-Since'] = validators['last_modified']
+
+        if self.retry_policy is not None:
+            response = self.retry_policy.call(functools.partial(self._send, requests_method, method, url, params),
+                                              method, functools.partial(self._on_retry, method, url))
+        else:
+            response = self._send(requests_method, method, url, params)
 
-        # any error responses will generate exceptions here
-        handle_response(response)
+        if conditional_key is not None and response.status_code == 304 and validators is not None:
+            LOG.debug("Not modified: %s %s", method, url)
+            result = json.loads(validators['text']) if validators['text'] else {}
+            self._cache_response(cache_key, url, result, cache_ttl)
+            return result
+
+        if conditional_key is not None:
+            self._set_validators(conditional_key, response)
+        if self.response_cache is not None and method != 'get':
+            self.response_cache.invalidate(url.split('?', 1)[0])
 
         LOG.debug("Response headers: %s", response.headers)
         LOG.debug("Response: %s", response.text)
@@ -175,9 +383,108 @@ class HttpClient(object):
                 # Log bad methods so we can report them
                 LOG.debug("Wrong response content-type for %s %s: %s", method,
                           url, response.headers.get('content-type'))
-            return response.json()
-
-        return {}
+            result = response.json()
+        else:
+            result = {}
+
+        if self.response_cache is not None and method != 'get':
+            self._invalidate_entity_responses(url, params.get('data'), result)
+        self._cache_response(cache_key, url, result, cache_ttl)
+        return result
+
+    def _send(self, requests_method, method, url, params):
+        if self.limiter is not None:
+            with self.limiter.limit(endpoint_path(url)):
+                return self._send_once(requests_method, method, url, params)
+        return self._send_once(requests_method, method, url, params)
+
+    def _send_once(self, requests_method, method, url, params):
+        response = None
+        start = timeit.default_timer()
+        try:
+            response = requests_method(url, **params)
+        finally:
+            if self.metrics is not None:
+                self._record_metrics(method, url, params.get('data'), response,
+                                     timeit.default_timer() - start)
+        # any error responses will generate exceptions here
+        handle_response(response)
+        return response
+
+    def _on_retry(self, method, url, error, attempt, delay):
+        LOG.warning("Retrying %s %s in %.1fs (retry %s): %s", method, url, delay, attempt + 1, error)
+        if self.metrics is not None:
+            self.metrics.record_retry(endpoint_path(url), method)
+        controller = self.concurrency_controller
+        if controller is not None and isinstance(error, controller.overload_errors):
+            controller.overload()
+
+    def _record_metrics(self, method, url, data, response, latency):
+        endpoint = endpoint_path(url)
+        if response is None:
+            self.metrics.record(endpoint, method, None, latency, request_metrics.body_size(data))
+            return
+        self.metrics.record(endpoint, method, response.status_code, latency,
+                            request_metrics.body_size(data), request_metrics.body_size(response.content))
+        # the connection errors retried by the urllib3 adapter
+        retries = getattr(getattr(response, 'raw', None), 'retries', None)
+        history = getattr(retries, 'history', None)
+        if isinstance(history, tuple) and history:
+            self.metrics.record_retry(endpoint, method, len(history))
+
+    @staticmethod
+    def _response_cache_key(method, url, query_params):
+        return json.dumps([method, url, query_params], sort_keys=True, default=str)
+
+    def _invalidate_entity_responses(self, url, data, result):
+        """Drop the cached responses of the entities changed by a write to an entity endpoint.
+
+        The entity/guid responses of the changed GUIDs are dropped, and all the
+        entity/bulk and entity/uniqueAttribute ones, which can't be matched to
+        GUIDs.
+        """
+        endpoint = endpoint_path(url)
+        if endpoint is None or not (endpoint == 'entity' or endpoint.startswith('entity/')):
+            return
+        root = url.split('?', 1)[0]
+        root = root[:root.find(API_PREFIXES[0]) + len(API_PREFIXES[0])]
+        guids = models.mutated_guids(result)
+        guids.add(models.url_entity_guid(url))
+        if endpoint == 'entity/bulk/classification' and isinstance(data, six.string_types):
+            body = json.loads(data)
+            if isinstance(body, dict):
+                guids.update(body.get('entityGuids') or [])
+        for guid in guids:
+            if guid:
+                self.response_cache.invalidate(root + 'entity/guid/' + guid)
+        self.response_cache.invalidate(root + 'entity/bulk')
+        self.response_cache.invalidate(root + 'entity/uniqueAttribute')
+
+    def _cache_response(self, key, url, result, ttl):
+        if key is not None and isinstance(result, (dict, list)):
+            self.response_cache.put(key, url.split('?', 1)[0], result, ttl)
+
+    @staticmethod
+    def _conditional_key(url, query_params):
+        return url, json.dumps(query_params, sort_keys=True, default=str)
+
+    def _get_validators(self, key):
+        with self._validators_lock:
+            return self._validators.get(key)
+
+    def _set_validators(self, key, response):
+        etag = response.headers.get('etag')
+        last_modified = response.headers.get('last-modified')
+        if 'application/json' not in (response.headers.get('content-type') or ''):
+            etag = last_modified = None
+        with self._validators_lock:
+            self._validators.pop(key, None)
+            if etag or last_modified:
+                self._validators[key] = {'etag': etag,
+                                         'last_modified': last_modified,
+                                         'text': response.text}
+                while len(self._validators) > self.max_conditional_entries:
+                    self._validators.popitem(last=False)
 
     def __getattr__(self, attr):
         if getattr(requests, attr):
@@ -197,7 +504,7 @@ class AtlasJsonEncoder(json.JSONEncoder):
             for model in obj:
                 dicts.append(model.to_json_dict())
             return dicts
-        elif isinstance(obj, base.Model):
+        elif isinstance(obj, (base.Model, base.CompactModel)):
             return obj.to_json_dict()
         # Let the base class default method raise the TypeError
         return super(AtlasJsonEncoder, self).default(obj)
@@ -0,0 +1,225 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Column buffers for exporting search results to analytics tools.
+"""
+
+import array
+import collections
+import logging
+
+import six
+
+from atlasclient import exceptions
+from atlasclient.utils import NullHandler
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+LOG = logging.getLogger(__name__)
+LOG.addHandler(NullHandler())
+
+INT64_TYPECODE = 'q' if six.PY3 else 'l'
+
+# the entity header fields exported by default, and their column types
+ENTITY_COLUMNS = (('guid', 'str'),
+                  ('typeName', 'category'),
+                  ('status', 'category'),
+                  ('displayText', 'str'),
+                  ('createdBy', 'category'),
+                  ('updatedBy', 'category'),
+                  ('createTime', 'int64'),
+                  ('updateTime', 'int64'),
+                  ('version', 'int64'))
+
+
+class Column(object):
+    """A column of arbitrary Python values."""
+    def __init__(self, name=None):
+        self.name = name
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, value):
+        self.values.append(value)
+
+    def to_list(self):
+        return list(self.values)
+
+    def to_numpy(self):
+        return numpy.array(self.values, dtype=object)
+
+
+class NumericColumn(Column):
+    """A column of numbers stored in a typed array, with a validity mask for the missing values.
+
+    Numeric strings, and floats without a fractional part in integer columns,
+    are converted; other values raise atlasclient.exceptions.ClientError.
+    """
+    def __init__(self, typecode, name=None):
+        self.name = name
+        self.values = array.array(typecode)
+        self.mask = array.array('B')
+
+    def append(self, value):
+        if value is None:
+            self.values.append(0)
+            self.mask.append(0)
+            return
+        try:
+            self.values.append(self._convert(value))
+        except (TypeError, ValueError, OverflowError):
+            raise exceptions.ClientError("Invalid value %r for the %s column %s"
+                                         % (value, 'float64' if self.values.typecode == 'd' else 'int64',
+                                            self.name))
+        self.mask.append(1)
+
+    def _convert(self, value):
+        if self.values.typecode == 'd':
+            return float(value)
+        if isinstance(value, float):
+            if not value.is_integer():
+                raise ValueError(value)
+            return int(value)
+        try:
+            return int(value)
+        except ValueError:
+            # e.g. '12.0'
+            return self._convert(float(value))
+
+    def to_list(self):
+        return [value if valid else None for value, valid in zip(self.values, self.mask)]
+
+    def to_numpy(self):
+        """A numpy masked array sharing the buffer of the column."""
+        values = numpy.frombuffer(self.values, dtype=numpy.dtype(self.values.typecode))
+        mask = numpy.frombuffer(self.mask, dtype=numpy.uint8) == 0
+        return numpy.ma.masked_array(values, mask=mask)
+
+
+class CategoryColumn(Column):
+    """A dictionary-encoded column of strings.
+
+    Each distinct value is stored once in `categories`, and the column holds
+    the index of the value of each row in `codes` (-1 for missing values).
+    """
+    def __init__(self, name=None):
+        self.name = name
+        self.codes = array.array('i')
+        self.categories = []
+        self._index = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def append(self, value):
+        if value is None:
+            self.codes.append(-1)
+            return
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.categories)
+            self.categories.append(value)
+        self.codes.append(code)
+
+    def to_list(self):
+        categories = self.categories
+        return [categories[code] if code >= 0 else None for code in self.codes]
+
+    def to_numpy(self):
+        """The (codes, categories) numpy arrays of the column."""
+        return (numpy.frombuffer(self.codes, dtype=numpy.intc),
+                numpy.array(self.categories, dtype=object))
+
+
+COLUMN_TYPES = {'object': Column,
+                'str': Column,
+                'category': CategoryColumn,
+                'int64': lambda name=None: NumericColumn(INT64_TYPECODE, name),
+                'float64': lambda name=None: NumericColumn('d', name)}
+
+
+class Columns(object):
+    """Named columns filled from entity dictionaries, one row per entity.
+
+    :param columns: (name, type) pairs of the entity header fields to export,
+        the types being the keys of COLUMN_TYPES.
+    :param attributes: the entity attributes to export, as a list of names
+        (exported as Python values) or a {name: type} dictionary.  Their
+        columns are named 'attributes.<name>'.
+    """
+    def __init__(self, columns=ENTITY_COLUMNS, attributes=None):
+        self._fields = []
+        self._attributes = []
+        self.columns = collections.OrderedDict()
+        for name, column_type in columns:
+            self._fields.append((name, self._add(name, column_type)))
+        if attributes is not None and not isinstance(attributes, dict):
+            attributes = collections.OrderedDict((name, 'object') for name in attributes)
+        for name, column_type in six.iteritems(attributes or {}):
+            self._attributes.append((name, self._add('attributes.' + name, column_type)))
+
+    def _add(self, name, column_type):
+        if column_type not in COLUMN_TYPES:
+            raise exceptions.ClientError("Unknown column type '%s' for %s, must be one of %s"
+                                         % (column_type, name, ', '.join(sorted(COLUMN_TYPES))))
+        column = self.columns[name] = COLUMN_TYPES[column_type](name)
+        return column
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def append(self, entity):
+        """Add an entity dictionary as a row."""
+        for name, column in self._fields:
+            column.append(entity.get(name))
+        if self._attributes:
+            attributes = entity.get('attributes') or {}
+            for name, column in self._attributes:
+                column.append(attributes.get(name))
+
+    def append_row(self, row):
+        """Add a list of values, in the order of the columns (e.g. a row of a DSL select)."""
+        for index, (name, column) in enumerate(self._fields):
+            column.append(row[index] if index < len(row) else None)
+
+    def extend(self, entities):
+        for entity in entities:
+            self.append(entity)
+        return self
+
+    def to_dict(self):
+        """The columns as a {name: list of values} dictionary."""
+        return collections.OrderedDict((name, column.to_list())
+                                       for name, column in six.iteritems(self.columns))
+
+    def to_numpy(self):
+        """The columns as a {name: numpy array} dictionary (requires numpy).
+
+        Numeric columns are masked arrays sharing the column buffers, category
+        columns are (codes, categories) pairs.
+        """
+        if numpy is None:
+            raise exceptions.ClientError("numpy is required to export columns to numpy arrays")
+        return collections.OrderedDict((name, column.to_numpy())
+                                       for name, column in six.iteritems(self.columns))
@@ -0,0 +1,157 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Helpers to run several Atlas requests concurrently on a bounded thread pool.
+"""
+
+import collections
+import functools
+import logging
+import threading
+import timeit
+
+from concurrent import futures
+import requests
+
+from atlasclient import exceptions
+from atlasclient.utils import NullHandler
+
+LOG = logging.getLogger(__name__)
+LOG.addHandler(NullHandler())
+
+
+# the errors meaning that the server is overloaded; atlasclient.exceptions.Timeout
+# is left out, since it is raised by the client itself (e.g. when a request
+# waits too long for its client-side limits)
+OVERLOAD_ERRORS = (exceptions.RateLimitExceeded, exceptions.ServerUnavailable, exceptions.GatewayTimeout,
+                   requests.exceptions.Timeout)
+
+
+class AdaptiveConcurrency(object):
+    """An AIMD (additive increase, multiplicative decrease) limit of the calls in flight.
+
+    The limit grows by `increase` per round of `limit` successful calls, as
+    long as their latency stays within latency_tolerance times the baseline
+    latency (the lowest seen lately).  It stops growing when the latency
+    rises, and is multiplied by `decrease` when a call fails because the
+    server is overloaded (request timeouts, 429, 503, 504).  The failures of the
+    calls started before the last decrease are ignored, so that one burst of
+    errors cuts the limit once.
+
+    A controller is meant to be shared by the concurrent operations of a
+    client, see prefetch.
+    """
+    def __init__(self, initial=4, min_limit=1, max_limit=32, increase=1.0, decrease=0.5,
+                 latency_tolerance=2.0, overload_errors=OVERLOAD_ERRORS):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.overload_errors = overload_errors
+        self.baseline = None
+        self._limit = float(max(min_limit, min(max_limit, initial)))
+        self._last_decrease = None
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self):
+        """The number of calls allowed in flight."""
+        return int(self._limit)
+
+    def record(self, latency):
+        """Record the latency of a successful call."""
+        with self._lock:
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            else:
+                # let the baseline follow a server getting slower for good
+                self.baseline += (latency - self.baseline) * 0.01
+            if latency <= self.baseline * self.latency_tolerance:
+                self._limit = min(self.max_limit, self._limit + self.increase / self._limit)
+
+    def overload(self, started=None):
+        """Record an overload signal, of a call started at `started` (timeit.default_timer())."""
+        with self._lock:
+            if started is None:
+                # a signal without a start time, e.g. a retried response, is
+                # taken as coming from a call of the usual latency
+                started = timeit.default_timer() - (self.baseline or 0)
+            if self._last_decrease is not None and started < self._last_decrease:
+                return
+            self._limit = max(self.min_limit, self._limit * self.decrease)
+            self._last_decrease = timeit.default_timer()
+            LOG.debug("Server overloaded, concurrency limit cut to %s", self.limit)
+
+    def wrap(self, func):
+        """func, recording the latency and the overload errors of its calls."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = timeit.default_timer()
+            try:
+                result = func(*args, **kwargs)
+            except self.overload_errors:
+                self.overload(started)
+                raise
+            self.record(timeit.default_timer() - started)
+            return result
+        return wrapper
+
+
+def prefetch(func, args, depth, controller=None, return_exceptions=False):
+    """Generate func(arg) for each arg, in order, keeping `depth` calls in flight.
+
+    The calls run on a pool of `depth` threads, and the next call is submitted
+    as soon as a result is handed out, so the pool stays busy while the caller
+    consumes the results.  Closing the generator (e.g. breaking out of the loop
+    consuming it) cancels the calls that have not started yet.
+
+    With an AdaptiveConcurrency controller, the number of calls in flight is
+    the limit of the controller instead of depth, and follows it as it moves.
+
+    Exceptions raised by a call are re-raised when its result is reached, or
+    generated in place of its result with return_exceptions.  Either way, the
+    controller sees them.
+    """
+    args = iter(args)
+    if controller is not None:
+        func = controller.wrap(func)
+        pool = futures.ThreadPoolExecutor(max_workers=controller.max_limit)
+    else:
+        pool = futures.ThreadPoolExecutor(max_workers=depth)
+    pending = collections.deque()
+
+    def fill():
+        window = controller.limit if controller is not None else depth
+        while len(pending) < window:
+            try:
+                arg = next(args)
+            except StopIteration:
+                return
+            pending.append(pool.submit(func, arg))
+
+    try:
+        fill()
+        while pending:
+            try:
+                result = pending.popleft().result()
+            except Exception as e:  # pylint: disable=broad-except
+                if not return_exceptions:
+                    raise
+                result = e
+            fill()
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
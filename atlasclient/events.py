@@ -11,8 +11,13 @@
 #    under the License.
 
 from collections import namedtuple
+import atexit
+import functools
 import logging
 import inspect
+import threading
+
+from six.moves import queue
 
 from atlasclient.utils import NullHandler
 
@@ -20,12 +25,23 @@ LOG = logging.getLogger(__name__)
 LOG.addHandler(NullHandler())
 
 EVENT_HANDLERS = {}
+# the callbacks to fire, by (class, event, state), and whether a class has any
+# handler in its hierarchy, by class.  Both are cleared by subscribe.
+_DISPATCH = {}
+_LISTENED = {}
+# the BackgroundDelivery events are handed to, None to fire them in place
+_DELIVERY = None
+DELIVERY_POLICIES = ('block', 'drop')
 state_list = ['ANY', 'STARTED', 'FAILED', 'FINISHED', 'PROGRESS']
 states = namedtuple('EventStates', state_list)(*state_list)
 
 
 def evented(method):
+    @functools.wraps(method)
     def replacement(self, *args, **kwargs):
+        # short-circuit if nothing is listening to this class
+        if not is_listened(self.__class__):
+            return method(self, *args, **kwargs)
         publish(self, method.__name__, states.STARTED)
         try:
             return method(self, *args, **kwargs)
@@ -38,6 +54,40 @@ def evented(method):
     return replacement
 
 
+def is_listened(cls):
+    """Whether a handler is subscribed for the class or one of its parents."""
+    if len(EVENT_HANDLERS) == 0:
+        return False
+    try:
+        return _LISTENED[cls]
+    except KeyError:
+        pass
+    names = set(key.split('.', 1)[0] for key in EVENT_HANDLERS)
+    listened = _LISTENED[cls] = any(x.__name__ in names for x in inspect.getmro(cls))
+    return listened
+
+
+def _callbacks(pub_cls, event, event_state):
+    potential = [x.__name__ for x in inspect.getmro(pub_cls)]
+
+    # if we don't find a match for this event/event_state we fire the events
+    # for this event/ANY instead for the closest match
+    fallbacks = None
+    callbacks = []
+    for cls in potential:
+        event_key = '.'.join([cls, event, event_state])
+        backup_key = '.'.join([cls, event, states.ANY])
+        if event_key in EVENT_HANDLERS:
+            callbacks = EVENT_HANDLERS[event_key]
+            break
+        elif fallbacks is None and backup_key in EVENT_HANDLERS:
+            fallbacks = EVENT_HANDLERS[backup_key]
+
+    if fallbacks is not None:
+        callbacks = fallbacks
+    return tuple(callbacks)
+
+
 def publish(obj, event, event_state, **kwargs):
     """Publish an event from an object.
 
@@ -58,24 +108,21 @@ def publish(obj, event, event_state, **kwargs):
         pub_cls = obj
     else:
         pub_cls = obj.__class__
-    potential = [x.__name__ for x in inspect.getmro(pub_cls)]
 
-    # if we don't find a match for this event/event_state we fire the events
-    # for this event/ANY instead for the closest match
-    fallbacks = None
-    callbacks = []
-    for cls in potential:
-        event_key = '.'.join([cls, event, event_state])
-        backup_key = '.'.join([cls, event, states.ANY])
-        if event_key in EVENT_HANDLERS:
-            callbacks = EVENT_HANDLERS[event_key]
-            break
-        elif fallbacks is None and backup_key in EVENT_HANDLERS:
-            fallbacks = EVENT_HANDLERS[backup_key]
-
-    if fallbacks is not None:
-        callbacks = fallbacks
+    # the lookup through the class hierarchy is done once per class, event
+    # and state, and cached until the next subscription
+    key = (pub_cls, event, event_state)
+    try:
+        callbacks = _DISPATCH[key]
+    except KeyError:
+        callbacks = _DISPATCH[key] = _callbacks(pub_cls, event, event_state)
 
+    if not callbacks:
+        return
+    delivery = _DELIVERY
+    if delivery is not None:
+        delivery.put(callbacks, obj, kwargs)
+        return
     for callback in callbacks:
         callback(obj, **kwargs)
     return
@@ -100,4 +147,154 @@ def subscribe(obj, event, callback, event_state=None):
         EVENT_HANDLERS[event_key] = []
 
     EVENT_HANDLERS[event_key].append(callback)
+    invalidate()
     return
+
+
+def invalidate():
+    """Clear the dispatch cache, if EVENT_HANDLERS is changed other than by subscribe."""
+    _DISPATCH.clear()
+    _LISTENED.clear()
+
+
+# the BackgroundDelivery instances not shut down yet, shut down at exit
+_RUNNING = set()
+_RUNNING_LOCK = threading.Lock()
+
+
+def _shutdown_running():
+    with _RUNNING_LOCK:
+        running = list(_RUNNING)
+    for delivery in running:
+        delivery.shutdown()
+
+
+atexit.register(_shutdown_running)
+
+
+class BackgroundDelivery(object):
+    """Fires the published events from a worker thread.
+
+    Events are put on a bounded queue, drained in order by a single daemon
+    thread, so that the callbacks do not add latency to the calls publishing
+    them.  When the queue is full, the 'block' policy makes publish wait for
+    room (for timeout seconds at most, then the event is dropped), while the
+    'drop' policy drops the event straight away.  Dropped events are counted
+    in `dropped`.
+
+    The exceptions raised by the callbacks are logged.  Pending events are
+    delivered at interpreter exit.
+    """
+    def __init__(self, max_queue=1000, policy='block', timeout=None):
+        if policy not in DELIVERY_POLICIES:
+            raise ValueError("policy must be one of %s, not '%s'" % (', '.join(DELIVERY_POLICIES), policy))
+        self.policy = policy
+        self.timeout = timeout
+        self.dropped = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        # held while queueing an event, so that none is queued after the
+        # end of the queue marker put by shutdown
+        self._closing = threading.Lock()
+        self._queue = queue.Queue(max_queue)
+        self._thread = threading.Thread(target=self._run, name='atlasclient-events')
+        self._thread.daemon = True
+        self._thread.start()
+        with _RUNNING_LOCK:
+            _RUNNING.add(self)
+
+    def put(self, callbacks, obj, kwargs):
+        # events published by the callbacks themselves are fired in place,
+        # the worker cannot wait for room in its own queue
+        if threading.current_thread() is not self._thread:
+            with self._closing:
+                if not self.closed:
+                    self._enqueue(callbacks, obj, kwargs)
+                    return
+        self._deliver(callbacks, obj, kwargs)
+
+    def _enqueue(self, callbacks, obj, kwargs):
+        try:
+            if self.policy == 'block':
+                self._queue.put((callbacks, obj, kwargs), timeout=self.timeout)
+            else:
+                self._queue.put_nowait((callbacks, obj, kwargs))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            LOG.debug("Event queue full, dropping an event of %s", obj)
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def _deliver(self, callbacks, obj, kwargs):
+        for callback in callbacks:
+            try:
+                callback(obj, **kwargs)
+            except Exception:
+                LOG.exception("Event callback %s failed", callback)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._deliver(*item)
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """Wait until the queued events are delivered.
+
+        :return: False if some are still pending after timeout seconds.
+        """
+        with self._queue.all_tasks_done:
+            if timeout is None:
+                while self._queue.unfinished_tasks:
+                    self._queue.all_tasks_done.wait()
+            elif self._queue.unfinished_tasks:
+                self._queue.all_tasks_done.wait(timeout)
+            return not self._queue.unfinished_tasks
+
+    def shutdown(self, flush=True, timeout=None):
+        """Stop the worker thread, after delivering the pending events if flush.
+
+        The events published after shutdown are fired in place.
+        """
+        with self._closing:
+            if self.closed:
+                return
+            self.closed = True
+            if not flush:
+                try:
+                    while True:
+                        self._queue.get_nowait()
+                        self._queue.task_done()
+                except queue.Empty:
+                    pass
+            self._queue.put(None)
+        with _RUNNING_LOCK:
+            _RUNNING.discard(self)
+        self._thread.join(timeout)
+
+
+def deliver_in_background(max_queue=1000, policy='block', timeout=None):
+    """Fire the events published from now on from a worker thread.
+
+    See BackgroundDelivery for the parameters.
+    """
+    global _DELIVERY
+    delivery = BackgroundDelivery(max_queue=max_queue, policy=policy, timeout=timeout)
+    previous, _DELIVERY = _DELIVERY, delivery
+    if previous is not None:
+        previous.shutdown()
+    return delivery
+
+
+def deliver_synchronously(timeout=None):
+    """Fire the events in place again, once the events queued so far are delivered."""
+    global _DELIVERY
+    previous, _DELIVERY = _DELIVERY, None
+    if previous is not None:
+        previous.shutdown(timeout=timeout)
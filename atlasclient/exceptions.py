@@ -161,6 +161,14 @@ class MethodNotImplemented(HttpError):
     message = "Not Implemented"
 
 
+class BadGateway(HttpError):
+    """
+    HTTP 502 - Bad Gateway: a proxy in front of the server got an invalid response from it.
+    """
+    code = 502
+    message = "Bad Gateway"
+
+
 class ServerUnavailable(HttpError):
     """
     HTTP 503 - Service Unavailable: the server is not currently available.
@@ -171,6 +179,14 @@ class ServerUnavailable(HttpError):
     message = "Service Unavailable"
 
 
+class GatewayTimeout(HttpError):
+    """
+    HTTP 504 - Gateway Timeout: a proxy in front of the server timed out waiting for it.
+    """
+    code = 504
+    message = "Gateway Timeout"
+
+
 # pylint: disable=no-member
 _status_to_exception_type = dict((c.code, c) for c in HttpError.__subclasses__())
 
@@ -179,21 +195,34 @@ def handle_response(response):
     """
     Given a requests.Response object, throw the appropriate exception, if applicable.
     """
+    handle_status(response.status_code, method=response.request.method,
+                  url=response.request.url, details=response.text,
+                  headers=response.headers)
+
+
+def handle_status(status_code, method=None, url=None, details=None, headers=None):
+    """
+    Given the status code and details of a response, throw the appropriate exception,
+    if applicable.
+
+    This is the transport-agnostic part of handle_response, so that clients which
+    are not based on requests can share the same error mapping.
+    """
 
     # ignore valid responses
-    if response.status_code < 400:
+    if status_code < 400:
         return
 
-    cls = _status_to_exception_type.get(response.status_code, HttpError)
+    cls = _status_to_exception_type.get(status_code, HttpError)
 
     kwargs = {
-        'code': response.status_code,
-        'method': response.request.method,
-        'url': response.request.url,
-        'details': response.text,
+        'code': status_code,
+        'method': method,
+        'url': url,
+        'details': details,
     }
 
-    if response.headers and 'retry-after' in response.headers:
-        kwargs['retry_after'] = response.headers.get('retry-after')
+    if headers and 'retry-after' in headers:
+        kwargs['retry_after'] = headers.get('retry-after')
 
     raise cls(**kwargs)
@@ -0,0 +1,179 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Client-side rate and concurrency limits of the requests, per endpoint.
+"""
+
+import contextlib
+import logging
+import threading
+import time
+import timeit
+
+import six
+
+from atlasclient import exceptions
+from atlasclient.utils import NullHandler
+
+LOG = logging.getLogger(__name__)
+LOG.addHandler(NullHandler())
+
+# the limit key applying to the endpoints without a more specific one
+ANY_ENDPOINT = '*'
+
+
+class TokenBucket(object):
+    """A thread-safe token bucket: rate requests per second, in bursts of burst requests at most.
+
+    Tokens are reserved in order: a request arriving when the bucket is
+    empty books the next token to come and waits for it, so that waiting
+    requests are served first come, first served without polling.
+    """
+    def __init__(self, rate, burst=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive, not %s" % rate)
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = timeit.default_timer()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token, and return the seconds to wait before it is available."""
+        with self._lock:
+            now = timeit.default_timer()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def cancel(self):
+        """Give back a reserved token."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def acquire(self, timeout=None):
+        """Wait for a token, for timeout seconds at most.
+
+        :return: False if no token could be had in time.
+        """
+        delay = self.reserve()
+        if timeout is not None and delay > timeout:
+            self.cancel()
+            return False
+        if delay:
+            time.sleep(delay)
+        return True
+
+
+class ConcurrencyLimit(object):
+    """A thread-safe limit of the requests in flight."""
+    def __init__(self, limit):
+        if limit < 1:
+            raise ValueError("limit must be at least 1, not %s" % limit)
+        self.limit = limit
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """Wait for a free slot, for timeout seconds at most.
+
+        :return: False if no slot got free in time.
+        """
+        deadline = timeit.default_timer() + timeout if timeout is not None else None
+        with self._condition:
+            while self.in_flight >= self.limit:
+                if deadline is None:
+                    self._condition.wait()
+                else:
+                    remaining = deadline - timeit.default_timer()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+
+class EndpointLimiter(object):
+    """Rate and concurrency limits shared by all the requests of a client, whatever their thread.
+
+    :param rates: a {key: requests per second} dictionary, or {key: (rate,
+        burst)} to allow bursts of more than one second of requests.
+    :param concurrency: a {key: maximum requests in flight} dictionary.
+    :param timeout: the seconds a request may wait for its limits, None to
+        wait as long as needed.  atlasclient.exceptions.Timeout is raised
+        when they are exceeded.
+
+    The keys are endpoint paths (e.g. 'search/basic'), endpoint families, the
+    first part of the paths (e.g. 'search' for all the searches), or '*' for
+    every other endpoint.  A request is subject to the most specific limit
+    matching its endpoint: with {'search/basic': 5, 'search': 20}, basic
+    searches are limited to 5 requests per second, and the other searches to
+    20 requests per second in total.  The limit of a family (or '*') is
+    shared by all the endpoints it applies to.
+    """
+    def __init__(self, rates=None, concurrency=None, timeout=None):
+        self.timeout = timeout
+        self._buckets = {}
+        self._limits = {}
+        for key, rate in six.iteritems(rates or {}):
+            rate, burst = rate if isinstance(rate, (tuple, list)) else (rate, None)
+            self._buckets[key] = TokenBucket(rate, burst)
+        for key, limit in six.iteritems(concurrency or {}):
+            self._limits[key] = ConcurrencyLimit(limit)
+
+    @staticmethod
+    def _match(limits, endpoint):
+        endpoint = endpoint or ''
+        for key in (endpoint, endpoint.split('/', 1)[0], ANY_ENDPOINT):
+            if key in limits:
+                return limits[key]
+        return None
+
+    def bucket(self, endpoint):
+        """The TokenBucket limiting the rate of an endpoint, or None."""
+        return self._match(self._buckets, endpoint)
+
+    def concurrency_limit(self, endpoint):
+        """The ConcurrencyLimit of an endpoint, or None."""
+        return self._match(self._limits, endpoint)
+
+    @contextlib.contextmanager
+    def limit(self, endpoint):
+        """Wait until a request to endpoint is allowed, and hold its concurrency slot meanwhile."""
+        start = timeit.default_timer()
+        bucket = self.bucket(endpoint)
+        if bucket is not None and not bucket.acquire(self.timeout):
+            raise exceptions.Timeout(self.timeout, "Rate limit of %s exceeded" % endpoint)
+        limit = self.concurrency_limit(endpoint)
+        if limit is not None:
+            remaining = None
+            if self.timeout is not None:
+                remaining = max(0, self.timeout - (timeit.default_timer() - start))
+            if not limit.acquire(remaining):
+                if bucket is not None:
+                    bucket.cancel()
+                raise exceptions.Timeout(self.timeout, "Concurrency limit of %s exceeded" % endpoint)
+        waited = timeit.default_timer() - start
+        if waited > 0.001:
+            LOG.debug("Request to %s delayed %.3fs by the client-side limits", endpoint, waited)
+        try:
+            yield
+        finally:
+            if limit is not None:
+                limit.release()
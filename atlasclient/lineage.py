@@ -0,0 +1,195 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+A graph view of the Atlas lineage.
+"""
+
+import collections
+import logging
+
+from atlasclient.utils import NullHandler
+
+LOG = logging.getLogger(__name__)
+LOG.addHandler(NullHandler())
+
+DIRECTIONS = ('downstream', 'upstream', 'both')
+# the graph direction followed by the lineage directions of the Atlas API
+ATLAS_DIRECTIONS = {'INPUT': 'upstream', 'OUTPUT': 'downstream', 'BOTH': 'both'}
+
+
+class LineageGraph(object):
+    """The lineage relations of one or more /lineage/{guid} responses.
+
+    A relation goes from the entity the data comes from (fromEntityId) to the
+    entity it flows to (toEntityId): following the relations is going
+    downstream, following them backwards is going upstream.
+
+    Forward and backward adjacency lists are built once, when the responses
+    are added, so that every traversal costs O(V+E):
+
+        graph = client.lineage_guid(GUID, depth=5).graph()
+        graph.upstream(GUID)                      # all the sources of GUID
+        graph.downstream(GUID, max_depth=2)       # what GUID feeds, 2 hops away at most
+        graph.shortest_path(source_guid, GUID)    # [source_guid, process_guid, GUID]
+
+    The entity headers of the guidEntityMap are available in `entities`.
+    """
+    def __init__(self, responses=None):
+        self.entities = {}
+        self._downstream = collections.defaultdict(list)
+        self._upstream = collections.defaultdict(list)
+        self._relations = set()
+        for response in responses or []:
+            self.add(response)
+
+    def add(self, response):
+        """Merge a lineage response (dictionary) into the graph."""
+        for guid, entity in (response.get('guidEntityMap') or {}).items():
+            self.entities.setdefault(guid, entity)
+        base_guid = response.get('baseEntityGuid')
+        if base_guid:
+            self.entities.setdefault(base_guid, {'guid': base_guid})
+        for relation in response.get('relations') or []:
+            self.add_relation(relation['fromEntityId'], relation['toEntityId'])
+        return self
+
+    def add_relation(self, from_guid, to_guid):
+        if (from_guid, to_guid) in self._relations:
+            return
+        self._relations.add((from_guid, to_guid))
+        self._downstream[from_guid].append(to_guid)
+        self._upstream[to_guid].append(from_guid)
+        for guid in (from_guid, to_guid):
+            self.entities.setdefault(guid, {'guid': guid})
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __contains__(self, guid):
+        return guid in self.entities
+
+    def __iter__(self):
+        return iter(self.entities)
+
+    @property
+    def relations(self):
+        """The (fromEntityId, toEntityId) pairs of the graph."""
+        return set(self._relations)
+
+    def successors(self, guid):
+        return list(self._downstream.get(guid, ()))
+
+    def predecessors(self, guid):
+        return list(self._upstream.get(guid, ()))
+
+    def _neighbors(self, direction):
+        if direction == 'downstream':
+            return lambda guid: self._downstream.get(guid, ())
+        elif direction == 'upstream':
+            return lambda guid: self._upstream.get(guid, ())
+        elif direction == 'both':
+            return lambda guid: list(self._downstream.get(guid, ())) + list(self._upstream.get(guid, ()))
+        raise ValueError("direction must be one of %s, not '%s'" % (', '.join(DIRECTIONS), direction))
+
+    def bfs(self, guid, direction='downstream', max_depth=None):
+        """Generate (guid, depth) pairs in breadth-first order, starting with (guid, 0)."""
+        neighbors = self._neighbors(direction)
+        seen = set([guid])
+        queue = collections.deque([(guid, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            yield current, depth
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for neighbor in neighbors(current):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append((neighbor, depth + 1))
+
+    def dfs(self, guid, direction='downstream', max_depth=None):
+        """Generate (guid, depth) pairs in depth-first pre-order, starting with (guid, 0)."""
+        neighbors = self._neighbors(direction)
+        seen = set()
+        stack = [(guid, 0)]
+        while stack:
+            current, depth = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            yield current, depth
+            if max_depth is not None and depth >= max_depth:
+                continue
+            # reversed, so that the neighbors are visited in their order
+            for neighbor in reversed(list(neighbors(current))):
+                if neighbor not in seen:
+                    stack.append((neighbor, depth + 1))
+
+    def downstream(self, guid, max_depth=None):
+        """The GUIDs of the entities guid feeds, at most max_depth relations away."""
+        return set(node for node, depth in self.bfs(guid, 'downstream', max_depth) if depth)
+
+    def upstream(self, guid, max_depth=None):
+        """The GUIDs of the entities feeding guid, at most max_depth relations away."""
+        return set(node for node, depth in self.bfs(guid, 'upstream', max_depth) if depth)
+
+    def within(self, guid, max_depth, direction='both'):
+        """A {guid: depth} dictionary of the entities at most max_depth relations away."""
+        return dict(self.bfs(guid, direction, max_depth))
+
+    def shortest_path(self, source, target, direction='downstream'):
+        """The GUIDs of a shortest path from source to target, or None if there is none."""
+        neighbors = self._neighbors(direction)
+        parents = {source: None}
+        queue = collections.deque([source])
+        while queue:
+            current = queue.popleft()
+            if current == target:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = parents[current]
+                return path[::-1]
+            for neighbor in neighbors(current):
+                if neighbor not in parents:
+                    parents[neighbor] = current
+                    queue.append(neighbor)
+        return None
+
+
+def response_boundary(response, direction):
+    """The GUIDs of a lineage response whose lineage may go on beyond the response.
+
+    These are the entities without any predecessor (INPUT) or successor
+    (OUTPUT) in the relations of the response.
+    """
+    guids = set(response.get('guidEntityMap') or {})
+    if response.get('baseEntityGuid'):
+        guids.add(response['baseEntityGuid'])
+    sources, targets = set(), set()
+    for relation in response.get('relations') or []:
+        sources.add(relation['fromEntityId'])
+        targets.add(relation['toEntityId'])
+    guids |= sources | targets
+    if direction == 'INPUT':
+        return guids - targets
+    elif direction == 'OUTPUT':
+        return guids - sources
+    return (guids - targets) | (guids - sources)
+
+
+def next_frontier(graph, guid, direction, candidates, max_depth=None):
+    """The candidates to expand next, sorted: those less than max_depth relations away from guid."""
+    if max_depth is None:
+        return sorted(candidates)
+    reachable = graph.within(guid, max_depth - 1, ATLAS_DIRECTIONS[direction])
+    return sorted(candidate for candidate in candidates if candidate in reachable)
@@ -0,0 +1,201 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Request metrics of the HTTP clients, per entry point.
+"""
+
+import bisect
+import collections
+import logging
+import threading
+
+import six
+
+from atlasclient.utils import NullHandler
+
+LOG = logging.getLogger(__name__)
+LOG.addHandler(NullHandler())
+
+# the upper bounds of the latency histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# the endpoint of the requests to urls outside of the entry points
+OTHER_ENDPOINT = 'other'
+# the status of the requests which got no response (connection errors, timeouts...)
+NO_RESPONSE = 'error'
+
+
+class Histogram(object):
+    """A latency histogram with fixed buckets.
+
+    counts[i] is the number of observations in (buckets[i - 1], buckets[i]],
+    the last count being the observations above the last bucket.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """The (upper bound, number of observations below it) pairs, ending with ('+Inf', count)."""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q):
+        """An estimate of the q quantile: the upper bound of the bucket it falls in."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound if bound != '+Inf' else self.buckets[-1]
+
+
+class EndpointMetrics(object):
+    """The metrics of the requests of one method to one endpoint."""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.count = 0
+        self.statuses = collections.Counter()
+        self.latency = Histogram(buckets)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+
+    def to_dict(self):
+        return {'count': self.count,
+                'statuses': dict(self.statuses),
+                'latency': {'sum': self.latency.sum,
+                            'p50': self.latency.quantile(0.5),
+                            'p95': self.latency.quantile(0.95),
+                            'p99': self.latency.quantile(0.99),
+                            'buckets': self.latency.cumulative()},
+                'request_bytes': self.request_bytes,
+                'response_bytes': self.response_bytes,
+                'retries': self.retries}
+
+
+class RequestMetrics(object):
+    """Thread-safe request metrics, per endpoint (model path) and HTTP method.
+
+    The HTTP clients record every request they send: its status code, its
+    latency in a histogram, the size of its body and of the response body.
+    Retries are counted separately.
+
+        metrics = client.metrics.snapshot()
+        metrics['entity/guid']['GET']['latency']['p95']
+        print(client.metrics.to_prometheus())
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def _get(self, endpoint, method):
+        key = (endpoint or OTHER_ENDPOINT, method.upper())
+        metrics = self._endpoints.get(key)
+        if metrics is None:
+            metrics = self._endpoints[key] = EndpointMetrics(self.buckets)
+        return metrics
+
+    def record(self, endpoint, method, status, latency, request_bytes=0, response_bytes=0):
+        """Record a request.
+
+        :param status: the status code of the response, None if there was none.
+        :param latency: the duration of the request, in seconds.
+        """
+        with self._lock:
+            metrics = self._get(endpoint, method)
+            metrics.count += 1
+            metrics.statuses[NO_RESPONSE if status is None else str(status)] += 1
+            metrics.latency.observe(latency)
+            metrics.request_bytes += request_bytes
+            metrics.response_bytes += response_bytes
+
+    def record_retry(self, endpoint, method, count=1):
+        with self._lock:
+            self._get(endpoint, method).retries += count
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self):
+        """The metrics as a {endpoint: {method: metrics dictionary}} dictionary."""
+        result = {}
+        with self._lock:
+            for (endpoint, method), metrics in six.iteritems(self._endpoints):
+                result.setdefault(endpoint, {})[method] = metrics.to_dict()
+        return result
+
+    def to_prometheus(self, prefix='atlasclient'):
+        """The metrics in the Prometheus text exposition format."""
+        with self._lock:
+            items = sorted((key, metrics.to_dict()) for key, metrics in six.iteritems(self._endpoints))
+        lines = []
+
+        def family(name, metric_type, help_text):
+            lines.append('# HELP %s_%s %s' % (prefix, name, help_text))
+            lines.append('# TYPE %s_%s %s' % (prefix, name, metric_type))
+
+        def sample(name, labels, value):
+            labels = ','.join('%s="%s"' % (label, _escape(label_value)) for label, label_value in labels)
+            lines.append('%s_%s{%s} %s' % (prefix, name, labels, _format(value)))
+
+        family('requests_total', 'counter', 'Requests sent to Atlas.')
+        for (endpoint, method), metrics in items:
+            for status, count in sorted(metrics['statuses'].items()):
+                sample('requests_total', [('endpoint', endpoint), ('method', method), ('status', status)], count)
+
+        family('request_duration_seconds', 'histogram', 'Duration of the requests sent to Atlas.')
+        for (endpoint, method), metrics in items:
+            labels = [('endpoint', endpoint), ('method', method)]
+            for bound, count in metrics['latency']['buckets']:
+                sample('request_duration_seconds_bucket', labels + [('le', _format(bound))], count)
+            sample('request_duration_seconds_sum', labels, metrics['latency']['sum'])
+            sample('request_duration_seconds_count', labels, metrics['count'])
+
+        for name, key, help_text in (('request_bytes_total', 'request_bytes', 'Size of the request bodies.'),
+                                     ('response_bytes_total', 'response_bytes', 'Size of the response bodies.'),
+                                     ('request_retries_total', 'retries', 'Requests retried.')):
+            family(name, 'counter', help_text)
+            for (endpoint, method), metrics in items:
+                sample(name, [('endpoint', endpoint), ('method', method)], metrics[key])
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def body_size(data):
+    """The size in bytes of a request or response body."""
+    if isinstance(data, six.text_type):
+        return len(data.encode('utf-8'))
+    if isinstance(data, six.binary_type):
+        return len(data)
+    return 0
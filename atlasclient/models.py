@@ -13,36 +13,35 @@
 """
 Defines all the model classes for the various parts of the API.
 """
+import collections
+import functools
 import itertools
 import logging
 import json
 import six
 
-from atlasclient import base, exceptions, events
+from atlasclient import base, columnar, concurrency, exceptions, events, lineage, registry, utils
 from atlasclient.utils import NullHandler
 
 LOG = logging.getLogger(__name__)
 LOG.addHandler(NullHandler())
 
+# default number of seconds the responses of the read endpoints may be served
+# from the client's response cache, see QueryableModel.cache_ttl
+TYPEDEF_CACHE_TTL = 3600
+ENTITY_CACHE_TTL = 300
+
+# query parameters of the entity lookups which strip the returned entities,
+# whose responses are neither stored in nor served from the entity cache
+ENTITY_SHAPE_PARAMS = ('ignoreRelationships', 'minExtInfo')
+
 
 class EntityCollection(base.DependentModelCollection):
-    def __init__(self, client, model_class, parent=None):
-        self.client = client
-        self.model_class = model_class
-        self.parent = parent
-        self._is_inflated = True
-        self._models = []
-        for entity in self.parent._data.get('entities') or []:
-            model = self.model_class(self, data=entity)
-            self._models.append(model)
-        self._iter_marker = 0
- 
+    source_key = 'entities'
+
     def __call__(self, *args):
         self._is_inflated = True
-        self._models = []
-        for entity in self.parent._data.get('entities') or []:
-            model = self.model_class(self, data=entity)
-            self._models.append(model)
+        self._set_items(self.parent._data.get(self.source_key) or [])
         return self
 
 
@@ -52,6 +51,92 @@ class Entity(base.DependentModel):
               'updatedBy', 'createTime', 'updateTime', 'version', 'relationshipAttributes', )
 
 
+def referenced_guids(entity):
+    """GUIDs of the entities an entity refers to in its (relationship) attributes."""
+    guids = []
+    for key in ('attributes', 'relationshipAttributes'):
+        for value in six.itervalues(entity.get(key) or {}):
+            for item in (value if isinstance(value, list) else [value]):
+                if isinstance(item, dict) and item.get('guid'):
+                    guids.append(item['guid'])
+    return guids
+
+
+def url_params(url):
+    """The {name: [values]} query parameters of a url."""
+    return six.moves.urllib.parse.parse_qs(six.moves.urllib.parse.urlsplit(url or '').query)
+
+
+def full_entity_lookup(params):
+    """Whether an entity lookup with these query parameters returns the full entities."""
+    for name in ENTITY_SHAPE_PARAMS:
+        values = (params or {}).get(name)
+        for value in (values if isinstance(values, (list, tuple)) else [values]):
+            if str(value).lower() == 'true':
+                return False
+    return True
+
+
+def cached_entities(cache, guids):
+    """The cached entities among guids whose referred entities are cached too.
+
+    Returns the {guid: entity} dictionaries of these entities and of the
+    entities they refer to.
+    """
+    hits = cache.get_many(guids)
+    referred = cache.get_many(set(itertools.chain.from_iterable(
+        referenced_guids(entity) for entity in six.itervalues(hits))) - set(hits))
+    entities = {}
+    for guid, entity in six.iteritems(hits):
+        if all(ref in hits or ref in referred for ref in referenced_guids(entity)):
+            entities[guid] = entity
+    needed = set(itertools.chain.from_iterable(referenced_guids(entity) for entity in six.itervalues(entities)))
+    referred.update((guid, entity) for guid, entity in six.iteritems(hits) if guid not in entities)
+    return entities, dict((guid, entity) for guid, entity in six.iteritems(referred) if guid in needed)
+
+
+def cache_entities(client, entities, referred_entities=None, params=None):
+    """Store the full entities of a response in the client's entity cache, if any.
+
+    Nothing is stored when the lookup params strip the entities.
+    """
+    cache = client.entity_cache
+    if cache is None or not full_entity_lookup(params):
+        return
+    cache.put_many(entity for entity in entities or [] if entity)
+    cache.put_many(six.itervalues(referred_entities or {}))
+
+
+def mutated_guids(response):
+    """GUIDs of the entities created, updated or deleted according to an entity mutation response."""
+    guids = set()
+    if not isinstance(response, dict):
+        return guids
+    for headers in six.itervalues(response.get('mutatedEntities') or {}):
+        guids.update(header['guid'] for header in headers if isinstance(header, dict) and header.get('guid'))
+    guids.update(six.itervalues(response.get('guidAssignments') or {}))
+    return guids
+
+
+def url_entity_guid(url):
+    """The GUID of the entity of an entity/guid/<guid>/... url, None for the other urls."""
+    parts = url.split('?')[0].split('/')
+    for index in range(len(parts) - 2):
+        if parts[index] == 'entity' and parts[index + 1] == 'guid':
+            return parts[index + 2]
+    return None
+
+
+def invalidate_entities(client, guids):
+    """Drop entities changed on the server from the client's entity cache, if any."""
+    cache = client.entity_cache
+    if cache is None:
+        return
+    for guid in guids:
+        if guid:
+            cache.invalidate(guid)
+
+
 class EntityPostCollection(base.QueryableModelCollection):
     def __call__(self, *args, **kwargs):
         """
@@ -71,7 +156,9 @@ class EntityPostCollection(base.QueryableModelCollection):
         """
         Update a resource by passing in modifications via keyword arguments.
         """
-        return self.client.post(self.url, data=data)
+        response = self.client.post(self.url, data=data)
+        invalidate_entities(self.client, mutated_guids(response))
+        return response
 
 
 class EntityPost(base.QueryableModel):
@@ -101,16 +188,7 @@ class EntityPost(base.QueryableModel):
         raise exceptions.MethodNotImplemented(method=self.update, details='The method update is not available for this resource')
 
 class ClassificationItemCollection(base.DependentModelCollection):
-    def __init__(self, client, model_class, parent=None):
-        self.client = client
-        self.model_class = model_class
-        self.parent = parent
-        self._is_inflated = False
-        self._models = []
-        for classification_item in self.parent._data.get('list') or []:
-            model = self.model_class(self, data=classification_item)
-            self._models.append(model)
-        self._iter_marker = 0
+    source_key = 'list'
 
 
 class ClassificationItem(base.DependentModel):
@@ -136,6 +214,7 @@ class Classification(base.QueryableModel):
             del kwargs[self.primary_key]
         data = self._generate_input_dict(**kwargs)
         self.load(self.client.post('/'.join(self.url.split('/')[:-1]) + 's', data=data))
+        invalidate_entities(self.client, [url_entity_guid(self.url)])
         return self
 
     @events.evented
@@ -145,6 +224,7 @@ class Classification(base.QueryableModel):
         """
         data = self._generate_input_dict(**kwargs)
         self.load(self.client.put('/'.join(self.url.split('/')[:-1]) + 's', data=data))
+        invalidate_entities(self.client, [url_entity_guid(self.url)])
         return self
 
 
@@ -178,13 +258,16 @@ class EntityGuidClassificationCollection(base.QueryableModelCollection):
                     class_item_dict[field] = getattr(classification_item, field)
                 data.append(class_item_dict)
         self.load(self.client.put(self.url, data=data))
+        invalidate_entities(self.client, [url_entity_guid(self.url)])
         return self
 
     def create(self, data, **kwargs):
         """ 
         Create classifitions for specific entity
         """
-        return self.client.post(self.url, data=data)
+        response = self.client.post(self.url, data=data)
+        invalidate_entities(self.client, [url_entity_guid(self.url)])
+        return response
 
 
 class EntityGuidClassification(base.QueryableModel):
@@ -194,10 +277,25 @@ class EntityGuidClassification(base.QueryableModel):
     relationships = {'list': ClassificationItem}
     collection_class = EntityGuidClassificationCollection
 
+    def create(self, **kwargs):
+        super(EntityGuidClassification, self).create(**kwargs)
+        invalidate_entities(self.client, [url_entity_guid(self.url)])
+        return self
+
+    def update(self, **kwargs):
+        super(EntityGuidClassification, self).update(**kwargs)
+        invalidate_entities(self.client, [url_entity_guid(self.url)])
+        return self
+
+    def delete(self, **kwargs):
+        super(EntityGuidClassification, self).delete(**kwargs)
+        invalidate_entities(self.client, [url_entity_guid(self.url)])
+
 
 class EntityGuid(base.QueryableModel):
     path = 'entity/guid'
     data_key = 'entity_guid'
+    cache_ttl = ENTITY_CACHE_TTL
     primary_key = 'guid'
     fields = ('entity', 'referredEntities')
     relationships = {'classifications': EntityGuidClassification,
@@ -206,6 +304,36 @@ class EntityGuid(base.QueryableModel):
     def _generate_input_dict(self, **kwargs):
         return self._data
 
+    def inflate(self):
+        """Load the entity from the client's entity cache if possible, else from the server.
+
+        The cache is only used for full lookups (see ENTITY_SHAPE_PARAMS) of
+        entities whose referred entities are all cached as well.
+        """
+        cached = self._cached_response()
+        if cached is not None:
+            super(EntityGuid, self).load(cached)
+            self._is_inflated = True
+            return self
+        return super(EntityGuid, self).inflate()
+
+    def load(self, response):
+        cache_entities(self.client, [response.get('entity')], response.get('referredEntities'),
+                       url_params(self._href))
+        super(EntityGuid, self).load(response)
+
+    def _cached_response(self):
+        """The response served by the entity cache for this lookup, None if it must be sent."""
+        cache = self.client.entity_cache
+        if self._is_inflated or cache is None or not self._guid():
+            return None
+        if not full_entity_lookup(url_params(self._href)):
+            return None
+        entities, referred = cached_entities(cache, [self._guid()])
+        if not entities:
+            return None
+        return {'entity': entities[self._guid()], 'referredEntities': referred}
+
     def update(self, attribute):
         if attribute not in self.entity['attributes']:
             raise exceptions.BadRequest(method=self.update,
@@ -213,8 +341,23 @@ class EntityGuid(base.QueryableModel):
                                                                                                 self.entity['typeName']))
         self.load(self.client.put(self.url + '?name={}'.format(attribute),
                                   data=self.entity['attributes'][attribute]))
+        self._invalidate_cache()
         return self._data
 
+    def delete(self, **kwargs):
+        super(EntityGuid, self).delete(**kwargs)
+        self._invalidate_cache()
+
+    def _guid(self):
+        """The GUID of the entity, taken from the url since 'guid' is not a field."""
+        if self._href is None:
+            return None
+        return self._href.split('?')[0].rstrip('/').rsplit('/', 1)[-1]
+
+    def _invalidate_cache(self):
+        if self.client.entity_cache is not None:
+            self.client.entity_cache.invalidate(self._guid())
+
 
 class EntityUniqueAttributeCollection(base.QueryableModelCollection):
     def __call__(self, *args, **kwargs):
@@ -244,13 +387,128 @@ class EntityUniqueAttribute(base.QueryableModel):
     collection_class = EntityUniqueAttributeCollection
     path = 'entity/uniqueAttribute/type'
     data_key = 'entity_unique_attribute'
+    cache_ttl = ENTITY_CACHE_TTL
     primary_key = 'typeName'
     fields = ('entity', 'referredEntities')
     relationships = {'classifications': EntityGuidClassification,
                      }
 
+    def load(self, response):
+        cache_entities(self.client, [response.get('entity')], response.get('referredEntities'),
+                       url_params(self._href))
+        super(EntityUniqueAttribute, self).load(response)
+
+
+def concurrency_controller(client):
+    """The atlasclient.concurrency.AdaptiveConcurrency of a client, None if it has none."""
+    return getattr(client, 'concurrency_controller', None)
+
+
+def merge_entity_bulk_responses(responses):
+    """Merge several entity bulk responses into a single one."""
+    merged = {'entities': [], 'referredEntities': {}}
+    for response in responses:
+        merged['entities'].extend(response.get('entities') or [])
+        merged['referredEntities'].update(response.get('referredEntities') or {})
+    return merged
+
+
+def entity_batches(entities, batch_size, batch_bytes=None):
+    """Group entity dictionaries in lists bounded by count and JSON size.
+
+    An entity larger than batch_bytes on its own gets a batch of its own.
+    """
+    batch = []
+    size = 0
+    for entity in entities:
+        entity_size = len(json.dumps(entity)) if batch_bytes else 0
+        if batch and (len(batch) >= batch_size or
+                      (batch_bytes and size + entity_size > batch_bytes)):
+            yield batch
+            batch = []
+            size = 0
+        batch.append(entity)
+        size += entity_size
+    if batch:
+        yield batch
+
+
+def merge_entity_mutation_responses(results):
+    """Merge the (index, batch, response or exception) results of batched mutations."""
+    merged = {'guidAssignments': {}, 'mutatedEntities': {}, 'failedBatches': []}
+    for index, batch, response in results:
+        if isinstance(response, Exception):
+            merged['failedBatches'].append({'batch': index, 'entities': batch, 'error': response})
+            continue
+        merged['guidAssignments'].update(response.get('guidAssignments') or {})
+        for operation, headers in six.iteritems(response.get('mutatedEntities') or {}):
+            merged['mutatedEntities'].setdefault(operation, []).extend(headers)
+    return merged
+
 
 class EntityBulkCollection(base.QueryableModelCollection):
+    """A collection of entities fetched by GUIDs.
+
+    Long GUID lists are split into chunks of client.bulk_chunk_size GUIDs,
+    fetched in parallel (client.max_workers requests at a time, or as many
+    as the adaptive concurrency of the client allows) and merged
+    into a single EntityBulk, so that the query string of each request stays
+    within the URL length limits.
+
+    If the client has an entity cache, the cached entities whose referred
+    entities are cached as well are not requested again, and the fetched ones
+    are added to the cache, unless the lookup strips them (see
+    ENTITY_SHAPE_PARAMS).
+    """
+
+    def fetch(self):
+        self.check_version()
+        params = self.query_params()
+        cached, requests = self._plan_requests(params)
+        if len(requests) > 1:
+            responses = concurrency.prefetch(
+                lambda request: self.client.get(self.url, params=request),
+                requests, self.client.max_workers, concurrency_controller(self.client))
+        else:
+            responses = [self.client.get(self.url, params=request) for request in requests]
+        return self._merge_responses(cached, responses, params)
+
+    def _plan_requests(self, params):
+        """Split a lookup into a response served by the entity cache and the requests to send."""
+        guids = params.get('guid')
+        if guids is None:
+            return None, [params]
+        if isinstance(guids, six.string_types):
+            guids = [guids]
+
+        cached = None
+        cache = self.client.entity_cache
+        if cache is not None and full_entity_lookup(params):
+            hits, referred = cached_entities(cache, guids)
+            if hits:
+                guids = [guid for guid in guids if guid not in hits]
+                cached = {'entities': list(hits.values()), 'referredEntities': referred}
+
+        chunk_size = self.client.bulk_chunk_size
+        if cached is None and len(guids) <= chunk_size:
+            return None, [params]
+        requests = []
+        for chunk in utils.chunked(guids, chunk_size):
+            chunk_params = dict(params)
+            chunk_params['guid'] = chunk
+            requests.append(chunk_params)
+        return cached, requests
+
+    def _merge_responses(self, cached, responses, params):
+        responses = list(responses)
+        for response in responses:
+            cache_entities(self.client, response.get('entities'), response.get('referredEntities'), params)
+        if cached is not None:
+            responses.append(cached)
+        if len(responses) == 1:
+            return responses[0]
+        return merge_entity_bulk_responses(responses)
+
     def load(self, response):
         model = self.model_class(self, href=self.url)
         model.load(response)
@@ -260,19 +518,63 @@ class EntityBulkCollection(base.QueryableModelCollection):
         """
         Create classifitions for specific entity
         """
-        self.client.post(self.url, data=data)
-    
+        response = self.client.post(self.url, data=data)
+        invalidate_entities(self.client, mutated_guids(response))
+
+    def create_batched(self, entities, batch_size=500, batch_bytes=None, max_workers=None):
+        """Create or update a large number of entities in batches.
+
+        The entities (an iterable of entity dictionaries, consumed lazily) are
+        grouped in batches of at most batch_size entities and, if given,
+        batch_bytes bytes of JSON.  The batches are posted in parallel, by
+        max_workers requests at a time (client.max_workers by default, or as
+        many as the adaptive concurrency of the client allows).
+
+        Entities of different batches can't refer to each other through
+        placeholder (negative) GUIDs, since each batch is a separate request.
+
+        :return: a dictionary with the merged 'guidAssignments' and
+            'mutatedEntities' of all batches, and the 'failedBatches' as a list
+            of {'batch': index, 'entities': [...], 'error': exception}.
+        """
+        def post(batch):
+            return self.client.post(self.url, data={'entities': batch, 'referredEntities': {}})
+
+        def results(batches, responses):
+            for (index, batch), response in six.moves.zip(batches, responses):
+                if isinstance(response, Exception):
+                    LOG.warning("Batch %s of %s entities failed: %s", index, len(batch), response)
+                    # the batch may have been applied in part
+                    invalidate_entities(self.client, [entity.get('guid') for entity in batch])
+                else:
+                    invalidate_entities(self.client, mutated_guids(response))
+                yield index, batch, response
+
+        # the failed batches are returned by prefetch, once the concurrency
+        # controller has seen their errors; the batches in flight are kept
+        # by the tee until their response is reached
+        batches, sent = itertools.tee(enumerate(entity_batches(entities, batch_size, batch_bytes)))
+        controller = None if max_workers else concurrency_controller(self.client)
+        responses = concurrency.prefetch(post, (batch for _, batch in sent), max_workers or self.client.max_workers,
+                                         controller, return_exceptions=True)
+        return merge_entity_mutation_responses(results(batches, responses))
+
     def delete(self, guid):
         """
         Delete guid
         """
-        return self.client.delete(self.url, params={'guid': guid})
+        response = self.client.delete(self.url, params={'guid': guid})
+        if self.client.entity_cache is not None:
+            for item in (guid if isinstance(guid, list) else [guid]):
+                self.client.entity_cache.invalidate(item)
+        return response
 
 
 class EntityBulk(base.QueryableModel):
     collection_class = EntityBulkCollection
     path = 'entity/bulk'
     data_key = 'entity_bulk'
+    cache_ttl = ENTITY_CACHE_TTL
     fields = ('entities', 'referredEntities')
     relationships = {'entities': Entity}
 
@@ -290,19 +592,11 @@ class EntityBulkClassification(base.QueryableModel):
         Create classifitions for specific entity
         """
         self.client.post(self.url, data=data)
+        invalidate_entities(self.client, data.get('entityGuids') or [])
 
 
 class ConstraintCollection(base.DependentModelCollection):
-    def __init__(self, client, model_class, parent=None):
-        self.client = client
-        self.model_class = model_class
-        self.parent = parent
-        self._is_inflated = False
-        self._models = []
-        for constraint in self.parent._data.get('constraints') or []:
-            model = self.model_class(self, data=constraint)
-            self._models.append(model)
-        self._iter_marker = 0
+    source_key = 'constraints'
 
 
 class Constraint(base.DependentModel):
@@ -312,16 +606,7 @@ class Constraint(base.DependentModel):
 
 
 class AttributeDefCollection(base.DependentModelCollection):
-    def __init__(self, client, model_class, parent=None):
-        self.client = client
-        self.model_class = model_class
-        self.parent = parent
-        self._is_inflated = False
-        self._models = []
-        for attributeDef in self.parent._data.get('attributeDefs') or []:
-            model = self.model_class(self, data=attributeDef)
-            self._models.append(model)
-        self._iter_marker = 0
+    source_key = 'attributeDefs'
 
 
 class AttributeDef(base.DependentModel):
@@ -352,16 +637,7 @@ class StructDef(base.DependentModel):
 
 
 class ElementDefCollection(base.DependentModelCollection):
-    def __init__(self, client, model_class, parent=None):
-        self.client = client
-        self.model_class = model_class
-        self.parent = parent
-        self._is_inflated = False
-        self._models = []
-        for element_def in self.parent._data.get('elementDefs') or []:
-            model = self.model_class(self, data=element_def)
-            self._models.append(model)
-        self._iter_marker = 0
+    source_key = 'elementDefs'
 
 
 class ElementDef(base.DependentModel):
@@ -429,6 +705,7 @@ class TypeDefHeader(base.QueryableModel):
     collection_class = TypeDefHeaderCollection
     path = 'types/typedefs/headers'
     data_key = 'typedefs_headers'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = 'guid'
     fields = ('guid', 'name', 'category')
 
@@ -439,6 +716,23 @@ class TypeDefs(base.QueryableModelCollection):
         model.load(response)
         self._models.append(model)
 
+    def registry(self, path=None, max_age=None):
+        """Return the type system as an indexed atlasclient.registry.TypeRegistry.
+
+        :param path: a file where the registry is persisted.  If it exists and
+            is not older than max_age seconds, the type definitions are not
+            downloaded again.
+        """
+        if path is not None:
+            type_registry = registry.TypeRegistry.load(path, max_age=max_age)
+            if type_registry is not None:
+                return type_registry
+        self.inflate()
+        type_registry = registry.TypeRegistry(self._models[0]._data)
+        if path is not None:
+            type_registry.save(path)
+        return type_registry
+
     @events.evented
     def create(self, data, **kwargs):
         self.client.post(self.url, data=data)
@@ -458,6 +752,7 @@ class TypeDef(base.QueryableModel):
     collection_class = TypeDefs
     path = 'types/typedefs'
     data_key = 'typedefs'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = ''
     fields = ('empty')
     relationships = {'structDefs': StructDef,
@@ -467,7 +762,7 @@ class TypeDef(base.QueryableModel):
                     }
 
     def load(self, response):
-        self._data.update(response)
+        self._merge_data(response)
         for rel in [x for x in response if x in self.relationships]:
             rel_class = self.relationships[rel]
             collection = rel_class.collection_class(self.client, rel_class, parent=self)
@@ -482,6 +777,7 @@ class TypeDef(base.QueryableModel):
 class ClassificationDefGuid(base.QueryableModel):
     path = 'types/classificationdef/guid'
     data_key = 'classificationdef_guid'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = 'guid'
     fields = ('superTypes',
               'attributeDefs',
@@ -496,6 +792,7 @@ class ClassificationDefGuid(base.QueryableModel):
 class ClassificationDefName(base.QueryableModel):
     path = 'types/classificationdef/name'
     data_key = 'classificationdef_name'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = 'name'
     fields = ('superTypes',
               'attributeDefs',
@@ -510,6 +807,7 @@ class ClassificationDefName(base.QueryableModel):
 class EntityDefGuid(base.QueryableModel):
     path = 'types/entitydef/guid'
     data_key = 'entitydef_guid'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = 'guid'
     fields = ('superTypes',
               'attributeDefs',
@@ -524,6 +822,7 @@ class EntityDefGuid(base.QueryableModel):
 class EntityDefName(base.QueryableModel):
     path = 'types/entitydef/name'
     data_key = 'entitydef_name'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = 'name'
     fields = ('superTypes',
               'attributeDefs',
@@ -538,6 +837,7 @@ class EntityDefName(base.QueryableModel):
 class EnumDefGuid(base.QueryableModel):
     path = 'types/enumdef/guid'
     data_key = 'enumdef_guid'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = 'guid'
     fields = ('name', 'category', 'defaultValue', 'guid', 'createdBy',
               'updatedBy', 'createTime', 'updateTime', 'version',
@@ -548,6 +848,7 @@ class EnumDefGuid(base.QueryableModel):
 class EnumDefName(base.QueryableModel):
     path = 'types/enumdef/name'
     data_key = 'enumdef_name'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = 'name'
     fields = ('name', 'category', 'defaultValue', 'guid', 'createdBy',
               'updatedBy', 'createTime', 'updateTime', 'version',
@@ -558,6 +859,7 @@ class EnumDefName(base.QueryableModel):
 class RelationshipDefGuid(base.QueryableModel):
     path = 'types/relationshipdef/guid'
     data_key = 'relationshipdef_guid'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = 'guid'
     fields = ('relationshipCategory',
               'propagateTags',
@@ -576,6 +878,7 @@ class RelationshipDefGuid(base.QueryableModel):
 class RelationshipDefName(base.QueryableModel):
     path = 'types/relationshipdef/name'
     data_key = 'relationshipdef_name'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = 'name'
     fields = ('relationshipCategory',
               'propagateTags',
@@ -594,6 +897,7 @@ class RelationshipDefName(base.QueryableModel):
 class StructDefGuid(base.QueryableModel):
     path = 'types/structdef/guid'
     data_key = 'structdef_guid'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = 'guid'
     fields = ('superTypes',
               'attributeDefs',
@@ -608,6 +912,7 @@ class StructDefGuid(base.QueryableModel):
 class StructDefName(base.QueryableModel):
     path = 'types/structdef/name'
     data_key = 'structdef_name'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = 'name'
     fields = ('superTypes',
               'attributeDefs',
@@ -622,6 +927,7 @@ class StructDefName(base.QueryableModel):
 class TypeDefGuid(base.QueryableModel):
     path = 'types/typedef/guid'
     data_key = 'typedef_guid'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = 'guid'
     fields = ('category', 'guid', 'createdBy',
               'updatedBy', 'createTime', 'updateTime',
@@ -632,6 +938,7 @@ class TypeDefGuid(base.QueryableModel):
 class TypeDefName(base.QueryableModel):
     path = 'types/typedef/name'
     data_key = 'typedef_name'
+    cache_ttl = TYPEDEF_CACHE_TTL
     primary_key = 'name'
     fields = ('category', 'guid', 'createdBy',
               'updatedBy', 'createTime', 'updateTime',
@@ -675,19 +982,62 @@ class LineageGuidCollection(base.QueryableModelCollection):
             url_path_filter = '?' + '&'.join(filter_list)
         return self.model_class(self, href='/'.join([self.url, identifier]) + url_path_filter,
                                 data={self.model_class.primary_key: identifier})
+
+    def expand(self, guid, direction='INPUT', depth=3, max_depth=None, max_workers=None, graph=None):
+        """Return the lineage of guid beyond the depth of one lineage request.
+
+        The lineage is expanded by rounds: each round requests, concurrently,
+        the lineage of the boundary entities of the previous round (those
+        whose lineage may go on), and merges the responses into one
+        atlasclient.lineage.LineageGraph.  The lineage of an entity is never
+        requested twice.  Expansion stops when no new boundary entity is found,
+        or when the boundary is max_depth relations away from guid.
+
+        :param direction: 'INPUT' (upstream), 'OUTPUT' (downstream) or 'BOTH'.
+        :param depth: the depth of each lineage request.
+        :param graph: a LineageGraph to merge the lineage into.
+        """
+        if graph is None:
+            graph = lineage.LineageGraph()
+        controller = None if max_workers else concurrency_controller(self.client)
+        for one_direction in (('INPUT', 'OUTPUT') if direction == 'BOTH' else (direction,)):
+            expanded = set()
+            frontier = [guid]
+            while frontier:
+                expanded.update(frontier)
+                candidates = set()
+                fetch = functools.partial(self._fetch_lineage, direction=one_direction, depth=depth)
+                for response in concurrency.prefetch(fetch, frontier,
+                                                     max_workers or self.client.max_workers, controller):
+                    graph.add(response)
+                    candidates |= lineage.response_boundary(response, one_direction)
+                frontier = lineage.next_frontier(graph, guid, one_direction,
+                                                 candidates - expanded, max_depth)
+                LOG.debug("Lineage of %s: %s entities, %s to expand", guid, len(graph), len(frontier))
+        return graph
+
+    def _fetch_lineage(self, guid, direction, depth):
+        return self.client.get('/'.join([self.url, guid]),
+                               params={'direction': direction, 'depth': depth})
     
 
 class LineageGuid(base.QueryableModel):
     path = 'lineage'
     data_key = 'lineage_guid'
+    cache_ttl = ENTITY_CACHE_TTL
     fields = ('baseEntityGuid', 'guidEntityMap', 'property1', 'property2', 'relations', 'lineageDirection', 'lineageDepth')
     relationships = {'relations': LineageGuidRelation}
     collection_class = LineageGuidCollection
+
+    def graph(self):
+        """Return the lineage as an atlasclient.lineage.LineageGraph."""
+        return lineage.LineageGraph([self.to_dict()])
  
 
 class RelationshipGuid(base.QueryableModel):
     path = 'relationship/guid'
     data_key = 'relationship_guid'
+    cache_ttl = ENTITY_CACHE_TTL
     primary_key = 'guid'
     fields = ('guid', 'status', 'createdBy',
               'updatedBy', 'createTime', 'updateTime',
@@ -763,12 +1113,173 @@ class FullTextResult(base.DependentModel):
     fields = ('entity', 'score')
 
 
-class SearchAttributeCollection(base.QueryableModelCollection):
+def search_result_count(response):
+    """Number of results in one page of a search response.
+
+    Depending on the query, results come back as entities, as rows of
+    attribute values (DSL queries with a select clause) or as full text results.
+    """
+    attributes = response.get('attributes') or {}
+    return max(len(response.get('entities') or []),
+               len(attributes.get('values') or []) if isinstance(attributes, dict) else 0,
+               len(response.get('fullTextResult') or []))
+
+
+def search_result_entities(response):
+    """The entity dictionaries of one page of a search response.
+
+    Full text searches return their entities in fullTextResult, as
+    {'entity': ..., 'score': ...} dictionaries, instead of in entities.
+    """
+    entities = response.get('entities')
+    if entities:
+        return entities
+    return [result['entity'] for result in response.get('fullTextResult') or []
+            if isinstance(result, dict) and result.get('entity')]
+
+
+class SearchCollection(base.QueryableModelCollection):
+    """A collection of search results.
+
+    Calling the collection loads a single page of results.  Large result sets
+    can be walked lazily with iter_pages() or iter_entities(), which move the
+    'offset' parameter forward until a page comes back incomplete:
+
+        for entity in client.search_dsl(query='hive_table').iter_entities(page_size=500):
+            print(entity.guid)
+
+    Pages are not kept in the collection, so the memory use does not depend
+    on the size of the result set.  With prefetch=N, the next N pages are
+    requested in parallel while the current one is being consumed.
+    """
+    default_page_size = 100
+
     def load(self, response):
         model = self.model_class(self, href=self.url)
         model.load(response)
         self._models.append(model)
 
+    def iter_pages(self, page_size=None, prefetch=0, raw=False):
+        """Generate the result pages one at a time.
+
+        :param page_size: number of results per request, defaults to the
+            'limit' the collection was called with, or default_page_size.
+        :param prefetch: number of page requests to keep in flight ahead of
+            the page being consumed.  Pages are still generated in order.
+            With the adaptive concurrency of the client, any positive value
+            lets the client's controller choose the number instead.
+        :param raw: generate the decoded responses instead of models.
+        """
+        self.check_version()
+        limit, pages = self._page_params(page_size)
+
+        def fetch(page_params):
+            return self.client.get(self.url, params=page_params)
+
+        if prefetch:
+            responses = concurrency.prefetch(fetch, pages, prefetch,
+                                             concurrency_controller(self.client))
+        else:
+            responses = (fetch(page_params) for page_params in pages)
+
+        try:
+            for response in responses:
+                count = search_result_count(response)
+                if raw:
+                    yield response
+                    del response
+                    if count < limit:
+                        return
+                    continue
+                page = self.model_class(self, href=self.url)
+                page.load(response)
+                del response
+                yield page
+                # drop our reference so the page can be freed once the caller is done
+                del page
+                if count < limit:
+                    return
+        finally:
+            responses.close()
+
+    def iter_entities(self, page_size=None, prefetch=0, compact=None, raw=False):
+        """Generate the entities of all result pages one at a time.
+
+        :param compact: build the entities as atlasclient.base.CompactModel
+            objects.  Defaults to the compact_models option of the client.
+        :param raw: generate the entity dictionaries instead of models.
+
+        The entities of full text searches are taken from their fullTextResult.
+        """
+        if raw:
+            for response in self.iter_pages(page_size=page_size, prefetch=prefetch, raw=True):
+                for entity in search_result_entities(response):
+                    yield entity
+            return
+        for page in self.iter_pages(page_size=page_size, prefetch=prefetch):
+            for entity in self._page_entities(page, compact):
+                yield entity
+
+    def _page_params(self, page_size):
+        """The page size, and a generator of the query parameters of the successive pages."""
+        params = dict(self.query_params())
+        limit = int(page_size or params.get('limit') or self.default_page_size)
+
+        def pages():
+            for offset in itertools.count(int(params.get('offset') or 0), limit):
+                page_params = dict(params)
+                page_params['limit'] = limit
+                page_params['offset'] = offset
+                yield page_params
+        return limit, pages()
+
+    def _page_entities(self, page, compact=None):
+        """The collection of the entities of a result page."""
+        entity_class = page.relationships['entities']
+        entities = entity_class.collection_class(self.client, entity_class, parent=page, compact=compact)
+        if not page._data.get('entities'):
+            entities._set_items(search_result_entities(page._data))
+        return entities
+
+    def to_columns(self, columns=columnar.ENTITY_COLUMNS, attributes=None, page_size=None, prefetch=0):
+        """Export the entities of all result pages to an atlasclient.columnar.Columns.
+
+        The entities are appended to the column buffers straight from the
+        responses, without building any model:
+
+            columns = client.search_basic(typeName='hive_table').to_columns(attributes=['name'])
+            columns['createTime'].values   # array('q', [...])
+            columns['typeName'].categories # ['hive_table']
+            pandas.DataFrame(columns.to_dict())
+
+        The rows of DSL queries with a select clause are exported to one
+        column per selected attribute instead, typed as given by attributes
+        if it is a {name: type} dictionary.
+        """
+        result = None
+        for response in self.iter_pages(page_size=page_size, prefetch=prefetch, raw=True):
+            result = self._append_columns(result, response, columns, attributes)
+        return result if result is not None else columnar.Columns(columns, attributes)
+
+    @staticmethod
+    def _append_columns(result, response, columns, attributes):
+        """Append the results of a page to result, a Columns created on the first page."""
+        selected = response.get('attributes')
+        if isinstance(selected, dict) and selected.get('name') and not response.get('entities'):
+            if result is None:
+                types = attributes if isinstance(attributes, dict) else {}
+                result = columnar.Columns([(name, types.get(name, 'object')) for name in selected['name']])
+            for row in selected.get('values') or []:
+                result.append_row(row)
+            return result
+        if result is None:
+            result = columnar.Columns(columns, attributes)
+        return result.extend(search_result_entities(response))
+
+
+class SearchAttributeCollection(SearchCollection):
+    pass
+
 
 class SearchAttribute(base.QueryableModel):
     collection_class = SearchAttributeCollection
@@ -782,11 +1293,8 @@ class SearchAttribute(base.QueryableModel):
                      'fullTextResults': FullTextResult}
 
 
-class SearchBasicCollection(base.QueryableModelCollection):
-    def load(self, response):
-        model = self.model_class(self, href=self.url)
-        model.load(response)
-        self._models.append(model)
+class SearchBasicCollection(SearchCollection):
+    pass
 
 
 class SearchBasic(base.QueryableModel):
@@ -811,11 +1319,8 @@ class SearchBasic(base.QueryableModel):
         return self
 
 
-class SearchDslCollection(base.QueryableModelCollection):
-    def load(self, response):
-        model = self.model_class(self, href=self.url)
-        model.load(response)
-        self._models.append(model)
+class SearchDslCollection(SearchCollection):
+    pass
 
 
 class SearchDsl(base.QueryableModel):
@@ -829,21 +1334,25 @@ class SearchDsl(base.QueryableModel):
                      'attributes': AttributeDef,
                      'fullTextResults': FullTextResult}
 
-    def flatten_attrs(self):
+    def flatten_attrs(self, named=False):
         """
         If you are specifying attributes using a SELECT clause in DSL search,
         you can use this function to flatten the attribute values.
-        :return: Python list of attributes values.
+        :param named: return the values as named columns instead.
+        :return: Python list of attributes values, or a {name: list of values}
+            ordered dictionary with one column per selected attribute.
         """
-        attributes = self._data.get('attributes').get("values") or list()
-        return list(itertools.chain.from_iterable(attributes))
+        attributes = self._data.get('attributes') or {}
+        rows = attributes.get("values") or list()
+        if named:
+            names = attributes.get('name') or []
+            return collections.OrderedDict((name, [row[index] if index < len(row) else None for row in rows])
+                                           for index, name in enumerate(names))
+        return list(itertools.chain.from_iterable(rows))
 
 
-class SearchFulltextCollection(base.QueryableModelCollection):
-    def load(self, response):
-        model = self.model_class(self, href=self.url)
-        model.load(response)
-        self._models.append(model)
+class SearchFulltextCollection(SearchCollection):
+    pass
 
 
 class SearchFulltext(base.QueryableModel):
@@ -0,0 +1,155 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+An indexed view of the Atlas type system.
+"""
+
+import collections
+import json
+import logging
+import os
+import tempfile
+import time
+
+import six
+
+from atlasclient.utils import NullHandler
+
+LOG = logging.getLogger(__name__)
+LOG.addHandler(NullHandler())
+
+TYPEDEF_CATEGORIES = ('enumDefs', 'structDefs', 'classificationDefs', 'entityDefs',
+                      'relationshipDefs', 'businessMetadataDefs')
+
+
+class TypeRegistry(object):
+    """The type definitions of /types/typedefs, indexed by name and GUID.
+
+    The super type chains are resolved once when the registry is built, so
+    looking up a type, its super types, its sub types or its inherited
+    attribute definitions does not require any scan of the type system:
+
+        registry = client.typedefs.registry(path='/tmp/atlas_types.json', max_age=3600)
+        registry['hive_table']['category']
+        registry.supertypes('hive_table')   # ('DataSet', 'Referenceable', 'Asset')
+        registry.is_a('hive_table', 'DataSet')
+
+    Type definitions are returned as the dictionaries sent by Atlas.
+    """
+    def __init__(self, typedefs):
+        self.typedefs = typedefs
+        self._by_name = {}
+        self._by_guid = {}
+        for category in TYPEDEF_CATEGORIES:
+            for typedef in typedefs.get(category) or []:
+                self._by_name[typedef.get('name')] = typedef
+                if typedef.get('guid'):
+                    self._by_guid[typedef['guid']] = typedef
+
+        self._supertypes = {}
+        self._subtypes = collections.defaultdict(list)
+        for name in self._by_name:
+            self._supertypes[name] = self._resolve_supertypes(name)
+            for supertype in self._supertypes[name]:
+                self._subtypes[supertype].append(name)
+
+    def _resolve_supertypes(self, name):
+        """All the super types of a type, closest first, each listed once."""
+        resolved = []
+        seen = set([name])
+        queue = collections.deque(self._by_name[name].get('superTypes') or [])
+        while queue:
+            supertype = queue.popleft()
+            if supertype in seen:
+                continue
+            seen.add(supertype)
+            resolved.append(supertype)
+            if supertype in self._by_name:
+                queue.extend(self._by_name[supertype].get('superTypes') or [])
+        return tuple(resolved)
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def __iter__(self):
+        return iter(self._by_name)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def get(self, name, default=None):
+        return self._by_name.get(name, default)
+
+    def by_guid(self, guid, default=None):
+        return self._by_guid.get(guid, default)
+
+    def supertypes(self, name):
+        return self._supertypes[name]
+
+    def subtypes(self, name):
+        return tuple(self._subtypes.get(name, ()))
+
+    def is_a(self, name, supertype):
+        return name == supertype or supertype in self._supertypes.get(name, ())
+
+    def attribute_defs(self, name):
+        """The attribute definitions of a type, including the inherited ones."""
+        attribute_defs = collections.OrderedDict()
+        for type_name in (name,) + self._supertypes[name]:
+            typedef = self._by_name.get(type_name) or {}
+            for attribute_def in typedef.get('attributeDefs') or []:
+                attribute_defs.setdefault(attribute_def.get('name'), attribute_def)
+        return list(attribute_defs.values())
+
+    def save(self, path):
+        """Persist the registry to a JSON file, atomically."""
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as tmp_file:
+                json.dump({'savedAt': time.time(), 'typedefs': self.typedefs}, tmp_file)
+            if six.PY2:  # pragma: no cover
+                if os.path.exists(path):
+                    os.remove(path)
+                os.rename(tmp_path, path)
+            else:
+                os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path, max_age=None):
+        """Load a registry saved with save().
+
+        Return None if the file does not exist, can't be read, is not a saved
+        registry or is older than max_age seconds.
+        """
+        try:
+            with open(path) as registry_file:
+                saved = json.load(registry_file)
+        except (IOError, OSError, ValueError) as e:
+            LOG.debug("Unable to load the type registry from %s: %s", path, e)
+            return None
+        try:
+            if max_age is not None and time.time() - saved.get('savedAt', 0) > max_age:
+                LOG.debug("The type registry in %s is outdated", path)
+                return None
+            return cls(saved['typedefs'])
+        except (KeyError, TypeError, AttributeError) as e:
+            LOG.warning("The file %s is not a saved type registry: %s", path, e)
+            return None
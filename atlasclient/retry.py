@@ -0,0 +1,144 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Retries of the requests failing because the server is overloaded or briefly unavailable.
+"""
+
+import email.utils
+import logging
+import random
+import time
+import timeit
+
+import requests
+from urllib3.exceptions import MaxRetryError
+
+from atlasclient import exceptions
+from atlasclient.utils import NullHandler
+
+LOG = logging.getLogger(__name__)
+LOG.addHandler(NullHandler())
+
+# the status codes of the responses worth retrying
+RETRY_STATUSES = (429, 502, 503, 504)
+# the status codes meaning that the server refused the request before
+# processing it, so that even non-idempotent requests can be retried
+UNPROCESSED_STATUSES = (429, 503)
+IDEMPOTENT_METHODS = ('get', 'head', 'put', 'delete', 'options')
+# the transport errors worth retrying, for the idempotent methods
+TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+def retried_by_adapter(error):
+    """Whether a transport error was raised once the connection adapter gave up retrying it."""
+    args = getattr(error, 'args', None)
+    return bool(args) and isinstance(args[0], MaxRetryError)
+
+
+def parse_retry_after(value, now=None):
+    """The seconds to wait given by a Retry-After header (delay or HTTP date), None if invalid."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    date = email.utils.parsedate_tz(str(value))
+    if date is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(date) - (now if now is not None else time.time()))
+
+
+class RetryPolicy(object):
+    """When and how long to wait before retrying a failed request.
+
+    Failed requests are retried with a jittered exponential backoff: the
+    n-th retry waits a random time between 0 and backoff * 2 ** n seconds,
+    at most max_backoff.  When the response has a Retry-After header, the
+    retry waits for that long instead (plus up to backoff seconds of jitter).
+
+    Responses with one of the statuses are retried for the idempotent methods,
+    but only the ones meaning that the request was not processed (429, 503)
+    are retried for the other methods (POST), since retrying them could apply
+    them twice.  Transport errors (connection errors, timeouts) are retried
+    for the idempotent methods only, unless the connection adapter of the
+    client already retried them (connection failures, see max_retries).
+
+    A request is given up after max_attempts attempts, or when the next
+    attempt would start more than deadline seconds after the first one.
+    """
+    def __init__(self, max_attempts=5, backoff=0.5, max_backoff=30, deadline=120,
+                 statuses=RETRY_STATUSES, idempotent_methods=IDEMPOTENT_METHODS,
+                 unprocessed_statuses=UNPROCESSED_STATUSES, transient_errors=TRANSIENT_ERRORS):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.statuses = statuses
+        self.idempotent_methods = idempotent_methods
+        self.unprocessed_statuses = unprocessed_statuses
+        self.transient_errors = transient_errors
+        self._random = random.Random()
+
+    def is_retryable(self, method, error, transient_errors=None):
+        """Whether a request of method failing with error may be retried."""
+        idempotent = method.lower() in self.idempotent_methods
+        if isinstance(error, exceptions.HttpError):
+            return error.code in self.statuses and (idempotent or error.code in self.unprocessed_statuses)
+        if transient_errors is None:
+            transient_errors = self.transient_errors
+        return idempotent and isinstance(error, transient_errors) and not retried_by_adapter(error)
+
+    def backoff_delay(self, attempt):
+        """The jittered delay before retry number attempt (0 for the first retry)."""
+        return self._random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def retry_delay(self, method, error, attempt, elapsed, transient_errors=None):
+        """The seconds to wait before retrying, or None if the request must not be retried.
+
+        :param attempt: the number of attempts already failed, minus one.
+        :param elapsed: the seconds since the first attempt started.
+        """
+        if attempt + 1 >= self.max_attempts or not self.is_retryable(method, error, transient_errors):
+            return None
+        retry_after = parse_retry_after(getattr(error, 'retry_after', None))
+        if retry_after is not None:
+            delay = retry_after + self._random.uniform(0, self.backoff)
+        else:
+            delay = self.backoff_delay(attempt)
+        if self.deadline is not None and elapsed + delay > self.deadline:
+            LOG.debug("Not retrying %s: the retry would start after the deadline", method)
+            return None
+        return delay
+
+    def call(self, func, method, on_retry=None, transient_errors=None):
+        """Call func() until it succeeds or the request must not be retried.
+
+        :param on_retry: called with (error, attempt, delay) before each retry.
+        :param transient_errors: the transport errors to retry instead of the
+            ones of the policy.
+        """
+        start = timeit.default_timer()
+        attempt = 0
+        while True:
+            try:
+                return func()
+            except Exception as error:  # pylint: disable=broad-except
+                delay = self.retry_delay(method, error, attempt, timeit.default_timer() - start,
+                                         transient_errors)
+                if delay is None:
+                    raise
+                if on_retry is not None:
+                    on_retry(error, attempt, delay)
+                time.sleep(delay)
+                attempt += 1
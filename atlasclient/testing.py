@@ -0,0 +1,519 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+An in-process fake Atlas server, for testing and load testing the client without a cluster.
+
+    from atlasclient.testing import FakeAtlasServer
+
+    with FakeAtlasServer(latency=0.01, unavailable_rate=0.05) as server:
+        client = server.client()
+        client.entity_bulk.create(data={'entities': [...]})
+        for e in client.search_basic(typeName='hive_table').iter_entities(page_size=100):
+            ...
+
+It serves the /api/atlas/v2 and /api/atlas/admin paths of the entry points
+from an in-memory EntityStore, with injectable latency and errors.
+"""
+
+import collections
+import copy
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+
+import six
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import parse_qs, unquote, urlsplit
+
+from atlasclient.client import Atlas
+from atlasclient.utils import NullHandler
+
+LOG = logging.getLogger(__name__)
+LOG.addHandler(NullHandler())
+
+TYPEDEF_CATEGORIES = ('enumDefs', 'structDefs', 'classificationDefs', 'entityDefs', 'relationshipDefs')
+# the typedef categories of the types/<kind>def/{guid,name} paths
+TYPEDEF_KINDS = {'enumdef': 'enumDefs',
+                 'structdef': 'structDefs',
+                 'classificationdef': 'classificationDefs',
+                 'entitydef': 'entityDefs',
+                 'relationshipdef': 'relationshipDefs'}
+ATLAS_VERSION = '2.1.0'
+
+
+class FakeError(Exception):
+    """An error response of the fake server."""
+    def __init__(self, status, message, headers=None):
+        super(FakeError, self).__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class EntityStore(object):
+    """A thread-safe in-memory store of entities and typedefs.
+
+    Entities are dictionaries in the format of the Atlas API.  The lineage is
+    derived from the 'inputs' and 'outputs' attributes of the process
+    entities, as Atlas does.
+    """
+    def __init__(self, entities=None, typedefs=None):
+        self.entities = collections.OrderedDict()
+        self.typedefs = dict((category, []) for category in TYPEDEF_CATEGORIES)
+        self._lock = threading.RLock()
+        self._guids = itertools.count(1)
+        if entities:
+            self.add_entities(entities)
+        if typedefs:
+            self.add_typedefs(typedefs)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def _new_guid(self):
+        return 'fake-%08d' % next(self._guids)
+
+    def add_entities(self, entities):
+        """Create or update entities, and return the Atlas mutation response.
+
+        Entities without a GUID, or with a negative placeholder GUID, are
+        created; references to placeholders in their attributes are resolved.
+        """
+        with self._lock:
+            assignments = {}
+            for entity in entities:
+                guid = entity.get('guid')
+                if guid is not None and str(guid).startswith('-'):
+                    assignments[guid] = self._new_guid()
+            mutated = {'CREATE': [], 'UPDATE': []}
+            now = int(time.time() * 1000)
+            for entity in entities:
+                entity = _resolve_placeholders(copy.deepcopy(entity), assignments)
+                guid = entity.get('guid') or self._new_guid()
+                previous = self.entities.get(guid)
+                entity['guid'] = guid
+                entity.setdefault('status', 'ACTIVE')
+                entity.setdefault('attributes', {})
+                entity['version'] = previous['version'] + 1 if previous else 0
+                entity['createTime'] = previous['createTime'] if previous else now
+                entity['updateTime'] = now
+                self.entities[guid] = entity
+                mutated['UPDATE' if previous else 'CREATE'].append(entity_header(entity))
+            return {'guidAssignments': dict((str(key), value) for key, value in assignments.items()),
+                    'mutatedEntities': dict((key, value) for key, value in mutated.items() if value)}
+
+    def get(self, guid):
+        with self._lock:
+            entity = self.entities.get(guid)
+            if entity is None:
+                raise FakeError(404, 'Given instance guid %s is invalid/not found' % guid)
+            return copy.deepcopy(entity)
+
+    def find(self, type_name, attribute, value):
+        with self._lock:
+            for entity in self.entities.values():
+                if entity.get('typeName') == type_name and entity['attributes'].get(attribute) == value:
+                    return copy.deepcopy(entity)
+        raise FakeError(404, 'Instance %s with unique attribute {%s:%s} does not exist'
+                        % (type_name, attribute, value))
+
+    def delete(self, guids):
+        with self._lock:
+            deleted = []
+            for guid in guids:
+                entity = self.entities.get(guid)
+                if entity is not None and entity['status'] != 'DELETED':
+                    entity['status'] = 'DELETED'
+                    deleted.append(entity_header(entity))
+            return {'mutatedEntities': {'DELETE': deleted}} if deleted else {}
+
+    def search(self, type_name=None, text=None, attribute=None, prefix=None, exclude_deleted=True):
+        """The entity headers matching a search, in creation order."""
+        with self._lock:
+            results = []
+            for entity in self.entities.values():
+                if type_name and entity.get('typeName') != type_name:
+                    continue
+                if exclude_deleted and entity.get('status') == 'DELETED':
+                    continue
+                if text and text not in json.dumps(entity['attributes']):
+                    continue
+                if attribute and not six.text_type(entity['attributes'].get(attribute, '')).startswith(prefix or ''):
+                    continue
+                results.append(entity_header(entity))
+            return results
+
+    def lineage(self, guid, direction='BOTH', depth=3):
+        """The /lineage/{guid} response of an entity."""
+        with self._lock:
+            self.get(guid)
+            downstream = collections.defaultdict(set)
+            upstream = collections.defaultdict(set)
+            for process in self.entities.values():
+                attributes = process['attributes']
+                if process.get('status') == 'DELETED' or not ('inputs' in attributes or 'outputs' in attributes):
+                    continue
+                for ref in attributes.get('inputs') or []:
+                    downstream[ref['guid']].add(process['guid'])
+                    upstream[process['guid']].add(ref['guid'])
+                for ref in attributes.get('outputs') or []:
+                    downstream[process['guid']].add(ref['guid'])
+                    upstream[ref['guid']].add(process['guid'])
+            relations = set()
+            entities = set([guid])
+            walks = {'INPUT': [upstream], 'OUTPUT': [downstream], 'BOTH': [upstream, downstream]}[direction]
+            for adjacency in walks:
+                level = [guid]
+                # a depth counts the hops from a dataset to the next one, through a process
+                for _ in range(2 * depth):
+                    next_level = []
+                    for current in level:
+                        for neighbor in sorted(adjacency.get(current, ())):
+                            pair = (current, neighbor) if adjacency is downstream else (neighbor, current)
+                            relations.add(pair)
+                            if neighbor not in entities:
+                                entities.add(neighbor)
+                                next_level.append(neighbor)
+                    level = next_level
+            return {'baseEntityGuid': guid,
+                    'lineageDirection': direction,
+                    'lineageDepth': depth,
+                    'guidEntityMap': dict((item, entity_header(self.entities[item]))
+                                          for item in entities if item in self.entities),
+                    'relations': [{'fromEntityId': from_guid, 'toEntityId': to_guid}
+                                  for from_guid, to_guid in sorted(relations)]}
+
+    def add_typedefs(self, typedefs):
+        """Create or replace (by name) typedefs, given in the types/typedefs format."""
+        with self._lock:
+            for category in TYPEDEF_CATEGORIES:
+                for typedef in typedefs.get(category) or []:
+                    typedef = copy.deepcopy(typedef)
+                    typedef.setdefault('guid', self._new_guid())
+                    defs = self.typedefs[category]
+                    defs[:] = [x for x in defs if x['name'] != typedef['name']] + [typedef]
+            return self.get_typedefs()
+
+    def delete_typedefs(self, typedefs):
+        with self._lock:
+            for category in TYPEDEF_CATEGORIES:
+                names = set(typedef['name'] for typedef in typedefs.get(category) or [])
+                self.typedefs[category] = [x for x in self.typedefs[category] if x['name'] not in names]
+
+    def get_typedefs(self):
+        with self._lock:
+            return copy.deepcopy(self.typedefs)
+
+    def get_typedef(self, key, value, category=None):
+        with self._lock:
+            for defs_category in ([category] if category else TYPEDEF_CATEGORIES):
+                for typedef in self.typedefs[defs_category]:
+                    if typedef.get(key) == value:
+                        return copy.deepcopy(typedef)
+        raise FakeError(404, 'Given typename %s was invalid' % value)
+
+    def metrics(self):
+        with self._lock:
+            active = collections.Counter()
+            deleted = collections.Counter()
+            for entity in self.entities.values():
+                (deleted if entity['status'] == 'DELETED' else active)[entity['typeName']] += 1
+            return {'general': {'entityCount': len(self.entities),
+                                'typeCount': sum(len(defs) for defs in self.typedefs.values())},
+                    'entity': {'entityActive': dict(active), 'entityDeleted': dict(deleted)},
+                    'tag': {'tagEntities': {}}}
+
+
+def entity_header(entity):
+    attributes = entity.get('attributes') or {}
+    return {'guid': entity['guid'],
+            'typeName': entity.get('typeName'),
+            'status': entity.get('status'),
+            'displayText': attributes.get('name') or attributes.get('qualifiedName'),
+            'classificationNames': [c['typeName'] for c in entity.get('classifications') or []],
+            'attributes': dict((key, attributes[key]) for key in ('name', 'qualifiedName', 'owner')
+                               if key in attributes)}
+
+
+def _resolve_placeholders(value, assignments):
+    """Replace the placeholder (negative) GUIDs of value by their assigned GUIDs."""
+    if isinstance(value, dict):
+        value = dict((key, _resolve_placeholders(item, assignments)) for key, item in value.items())
+        if value.get('guid') in assignments:
+            value['guid'] = assignments[value['guid']]
+        return value
+    elif isinstance(value, list):
+        return [_resolve_placeholders(item, assignments) for item in value]
+    return value
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # keep-alive, so that the client's connection pool is exercised
+    protocol_version = 'HTTP/1.1'
+    # send the headers and the body in one segment
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status, headers, response = self.server.fake.handle(self.command, self.path, body)
+        text = json.dumps(response).encode('utf-8') if response is not None else b''
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(text)))
+        self.end_headers()
+        self.wfile.write(text)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        LOG.debug("%s - %s", self.address_string(), format % args)
+
+
+class _HTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeAtlasServer(object):
+    """A threaded HTTP server mimicking the Atlas REST API.
+
+    :param store: the EntityStore served, a new empty one by default.
+    :param latency: seconds added to every response, or a (min, max) range
+        to draw them from.
+    :param error_rate: fraction of the requests answered 500.
+    :param throttle_rate: fraction of the requests answered 429, with a
+        Retry-After header.
+    :param unavailable_rate: fraction of the requests answered 503, with a
+        Retry-After header.
+    :param retry_after: the Retry-After value, in seconds.
+    :param max_page_size: the largest 'limit' honoured by searches.
+    :param seed: seed of the random error injection.
+
+    Specific failures can be scripted with fail_next().  The (method, path)
+    of the requests received are counted in `requests`.
+    """
+    def __init__(self, store=None, host='127.0.0.1', port=0, latency=0, error_rate=0.0,
+                 throttle_rate=0.0, unavailable_rate=0.0, retry_after=1, max_page_size=None, seed=None):
+        self.store = store if store is not None else EntityStore()
+        self.host = host
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.unavailable_rate = unavailable_rate
+        self.retry_after = retry_after
+        self.max_page_size = max_page_size
+        self.requests = collections.Counter()
+        self._random = random.Random(seed)
+        self._failures = collections.deque()
+        self._lock = threading.Lock()
+        self._server = _HTTPServer((host, port), _Handler)
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    @property
+    def url(self):
+        return 'http://%s:%s' % (self.host, self.port)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05},
+                                            name='fake-atlas')
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def client(self, **kwargs):
+        """An atlasclient.client.Atlas client of the server."""
+        kwargs.setdefault('username', 'admin')
+        kwargs.setdefault('password', 'admin')
+        return Atlas(self.host, port=self.port, **kwargs)
+
+    def fail_next(self, status, count=1, retry_after=None):
+        """Answer the next count requests with an error status (and a Retry-After header)."""
+        with self._lock:
+            for _ in range(count):
+                self._failures.append((status, retry_after))
+
+    def _injected_failure(self):
+        with self._lock:
+            if self._failures:
+                return self._failures.popleft()
+            draw = self._random.random()
+            if draw < self.throttle_rate:
+                return 429, self.retry_after
+            draw -= self.throttle_rate
+            if draw < self.unavailable_rate:
+                return 503, self.retry_after
+            draw -= self.unavailable_rate
+            if draw < self.error_rate:
+                return 500, None
+            return None
+
+    def _sleep(self):
+        latency = self.latency
+        if isinstance(latency, (tuple, list)):
+            with self._lock:
+                latency = self._random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def handle(self, method, path, body):
+        """Answer a request: return its (status, headers, response body)."""
+        url = urlsplit(path)
+        query = parse_qs(url.query, keep_blank_values=True)
+        with self._lock:
+            self.requests[(method, url.path)] += 1
+        self._sleep()
+        try:
+            failure = self._injected_failure()
+            if failure is not None:
+                status, retry_after = failure
+                headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+                raise FakeError(status, 'Injected failure', headers)
+            data = json.loads(body.decode('utf-8')) if body else None
+            return 200, {}, self.route(method, url.path, query, data)
+        except FakeError as e:
+            return e.status, e.headers, {'errorCode': 'ATLAS-%s-00-001' % e.status, 'errorMessage': e.message}
+
+    def route(self, method, path, query, data):
+        for prefix in ('/api/atlas/v2/', '/api/atlas/admin/'):
+            if path.startswith(prefix):
+                parts = [unquote(part) for part in path[len(prefix):].split('/')]
+                break
+        else:
+            raise FakeError(404, 'Unknown path %s' % path)
+        if prefix == '/api/atlas/admin/':
+            return self._admin(method, parts)
+        handler = getattr(self, '_' + parts[0], None)
+        if handler is None:
+            raise FakeError(404, 'Unknown path %s' % path)
+        return handler(method, parts[1:], query, data)
+
+    def _admin(self, method, parts):
+        if parts == ['metrics']:
+            return self.store.metrics()
+        if parts == ['version']:
+            return {'Version': ATLAS_VERSION, 'Name': 'fake-atlas'}
+        raise FakeError(404, 'Unknown admin path %s' % '/'.join(parts))
+
+    def _entity(self, method, parts, query, data):
+        store = self.store
+        if not parts and method == 'POST':
+            return store.add_entities([data['entity']])
+        if parts[:1] == ['guid'] and len(parts) == 2:
+            if method == 'DELETE':
+                return store.delete([parts[1]])
+            return {'entity': store.get(parts[1]), 'referredEntities': {}}
+        if parts == ['bulk']:
+            if method == 'POST':
+                return store.add_entities(data['entities'])
+            if method == 'DELETE':
+                return store.delete(query.get('guid', []))
+            entities = []
+            for guid in query.get('guid', []):
+                try:
+                    entities.append(store.get(guid))
+                except FakeError:
+                    pass
+            return {'entities': entities, 'referredEntities': {}}
+        if parts[:2] == ['uniqueAttribute', 'type'] and len(parts) == 3:
+            for key, values in query.items():
+                if key.startswith('attr:'):
+                    entity = store.find(parts[2], key[len('attr:'):], values[0])
+                    if method == 'DELETE':
+                        return store.delete([entity['guid']])
+                    return {'entity': entity, 'referredEntities': {}}
+        raise FakeError(404, 'Unknown entity path %s' % '/'.join(parts))
+
+    def _search(self, method, parts, query, data):
+        params = dict((key, values[0]) for key, values in query.items())
+        if data:
+            params.update(data)
+        kind = parts[0] if parts else None
+        type_name = params.get('typeName')
+        text = None
+        if kind == 'dsl':
+            # only the type name of the query is honoured
+            words = (params.get('query') or '').split()
+            type_name = words[0] if words else type_name
+        elif kind in ('basic', 'fulltext'):
+            text = params.get('query')
+        elif kind != 'attribute':
+            raise FakeError(404, 'Unknown search path %s' % '/'.join(parts))
+        results = self.store.search(type_name=type_name, text=text,
+                                    attribute=params.get('attrName'), prefix=params.get('attrValuePrefix'),
+                                    exclude_deleted=str(params.get('excludeDeletedEntities', 'true')) != 'false')
+        limit = int(params.get('limit') or 100)
+        if self.max_page_size:
+            limit = min(limit, self.max_page_size)
+        offset = int(params.get('offset') or 0)
+        response = {'queryType': kind.upper(),
+                    'queryText': params.get('query'),
+                    'searchParameters': params}
+        if kind == 'fulltext':
+            # like Atlas, full text searches return scored results instead of entities
+            response['fullTextResult'] = [{'entity': header, 'score': 1.0}
+                                          for header in results[offset:offset + limit]]
+        else:
+            response['entities'] = results[offset:offset + limit]
+        return response
+
+    def _lineage(self, method, parts, query, data):
+        if len(parts) != 1:
+            raise FakeError(404, 'Unknown lineage path %s' % '/'.join(parts))
+        direction = (query.get('direction') or ['BOTH'])[0]
+        depth = int((query.get('depth') or [3])[0])
+        return self.store.lineage(parts[0], direction, depth)
+
+    def _types(self, method, parts, query, data):
+        store = self.store
+        if parts == ['typedefs']:
+            if method in ('POST', 'PUT'):
+                return store.add_typedefs(data)
+            if method == 'DELETE':
+                store.delete_typedefs(data)
+                return None
+            return store.get_typedefs()
+        if parts == ['typedefs', 'headers']:
+            return [{'guid': typedef['guid'], 'name': typedef['name'], 'category': category[:-4].upper()}
+                    for category, defs in store.get_typedefs().items() for typedef in defs]
+        if len(parts) == 3 and parts[1] in ('guid', 'name'):
+            if parts[0] == 'typedef':
+                return store.get_typedef(parts[1], parts[2])
+            if parts[0] in TYPEDEF_KINDS:
+                return store.get_typedef(parts[1], parts[2], TYPEDEF_KINDS[parts[0]])
+        raise FakeError(404, 'Unknown types path %s' % '/'.join(parts))
@@ -10,6 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
 import re
 import base64
 
@@ -85,6 +86,16 @@ def version_str(version):
         raise ValueError("Invalid version: %s" % version)
 
 
+def chunked(iterable, size):
+    """Split an iterable into lists of at most `size` items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
 def generate_http_basic_token(username, password):
     """
     Generates a HTTP basic token from username and password
@@ -0,0 +1,130 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Synthetic Atlas responses, scaled up from the recorded fixtures of tests/response_json.
+"""
+
+import json
+import os
+
+from atlasclient.client import Atlas, endpoint_path
+
+RESPONSE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'tests', 'response_json')
+# number of distinct databases the scaled tables refer to
+DATABASES = 100
+
+
+def load_fixture(name):
+    with open(os.path.join(RESPONSE_DIR, name)) as fixture:
+        return json.load(fixture)
+
+
+def copy_entity(entity):
+    """A copy of an entity dictionary, as fresh as a decoded response would be."""
+    entity = dict(entity)
+    for key in ('attributes', 'relationshipAttributes'):
+        if key in entity:
+            entity[key] = dict(entity[key])
+    return entity
+
+
+class FakeAtlas(object):
+    """An in-memory Atlas answering the requests of an HttpClient.
+
+    It holds n tables, each referring to one of DATABASES databases (in the
+    referredEntities of the bulk responses) and to one column (which has to
+    be fetched).  Search results page through the tables, and the lineage
+    is a chain of n processes.
+    """
+    def __init__(self, n):
+        self.n = n
+        entity = load_fixture('entitybulk_get.json')['entities'][0]
+        self.tables = ['table-%d' % i for i in range(n)]
+        self.entities = {}
+        self.databases = {}
+        for i in range(DATABASES):
+            guid = 'db-%d' % i
+            self.databases[guid] = dict(entity, guid=guid, typeName='hive_db', status='ACTIVE',
+                                        attributes={'name': 'db%d' % i, 'qualifiedName': 'db%d@cl1' % i},
+                                        relationshipAttributes={}, classifications=[])
+        for i, guid in enumerate(self.tables):
+            self.entities[guid] = dict(
+                entity, guid=guid, typeName='hive_table', status='ACTIVE', createTime=1546300800000 + i,
+                attributes={'name': 'table%d' % i, 'qualifiedName': 'db.table%d@cl1' % i, 'numRows': i},
+                relationshipAttributes={'db': {'guid': 'db-%d' % (i % DATABASES), 'typeName': 'hive_db'},
+                                        'columns': [{'guid': 'column-%d' % i, 'typeName': 'hive_column'}]})
+            column = 'column-%d' % i
+            self.entities[column] = dict(
+                entity, guid=column, typeName='hive_column', status='ACTIVE', relationshipAttributes={},
+                attributes={'name': 'column%d' % i, 'qualifiedName': 'db.table%d.column%d@cl1' % (i, i)},
+                classifications=[])
+        self.search_page = load_fixture('search_attribute_get.json')
+        self.search_page.update(attributes={}, fullTextResult=[], referredEntities={})
+        self.lineage = self._lineage(load_fixture('lineage_guid_get.json'))
+        self.typedefs = self._typedefs(load_fixture('typedefs_get.json'))
+
+    def _lineage(self, template):
+        header = template['guidEntityMap']['property1']
+        entities = {}
+        relations = []
+        for i, guid in enumerate(self.tables):
+            entities[guid] = dict(header, guid=guid, typeName='hive_table', status='ACTIVE')
+            if i:
+                process = 'process-%d' % i
+                entities[process] = dict(header, guid=process, typeName='hive_process', status='ACTIVE')
+                relations.append({'fromEntityId': self.tables[i - 1], 'toEntityId': process})
+                relations.append({'fromEntityId': process, 'toEntityId': guid})
+        return dict(template, baseEntityGuid=self.tables[-1], guidEntityMap=entities,
+                    relations=relations, lineageDirection='INPUT', lineageDepth=self.n)
+
+    def _typedefs(self, template):
+        entity_def = template['entityDefs'][0]
+        count = max(1, self.n // 100)
+        return dict(template, entityDefs=[dict(entity_def, name='type%d' % i, guid='type-%d' % i)
+                                          for i in range(count)])
+
+    def request(self, method, url, content_type=None, params=None, **kwargs):
+        path = endpoint_path(url)
+        params = params or {}
+        if path == 'entity/bulk':
+            guids = params['guid']
+            if not isinstance(guids, list):
+                guids = [guids]
+            referred = {}
+            entities = []
+            for guid in guids:
+                entity = self.entities.get(guid)
+                if entity is not None:
+                    entities.append(copy_entity(entity))
+                    db = entity['relationshipAttributes'].get('db')
+                    if db is not None:
+                        referred[db['guid']] = copy_entity(self.databases[db['guid']])
+            return {'entities': entities, 'referredEntities': referred}
+        elif path == 'search/basic':
+            offset, limit = int(params.get('offset') or 0), int(params['limit'])
+            return dict(self.search_page,
+                        entities=[copy_entity(self.entities[guid]) for guid in self.tables[offset:offset + limit]])
+        elif path == 'lineage':
+            return dict(self.lineage)
+        elif path == 'types/typedefs':
+            return dict(self.typedefs)
+        raise ValueError("Unexpected request: %s %s" % (method, url))
+
+
+def fake_client(n, **kwargs):
+    """An Atlas client whose HttpClient is answered by a FakeAtlas of n tables."""
+    atlas = Atlas('localhost', port=21000, username='admin', password='admin', metrics=None, **kwargs)
+    fake = FakeAtlas(n)
+    atlas.client.request = fake.request
+    return atlas, fake
@@ -0,0 +1,277 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Benchmarks of the client models, against synthetic responses (see benchmarks.fixtures).
+
+Each benchmark runs in its own process, for each size, and reports its wall
+time (best of --repeat runs), the peak and retained memory traced by
+tracemalloc during one more run, and the peak RSS of the process:
+
+    python -m benchmarks.run --sizes 1000,100000 --output before.json
+    ... change the client ...
+    python -m benchmarks.run --sizes 1000,100000 --output after.json
+    python -m benchmarks.run --compare before.json after.json
+
+--compare exits with status 1 when a measure got worse than --threshold.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import timeit
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+from atlasclient.client import AtlasJsonEncoder
+
+from benchmarks.fixtures import fake_client
+
+BENCHMARKS = {}
+DEFAULT_SIZES = (1000, 10000, 100000)
+# the measures compared between two results, and whether higher is worse
+MEASURES = ('wall_s', 'peak_traced_kib', 'retained_traced_kib', 'peak_rss_kib')
+
+
+def benchmark(func):
+    """Register a benchmark: func(n) prepares a client and returns the function to measure."""
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def _bulk(atlas, fake, **kwargs):
+    bulks = list(atlas.entity_bulk(guid=fake.tables, **kwargs))
+    return bulks[0]
+
+
+@benchmark
+def bulk_load(n):
+    """Fetch n tables with entity_bulk (chunked requests, merged into one model)."""
+    atlas, fake = fake_client(n, bulk_chunk_size=1000)
+    return lambda: _bulk(atlas, fake)
+
+
+@benchmark
+def bulk_iterate(n):
+    """bulk_load, then read fields of every entity model."""
+    atlas, fake = fake_client(n, bulk_chunk_size=1000)
+
+    def run():
+        return sum(1 for entity in _bulk(atlas, fake).entities if entity.guid and entity.attributes['name'])
+    return run
+
+
+@benchmark
+def bulk_iterate_compact(n):
+    """bulk_iterate with compact models."""
+    atlas, fake = fake_client(n, bulk_chunk_size=1000, compact_models=True)
+
+    def run():
+        return sum(1 for entity in _bulk(atlas, fake).entities if entity.guid and entity.attributes['name'])
+    return run
+
+
+@benchmark
+def bulk_to_dict(n):
+    """bulk_load, then convert every entity model back to a dictionary."""
+    atlas, fake = fake_client(n, bulk_chunk_size=1000)
+    return lambda: [entity.to_dict() for entity in _bulk(atlas, fake).entities]
+
+
+@benchmark
+def bulk_json_encode(n):
+    """bulk_load, then JSON-encode the entities with AtlasJsonEncoder."""
+    atlas, fake = fake_client(n, bulk_chunk_size=1000)
+    return lambda: json.dumps(_bulk(atlas, fake).entities, cls=AtlasJsonEncoder)
+
+
+@benchmark
+def bulk_relationships(n):
+    """bulk_load, then entities_with_relationships (one column fetched per table)."""
+    atlas, fake = fake_client(n, bulk_chunk_size=1000)
+    return lambda: _bulk(atlas, fake).entities_with_relationships()
+
+
+@benchmark
+def search_iterate(n):
+    """Page through n search results with iter_entities, reading fields of every entity model."""
+    atlas, fake = fake_client(n)
+    return lambda: sum(1 for entity in atlas.search_basic(typeName='hive_table').iter_entities(page_size=1000)
+                       if entity.guid and entity.attributes['name'])
+
+
+@benchmark
+def search_raw(n):
+    """search_iterate, on the raw entity dictionaries."""
+    atlas, fake = fake_client(n)
+    return lambda: sum(1 for entity in atlas.search_basic(typeName='hive_table').iter_entities(page_size=1000,
+                                                                                               raw=True)
+                       if entity['guid'] and entity['attributes']['name'])
+
+
+@benchmark
+def search_columns(n):
+    """Export n search results to column buffers."""
+    atlas, fake = fake_client(n)
+    return lambda: atlas.search_basic(typeName='hive_table').to_columns(attributes=['name'], page_size=1000)
+
+
+@benchmark
+def lineage_graph(n):
+    """Load a lineage chain of n tables, build its graph and walk it upstream."""
+    atlas, fake = fake_client(n)
+
+    def run():
+        model = atlas.lineage_guid(fake.tables[-1])
+        model.inflate()
+        return len(model.graph().upstream(fake.tables[-1]))
+    return run
+
+
+@benchmark
+def typedefs_load(n):
+    """Load n / 100 entity definitions and read their attribute definitions."""
+    atlas, fake = fake_client(n)
+
+    def run():
+        return sum(len(entity_def.attributeDefs) for typedefs in atlas.typedefs
+                   for entity_def in typedefs.entityDefs)
+    return run
+
+
+def peak_rss_kib():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def measure(name, n, repeat=3, trace=True):
+    """Run one benchmark in this process, and return its measures."""
+    run = BENCHMARKS[name](n)
+    gc.collect()
+    setup_rss = peak_rss_kib()
+    times = []
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        result = run()
+        times.append(timeit.default_timer() - start)
+        del result
+        gc.collect()
+    measures = {'n': n, 'wall_s': min(times), 'setup_rss_kib': setup_rss, 'peak_rss_kib': peak_rss_kib()}
+    if trace and tracemalloc is not None:
+        tracemalloc.start()
+        result = run()
+        measures['retained_traced_kib'] = tracemalloc.get_traced_memory()[0] // 1024
+        measures['peak_traced_kib'] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+        del result
+    return measures
+
+
+def run_all(names, sizes, repeat=3, trace=True):
+    results = {}
+    for name in names:
+        for n in sizes:
+            command = [sys.executable, '-m', 'benchmarks.run', '--worker', name, '--sizes', str(n),
+                       '--repeat', str(repeat)]
+            if not trace:
+                command.append('--no-trace')
+            output = subprocess.check_output(command)
+            measures = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+            results['%s[%d]' % (name, n)] = measures
+            print('%-32s %10.4f s %12s KiB peak traced %10s KiB peak RSS'
+                  % ('%s[%d]' % (name, n), measures['wall_s'], measures.get('peak_traced_kib'),
+                     measures['peak_rss_kib']))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                       stderr=subprocess.STDOUT).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before, after, threshold=0.1):
+    """Print the ratios of the measures of two result files, return the regressions."""
+    regressions = []
+    print('%-32s %-20s %12s %12s %8s' % ('benchmark', 'measure', 'before', 'after', 'ratio'))
+    for key in sorted(set(before['results']) & set(after['results'])):
+        for measure_name in MEASURES:
+            old = before['results'][key].get(measure_name)
+            new = after['results'][key].get(measure_name)
+            if not old or new is None:
+                continue
+            ratio = float(new) / old
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = ' worse'
+                regressions.append((key, measure_name, ratio))
+            elif ratio < 1 - threshold:
+                flag = ' better'
+            print('%-32s %-20s %12.4g %12.4g %8.2f%s' % (key, measure_name, old, new, ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('names', nargs='*', help='benchmarks to run (default: all): %s'
+                        % ', '.join(sorted(BENCHMARKS)))
+    parser.add_argument('--sizes', default=','.join(str(n) for n in DEFAULT_SIZES),
+                        help='comma-separated numbers of entities')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark, the best time is kept')
+    parser.add_argument('--no-trace', action='store_true', help='skip the tracemalloc run')
+    parser.add_argument('--output', help='JSON file to write the results to')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two result files')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative change reported as a regression by --compare')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as before, open(args.compare[1]) as after:
+            regressions = compare(json.load(before), json.load(after), args.threshold)
+        return 1 if regressions else 0
+
+    sizes = [int(n) for n in args.sizes.split(',')]
+    if args.worker:
+        print(json.dumps(measure(args.worker, sizes[0], args.repeat, not args.no_trace)))
+        return 0
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error('unknown benchmarks: %s' % ', '.join(sorted(unknown)))
+    results = run_all(args.names or sorted(BENCHMARKS), sizes, args.repeat, not args.no_trace)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'commit': git_commit(),
+                       'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'results': results}, output, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
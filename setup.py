@@ -42,6 +42,9 @@ setup_args = dict(
     packages=find_packages(include=['atlasclient']),
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        'async': ['aiohttp>=3.0'],
+    },
     license='Apache Software License 2.0',
     zip_safe=False,
     keywords='atlasclient',
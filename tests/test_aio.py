@@ -0,0 +1,224 @@
+import asyncio
+import json
+
+import pytest
+from pkg_resources import resource_filename
+
+pytest.importorskip('aiohttp')
+
+from atlasclient import models
+from atlasclient.cache import EntityCache
+from atlasclient.aio import AsyncAtlas, _expand_params, async_model_class
+
+GUID = '8bbea92b-d98c-4613-ae6e-1a9d0b4f344b'
+RESPONSE_JSON_DIR = 'response_json'
+
+
+def load_response(name):
+    with open('{}/{}'.format(resource_filename(__name__, RESPONSE_JSON_DIR), name)) as json_data:
+        return json.load(json_data)
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class FakeRequest(object):
+    """Records the calls made to AsyncHttpClient.request and returns canned responses."""
+    def __init__(self, response):
+        self.response = response
+        self.calls = []
+
+    async def __call__(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        await asyncio.sleep(0)
+        return json.loads(json.dumps(self.response))
+
+
+@pytest.fixture(scope='function')
+def async_atlas_client():
+    return AsyncAtlas('localhost', port=21000, username='admin', password='admin')
+
+
+class TestAsyncAtlas():
+    def test_entry_points(self, async_atlas_client):
+        assert 'entity_guid' in dir(async_atlas_client)
+        entity_bulk = async_atlas_client.entity_bulk
+        assert isinstance(entity_bulk, models.EntityBulkCollection)
+        assert entity_bulk.url == 'http://localhost:21000/api/atlas/v2/entity/bulk'
+        assert async_model_class(models.EntityBulk) is entity_bulk.model_class
+
+    def test_entity_guid_inflate(self, mocker, async_atlas_client):
+        fake = FakeRequest(load_response('entityguid_get.json'))
+        mocker.patch.object(async_atlas_client.client, 'request', fake)
+        entity = run(async_atlas_client.entity_guid(GUID).inflate())
+        assert entity.entity['guid'] == GUID
+        assert fake.calls[0][:2] == ('get', entity.url)
+
+    def test_entity_bulk_async_for(self, mocker, async_atlas_client):
+        fake = FakeRequest(load_response('entitybulk_get.json'))
+        mocker.patch.object(async_atlas_client.client, 'request', fake)
+        params = {'guid': [GUID, '92b3a92b-d98c-4613-ae6e-1a9d0b4f344b']}
+
+        async def versions():
+            result = []
+            async for bulk in async_atlas_client.entity_bulk(**params):
+                result.extend(entity.version for entity in bulk.entities)
+            return result
+
+        assert run(versions()) == [12345, 12345]
+        assert fake.calls[0][2]['params'] == params
+
+    def test_entity_bulk_chunked(self, mocker, async_atlas_client):
+        fake = FakeRequest(load_response('entitybulk_get.json'))
+        mocker.patch.object(async_atlas_client.client, 'request', fake)
+        async_atlas_client.bulk_chunk_size = 2
+        guids = ['guid-{}'.format(i) for i in range(5)]
+        bulk = run(async_atlas_client.entity_bulk(guid=guids).inflate())
+        assert len(fake.calls) == 3
+        assert [c[2]['params']['guid'] for c in fake.calls] == [guids[0:2], guids[2:4], guids[4:]]
+        assert len(bulk._models[0].entities) == 6
+
+    def test_entity_guid_from_cache(self, mocker, async_atlas_client):
+        response = load_response('entityguid_get.json')
+        async_atlas_client.entity_cache = EntityCache()
+        async_atlas_client.entity_cache.put(response['entity'])
+        fake = FakeRequest(response)
+        mocker.patch.object(async_atlas_client.client, 'request', fake)
+        entity = run(async_atlas_client.entity_guid(GUID).inflate())
+        assert entity.entity['guid'] == GUID
+        assert fake.calls == []
+
+    def test_entity_bulk_create_batched(self, mocker, async_atlas_client):
+        state = {'pulled': 0, 'posted': 0, 'pending': [], 'running': 0, 'max_running': 0}
+
+        def entities():
+            for i in range(10):
+                state['pulled'] += 1
+                yield {'guid': '-%d' % i, 'typeName': 'hive_table'}
+
+        async def request(method, url, data=None, **kwargs):
+            # the entities pulled but not posted yet
+            state['pending'].append(state['pulled'] - state['posted'])
+            state['running'] += 1
+            state['max_running'] = max(state['max_running'], state['running'])
+            await asyncio.sleep(0)
+            state['running'] -= 1
+            state['posted'] += len(data['entities'])
+            if data['entities'][0]['guid'] == '-4':
+                raise ValueError('rejected')
+            return {'guidAssignments': dict((e['guid'], 'g' + e['guid']) for e in data['entities'])}
+
+        mocker.patch.object(async_atlas_client.client, 'request', request)
+        result = run(async_atlas_client.entity_bulk.create_batched(entities(), batch_size=2, max_workers=2))
+        assert state['max_running'] == 2
+        # two batches in flight, and the entity read ahead of the next batch
+        assert max(state['pending']) <= 5
+        assert len(result['guidAssignments']) == 8
+        assert [failed['batch'] for failed in result['failedBatches']] == [2]
+
+    def test_concurrent_requests(self, mocker, async_atlas_client):
+        fake = FakeRequest(load_response('entityguid_get.json'))
+        mocker.patch.object(async_atlas_client.client, 'request', fake)
+
+        async def fetch_all():
+            return await asyncio.gather(*[async_atlas_client.entity_guid(str(i)).inflate()
+                                          for i in range(20)])
+
+        entities = run(fetch_all())
+        assert len(entities) == 20
+        assert len(fake.calls) == 20
+
+    def test_search_basic_create(self, mocker, async_atlas_client):
+        response = load_response('search_attribute_get.json')
+        fake = FakeRequest(response)
+        mocker.patch.object(async_atlas_client.client, 'request', fake)
+        search = async_atlas_client.search_basic.model_class(async_atlas_client.search_basic,
+                                                             href=async_atlas_client.search_basic.url)
+        run(search.create(data={'typeName': 'hive_table'}))
+        assert fake.calls[0] == ('post', search.url, {'data': {'typeName': 'hive_table'}})
+        assert search.queryType == response['queryType']
+
+    def test_search_iter_pages(self, mocker, async_atlas_client):
+        response = load_response('search_attribute_get.json')
+        full_page = dict(response, attributes={}, fullTextResult=[])
+        pages = [full_page, dict(full_page, entities=response['entities'][:1])]
+        calls = []
+
+        async def request(method, url, params):
+            calls.append(params)
+            return pages[len(calls) - 1] if len(calls) <= len(pages) else dict(pages[1], entities=[])
+
+        mocker.patch.object(async_atlas_client.client, 'request', request)
+
+        async def walk(**kwargs):
+            search = async_atlas_client.search_dsl(query='hive_table')
+            return [entity async for entity in search.iter_entities(page_size=2, **kwargs)]
+
+        entities = run(walk())
+        assert [e.guid for e in entities] == [e['guid'] for e in response['entities'] + response['entities'][:1]]
+        assert [c['offset'] for c in calls] == [0, 2]
+        del calls[:]
+        raw = run(walk(raw=True, prefetch=3))
+        assert [e['guid'] for e in raw] == [e.guid for e in entities]
+        assert len(calls) == 3
+
+    def test_search_to_columns(self, mocker, async_atlas_client):
+        response = load_response('search_attribute_get.json')
+        fake = FakeRequest(dict(response, attributes={}, fullTextResult=[]))
+        mocker.patch.object(async_atlas_client.client, 'request', fake)
+        columns = run(async_atlas_client.search_basic(typeName='hive_table').to_columns(attributes=['property1']))
+        assert columns['guid'].to_list() == [entity['guid'] for entity in response['entities']]
+        assert columns.to_dict()['attributes.property1'] == [{}, {}]
+
+    def test_typedefs_registry(self, mocker, async_atlas_client, tmpdir):
+        fake = FakeRequest(load_response('typedefs_get.json'))
+        mocker.patch.object(async_atlas_client.client, 'request', fake)
+        path = str(tmpdir.join('types.json'))
+        type_registry = run(async_atlas_client.typedefs.registry(path=path))
+        entity_def = load_response('typedefs_get.json')['entityDefs'][0]
+        assert type_registry.get(entity_def['name'])['name'] == entity_def['name']
+        assert len(fake.calls) == 1
+        # loaded from the file the second time
+        run(async_atlas_client.typedefs.registry(path=path))
+        assert len(fake.calls) == 1
+
+    def test_expand_params(self):
+        assert _expand_params(None) is None
+        assert _expand_params({'guid': ['a', 'b'], 'limit': 10}) == [('guid', 'a'), ('guid', 'b'),
+                                                                     ('limit', '10')]
+
+    def test_lineage_expand(self, mocker, async_atlas_client):
+        relations = [('n%s' % i, 'n%s' % (i + 1)) for i in range(6)]
+
+        async def lineage(method, url, params):
+            guid = url.rsplit('/', 1)[1]
+            found = [r for r in relations if r[1] == guid]
+            return {'baseEntityGuid': guid,
+                    'relations': [{'fromEntityId': f, 'toEntityId': t} for f, t in found]}
+
+        mocker.patch.object(async_atlas_client.client, 'request', lineage)
+        graph = run(async_atlas_client.lineage_guid.expand('n6', depth=1))
+        assert graph.upstream('n6') == set('n%s' % i for i in range(6))
+
+    def test_retries(self):
+        from atlasclient.retry import RetryPolicy
+        from atlasclient.testing import FakeAtlasServer
+
+        async def fetch(server):
+            async with AsyncAtlas(server.host, port=server.port, username='admin', password='admin',
+                                  retry_policy=RetryPolicy(backoff=0.01)) as client:
+                response = await client.get(server.url + '/api/atlas/admin/metrics')
+                return response, client.metrics.snapshot()
+
+        with FakeAtlasServer() as server:
+            server.fail_next(429, retry_after=0)
+            server.fail_next(504)
+            response, metrics = run(fetch(server))
+        assert response['general']['entityCount'] == 0
+        assert metrics['metrics']['GET']['retries'] == 2
+        assert metrics['metrics']['GET']['statuses'] == {'429': 1, '504': 1, '200': 1}
@@ -0,0 +1,17 @@
+import pytest
+
+from benchmarks import run
+
+
+@pytest.mark.parametrize('name', sorted(run.BENCHMARKS))
+def test_benchmark(name):
+    measures = run.measure(name, 20, repeat=1, trace=False)
+    assert measures['n'] == 20
+    assert measures['wall_s'] > 0
+
+
+def test_compare(capsys):
+    before = {'results': {'bulk_load[10]': {'wall_s': 1.0, 'peak_rss_kib': 100}}}
+    after = {'results': {'bulk_load[10]': {'wall_s': 1.5, 'peak_rss_kib': 80}}}
+    assert run.compare(before, after, threshold=0.1) == [('bulk_load[10]', 'wall_s', 1.5)]
+    assert 'better' in capsys.readouterr().out
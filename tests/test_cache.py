@@ -0,0 +1,104 @@
+from atlasclient.cache import EntityCache, SQLiteResponseCache
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def entity(guid, **attributes):
+    return {'guid': guid, 'typeName': 'hive_table', 'attributes': attributes}
+
+
+class TestEntityCache():
+    def test_get_put(self):
+        cache = EntityCache()
+        cache.put(entity('a', name='table_a'))
+        cache.put({'typeName': 'no_guid'})
+        assert len(cache) == 1
+        assert cache.get('a')['attributes']['name'] == 'table_a'
+        assert cache.get('b') is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_returns_copies(self):
+        cache = EntityCache()
+        cached = entity('a', name='table_a')
+        cache.put(cached)
+        cached['attributes']['name'] = 'changed'
+        first = cache.get('a')
+        first['attributes']['name'] = 'changed again'
+        assert cache.get('a')['attributes']['name'] == 'table_a'
+
+    def test_lru_eviction(self):
+        cache = EntityCache(max_entries=2)
+        cache.put_many([entity('a'), entity('b')])
+        cache.get('a')
+        cache.put(entity('c'))
+        assert 'a' in cache
+        assert 'b' not in cache
+        assert 'c' in cache
+
+    def test_max_bytes(self):
+        cache = EntityCache(max_entries=None, max_bytes=200)
+        for guid in 'abcdef':
+            cache.put(entity(guid, name='x' * 20))
+        assert cache.size <= 200
+        assert 'f' in cache
+        assert 'a' not in cache
+
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = EntityCache(ttl=60, clock=clock)
+        cache.put(entity('a'))
+        clock.now += 30
+        assert cache.get('a') is not None
+        clock.now += 31
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+    def test_invalidate(self):
+        cache = EntityCache()
+        cache.put_many([entity('a'), entity('b')])
+        cache.invalidate('a')
+        assert cache.get_many(['a', 'b']).keys() == {'b'}
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.size == 0
+
+
+class TestSQLiteResponseCache():
+    def test_persistence(self, tmpdir):
+        path = str(tmpdir.join('responses.db'))
+        cache = SQLiteResponseCache(path)
+        cache.put('key', 'http://atlas/types/typedefs', {'entityDefs': []}, 60)
+        cache.close()
+        cache = SQLiteResponseCache(path)
+        assert cache.get('key') == {'entityDefs': []}
+        assert cache.get('other') is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_expiration(self):
+        cache = SQLiteResponseCache()
+        cache.put('fresh', 'http://atlas/a', {}, 60)
+        cache.put('stale', 'http://atlas/b', {}, -1)
+        assert cache.get('stale') is None
+        assert len(cache) == 1
+        cache.put('stale', 'http://atlas/b', {}, -1)
+        cache.purge()
+        assert len(cache) == 1
+
+    def test_invalidate(self):
+        cache = SQLiteResponseCache()
+        for url in ('http://atlas/entity/guid/a', 'http://atlas/entity/guid/a/classifications',
+                    'http://atlas/entity/guid/ab', 'http://atlas/entity/guid/a_b'):
+            cache.put(url, url, {}, 60)
+        cache.invalidate('http://atlas/entity/guid/a')
+        assert cache.get('http://atlas/entity/guid/a') is None
+        assert cache.get('http://atlas/entity/guid/a/classifications') is None
+        assert cache.get('http://atlas/entity/guid/ab') == {}
+        assert cache.get('http://atlas/entity/guid/a_b') == {}
+        cache.clear()
+        assert len(cache) == 0
@@ -1,4 +1,28 @@
-from atlasclient.client import Atlas
+import json
+
+try:
+    from mock import MagicMock
+except ImportError:
+    from unittest.mock import MagicMock
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from atlasclient.cache import SQLiteResponseCache
+from atlasclient.client import Atlas, endpoint_path
+
+URL = 'http://localhost:21000/api/atlas/v2/types/typedefs'
+
+
+def fake_response(status_code=200, text='', headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.text = text
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.request.method = 'GET'
+    response.request.url = URL
+    response.json.side_effect = lambda: json.loads(text)
+    return response
 
 
 class TestClient():
@@ -12,3 +36,110 @@ class TestClient():
 
     def test_http_client(self):
         pass
+
+    def test_conditional_requests(self, mocker):
+        client = Atlas('localhost', port=21000, username='admin', password='admin',
+                       conditional_requests=True)
+        http = client.client
+        mocker.patch.object(http.session, 'get')
+        http.session.get.return_value = fake_response(
+            text='{"entityDefs": []}',
+            headers={'content-type': 'application/json', 'etag': '"v1"',
+                     'last-modified': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        assert http.get(URL) == {'entityDefs': []}
+        assert 'If-None-Match' not in http.session.get.call_args[1]['headers']
+
+        http.session.get.return_value = fake_response(status_code=304)
+        first = http.get(URL)
+        second = http.get(URL)
+        assert first == second == {'entityDefs': []}
+        # each 304 gets its own copy of the body
+        assert first is not second
+        headers = http.session.get.call_args[1]['headers']
+        assert headers['If-None-Match'] == '"v1"'
+        assert headers['If-Modified-Since'] == 'Wed, 21 Oct 2015 07:28:00 GMT'
+
+        # validators are kept per url and query parameters
+        http.session.get.return_value = fake_response(text='{}', headers={'content-type': 'application/json'})
+        http.get(URL, params={'type': 'entity'})
+        assert 'If-None-Match' not in http.session.get.call_args[1]['headers']
+
+    def test_conditional_requests_disabled(self, mocker):
+        client = Atlas('localhost', port=21000, username='admin', password='admin')
+        http = client.client
+        mocker.patch.object(http.session, 'get')
+        http.session.get.return_value = fake_response(
+            text='{}', headers={'content-type': 'application/json', 'etag': '"v1"'})
+        http.get(URL)
+        http.get(URL)
+        assert 'If-None-Match' not in http.session.get.call_args[1]['headers']
+
+    def test_endpoint_path(self):
+        assert endpoint_path(URL) == 'types/typedefs'
+        assert endpoint_path(URL + '/headers?type=entity') == 'types/typedefs/headers'
+        assert endpoint_path('http://h/api/atlas/v2/entity/bulk/classification') == 'entity/bulk/classification'
+        assert endpoint_path('http://h/api/atlas/v2/entity/guid/abc/classifications') == 'entity/guid'
+        assert endpoint_path('http://h/api/atlas/admin/metrics') == 'metrics'
+        assert endpoint_path('http://h/api/atlas/v2/unknown') is None
+        assert endpoint_path('http://h/other') is None
+
+    def test_response_cache(self, mocker):
+        client = Atlas('localhost', port=21000, username='admin', password='admin',
+                       response_cache=SQLiteResponseCache())
+        http = client.client
+        mocker.patch.object(http.session, 'get')
+        http.session.get.return_value = fake_response(
+            text='{"entityDefs": []}', headers={'content-type': 'application/json'})
+        assert http.get(URL) == {'entityDefs': []}
+        assert http.get(URL) == {'entityDefs': []}
+        assert http.session.get.call_count == 1
+        # keyed by query parameters too
+        http.get(URL, params={'type': 'entity'})
+        assert http.session.get.call_count == 2
+
+        # writes invalidate the cached responses of their url
+        mocker.patch.object(http.session, 'put')
+        http.session.put.return_value = fake_response(text='{}', headers={'content-type': 'application/json'})
+        http.put(URL, data={'entityDefs': []})
+        http.get(URL)
+        assert http.session.get.call_count == 3
+
+    def test_response_cache_ttls(self, mocker):
+        client = Atlas('localhost', port=21000, username='admin', password='admin',
+                       response_cache=SQLiteResponseCache(), response_cache_ttls={'typedefs': None})
+        http = client.client
+        assert http.cache_ttls['entity/guid'] == 300
+        mocker.patch.object(http.session, 'get')
+        http.session.get.return_value = fake_response(text='{}', headers={'content-type': 'application/json'})
+        http.get(URL)
+        http.get(URL)
+        # search results are never cached
+        http.get('http://localhost:21000/api/atlas/v2/search/basic')
+        http.get('http://localhost:21000/api/atlas/v2/search/basic')
+        assert http.session.get.call_count == 4
+
+    def test_metrics(self, mocker):
+        client = Atlas('localhost', port=21000, username='admin', password='admin')
+        http = client.client
+        mocker.patch.object(http.session, 'get')
+        response = fake_response(text='{"entityDefs": []}', headers={'content-type': 'application/json'})
+        response.content = b'{"entityDefs": []}'
+        http.session.get.return_value = response
+        http.get(URL)
+        http.get(URL)
+        metrics = client.metrics.snapshot()['types/typedefs']['GET']
+        assert metrics['count'] == 2
+        assert metrics['statuses'] == {'200': 2}
+        assert metrics['response_bytes'] == 36
+
+        mocker.patch.object(http.session, 'post')
+        http.session.post.side_effect = ConnectionError()
+        with pytest.raises(ConnectionError):
+            http.post('http://localhost:21000/api/atlas/v2/entity/bulk', data={'entities': []})
+        metrics = client.metrics.snapshot()['entity/bulk']['POST']
+        assert metrics['statuses'] == {'error': 1}
+        assert metrics['request_bytes'] == len('{"entities": []}')
+
+    def test_metrics_disabled(self):
+        client = Atlas('localhost', port=21000, username='admin', password='admin', metrics=None)
+        assert client.metrics is None
@@ -0,0 +1,63 @@
+import pytest
+
+from atlasclient import exceptions
+from atlasclient.columnar import Columns
+
+
+ENTITIES = [{'guid': 'a', 'typeName': 'hive_table', 'status': 'ACTIVE', 'createTime': 1546300800000,
+             'version': 2, 'attributes': {'name': 'table_a', 'numRows': 10}},
+            {'guid': 'b', 'typeName': 'hive_column', 'status': 'ACTIVE',
+             'attributes': {'name': 'column_b'}},
+            {'guid': 'c', 'typeName': 'hive_table', 'status': 'DELETED', 'createTime': 1546300900000,
+             'version': 1, 'attributes': {'name': 'table_c', 'numRows': 3}}]
+
+
+class TestColumns():
+    def test_typed_columns(self):
+        columns = Columns(attributes={'name': 'str', 'numRows': 'int64'}).extend(ENTITIES)
+        assert len(columns) == 3
+        assert columns['createTime'].values.typecode in ('q', 'l')
+        assert list(columns['createTime'].values) == [1546300800000, 0, 1546300900000]
+        assert columns['createTime'].to_list() == [1546300800000, None, 1546300900000]
+        assert columns['typeName'].categories == ['hive_table', 'hive_column']
+        assert list(columns['typeName'].codes) == [0, 1, 0]
+        assert columns['updatedBy'].to_list() == [None, None, None]
+        assert columns.to_dict()['attributes.name'] == ['table_a', 'column_b', 'table_c']
+        assert columns.to_dict()['attributes.numRows'] == [10, None, 3]
+        assert list(columns)[:3] == ['guid', 'typeName', 'status']
+
+    def test_attribute_names(self):
+        columns = Columns(columns=[('guid', 'str')], attributes=['name']).extend(ENTITIES)
+        assert list(columns) == ['guid', 'attributes.name']
+        assert columns.to_dict()['attributes.name'] == ['table_a', 'column_b', 'table_c']
+
+    def test_unknown_type(self):
+        with pytest.raises(exceptions.ClientError):
+            Columns(columns=[('guid', 'uuid')])
+
+    def test_numeric_conversion(self):
+        columns = Columns(columns=[('version', 'int64'), ('score', 'float64')])
+        columns.append({'version': 3.0, 'score': '0.5'})
+        columns.append({'version': '12', 'score': 2})
+        columns.append({'version': '7.0'})
+        assert columns.to_dict() == {'version': [3, 12, 7], 'score': [0.5, 2.0, None]}
+        for version in (2.5, 'two', [1]):
+            with pytest.raises(exceptions.ClientError) as error:
+                columns.append({'version': version})
+            assert 'version' in str(error.value)
+        assert len(columns) == 3
+
+    def test_rows(self):
+        columns = Columns(columns=[('name', 'str'), ('numRows', 'int64')])
+        columns.append_row(['table_a', 10])
+        columns.append_row(['table_b'])
+        assert columns.to_dict() == {'name': ['table_a', 'table_b'], 'numRows': [10, None]}
+
+    def test_to_numpy(self):
+        numpy = pytest.importorskip('numpy')
+        arrays = Columns().extend(ENTITIES).to_numpy()
+        assert arrays['version'].dtype == numpy.int64
+        assert arrays['version'].mask.tolist() == [False, True, False]
+        codes, categories = arrays['status']
+        assert codes.tolist() == [0, 0, 1]
+        assert categories.tolist() == ['ACTIVE', 'DELETED']
@@ -0,0 +1,170 @@
+import threading
+import time
+
+import pytest
+
+from atlasclient import concurrency, exceptions
+
+
+class TestPrefetch():
+    def test_prefetch_keeps_order(self):
+        def slow_square(x):
+            time.sleep(0.01 * (5 - x))
+            return x * x
+
+        assert list(concurrency.prefetch(slow_square, range(5), 3)) == [0, 1, 4, 9, 16]
+
+    def test_prefetch_depth(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'max': 0}
+
+        def track(x):
+            with lock:
+                state['running'] += 1
+                state['max'] = max(state['max'], state['running'])
+            time.sleep(0.01)
+            with lock:
+                state['running'] -= 1
+            return x
+
+        assert list(concurrency.prefetch(track, range(10), 2)) == list(range(10))
+        assert state['max'] <= 2
+
+    def test_prefetch_stops_early(self):
+        calls = []
+
+        def record(x):
+            calls.append(x)
+            return x
+
+        results = concurrency.prefetch(record, iter(range(1000)), 4)
+        assert next(results) == 0
+        results.close()
+        assert len(calls) <= 6
+
+    def test_prefetch_raises_in_order(self):
+        def fail_on_two(x):
+            if x == 2:
+                raise ValueError(x)
+            return x
+
+        results = concurrency.prefetch(fail_on_two, range(5), 3)
+        assert next(results) == 0
+        assert next(results) == 1
+        with pytest.raises(ValueError):
+            next(results)
+
+    def test_prefetch_return_exceptions(self):
+        def fail_on_two(x):
+            if x == 2:
+                raise ValueError(x)
+            return x
+
+        results = list(concurrency.prefetch(fail_on_two, range(4), 3, return_exceptions=True))
+        assert results[:2] == [0, 1] and results[3] == 3
+        assert isinstance(results[2], ValueError)
+
+
+class TestAdaptiveConcurrency():
+    def test_additive_increase(self):
+        controller = concurrency.AdaptiveConcurrency(initial=2, max_limit=4)
+        for _ in range(4):
+            controller.record(0.1)
+        assert controller.limit == 3
+        for _ in range(100):
+            controller.record(0.1)
+        assert controller.limit == 4
+
+    def test_latency_rise_holds(self):
+        controller = concurrency.AdaptiveConcurrency(initial=2, latency_tolerance=2)
+        controller.record(0.1)
+        for _ in range(10):
+            controller.record(0.5)
+        assert controller.limit == 2
+
+    def test_multiplicative_decrease(self):
+        controller = concurrency.AdaptiveConcurrency(initial=16, min_limit=2)
+        controller.overload()
+        assert controller.limit == 8
+        # calls started before the decrease do not cut the limit again
+        controller.overload(started=0)
+        assert controller.limit == 8
+        for _ in range(3):
+            controller.overload(started=float('inf'))
+        assert controller.limit == 2
+
+    def test_client_side_timeouts_ignored(self):
+        controller = concurrency.AdaptiveConcurrency(initial=8)
+
+        def wait_for_limits():
+            raise exceptions.Timeout(1, "Concurrency limit of search exceeded")
+
+        with pytest.raises(exceptions.Timeout):
+            controller.wrap(wait_for_limits)()
+        assert controller.limit == 8
+
+    def test_wrap(self):
+        controller = concurrency.AdaptiveConcurrency(initial=8)
+
+        def throttled(x):
+            raise exceptions.RateLimitExceeded()
+
+        with pytest.raises(exceptions.RateLimitExceeded):
+            controller.wrap(throttled)(1)
+        assert controller.limit == 4
+        with pytest.raises(ValueError):
+            controller.wrap(int)('x')
+        assert controller.limit == 4
+        assert controller.wrap(int)('3') == 3
+        assert controller.baseline is not None
+
+    def test_prefetch_follows_limit(self):
+        controller = concurrency.AdaptiveConcurrency(initial=3, max_limit=3)
+        lock = threading.Lock()
+        state = {'running': 0, 'max': 0}
+
+        def track(x):
+            with lock:
+                state['running'] += 1
+                state['max'] = max(state['max'], state['running'])
+            time.sleep(0.01)
+            with lock:
+                state['running'] -= 1
+            if x == 5:
+                raise exceptions.ServerUnavailable()
+            return x
+
+        results = concurrency.prefetch(track, range(20), 10, controller)
+        assert [next(results) for _ in range(5)] == list(range(5))
+        with pytest.raises(exceptions.ServerUnavailable):
+            next(results)
+        assert state['max'] <= 3
+        assert controller.limit < 3
+
+
+class TestClientAdaptiveConcurrency():
+    def test_bulk_fetch_backs_off(self):
+        from atlasclient.retry import RetryPolicy
+        from atlasclient.testing import FakeAtlasServer
+
+        with FakeAtlasServer() as server:
+            server.store.add_entities([{'typeName': 't', 'attributes': {'name': str(i)}} for i in range(200)])
+            client = server.client(bulk_chunk_size=50, max_workers=8, adaptive_concurrency=True,
+                                   retry_policy=RetryPolicy(backoff=0.01))
+            assert client.concurrency_controller.limit == 8
+            server.fail_next(429, count=3, retry_after=0)
+            bulk = next(iter(client.entity_bulk(guid=list(server.store.entities))))
+            assert len(bulk.entities) == 200
+            assert client.concurrency_controller.limit < 8
+
+    def test_failed_batches_back_off(self):
+        from atlasclient.testing import FakeAtlasServer
+
+        with FakeAtlasServer() as server:
+            client = server.client(max_workers=8, adaptive_concurrency=True, retry_policy=None)
+            server.fail_next(504, count=20)
+            response = client.entity_bulk.create_batched(
+                ({'typeName': 't', 'attributes': {'name': str(i)}} for i in range(20)), batch_size=1)
+            assert len(response['failedBatches']) == 20
+            assert [failed['batch'] for failed in response['failedBatches']] == list(range(20))
+            assert client.concurrency_controller.limit < 8
@@ -0,0 +1,154 @@
+import threading
+
+import pytest
+
+from atlasclient import events
+
+
+class Parent(object):
+    @events.evented
+    def load(self, fail=False):
+        """Load the object."""
+        if fail:
+            raise ValueError(fail)
+        return 'loaded'
+
+
+class Child(Parent):
+    pass
+
+
+class Other(object):
+    @events.evented
+    def load(self):
+        return 'loaded'
+
+
+@pytest.fixture
+def handlers():
+    saved = dict(events.EVENT_HANDLERS)
+    events.EVENT_HANDLERS.clear()
+    events.invalidate()
+    yield events.EVENT_HANDLERS
+    events.EVENT_HANDLERS.clear()
+    events.EVENT_HANDLERS.update(saved)
+    events.invalidate()
+
+
+class TestEvents():
+    def test_evented_wraps(self):
+        assert Parent.load.__name__ == 'load'
+        assert Parent.load.__doc__ == 'Load the object.'
+
+    def test_publish(self, handlers):
+        fired = []
+        events.subscribe(Parent, 'load', lambda obj: fired.append(('any', obj)))
+        child = Child()
+        assert child.load() == 'loaded'
+        assert fired == [('any', child)] * 2
+
+        # a more specific subscription takes over, even once the dispatch is cached
+        events.subscribe(Child, 'load', lambda obj: fired.append(('finished', obj)), events.states.FINISHED)
+        del fired[:]
+        child.load()
+        assert fired == [('any', child), ('finished', child)]
+
+        del fired[:]
+        with pytest.raises(ValueError):
+            child.load(fail=True)
+        assert fired == [('any', child), ('any', child), ('finished', child)]
+
+    def test_unlistened_class(self, handlers):
+        fired = []
+        events.subscribe(Parent, 'load', fired.append)
+        assert events.is_listened(Child)
+        assert not events.is_listened(Other)
+        assert Other().load() == 'loaded'
+        assert fired == []
+        # the lookup is cached per class until the next subscription
+        assert events._LISTENED == {Child: True, Other: False}
+        events.subscribe(Other, 'load', fired.append)
+        assert events._LISTENED == {}
+        assert events.is_listened(Other)
+
+    def test_no_handlers(self, handlers):
+        assert not events.is_listened(Parent)
+        events.publish(Parent(), 'load', events.states.STARTED)
+        assert events._DISPATCH == {}
+
+
+class TestBackgroundDelivery():
+    def test_deliver_in_background(self, handlers):
+        fired = []
+        events.subscribe(Parent, 'load', lambda obj: fired.append(threading.current_thread()))
+        delivery = events.deliver_in_background()
+        try:
+            Child().load()
+            assert delivery.flush(timeout=5)
+            assert fired == [delivery._thread] * 2
+        finally:
+            events.deliver_synchronously()
+        assert delivery.closed
+        assert not delivery._thread.is_alive()
+        del fired[:]
+        Child().load()
+        assert fired == [threading.current_thread()] * 2
+
+    def test_drop_policy(self, handlers):
+        started, release = threading.Event(), threading.Event()
+        fired = []
+
+        def slow(obj):
+            started.set()
+            release.wait(5)
+            fired.append(obj)
+
+        events.subscribe(Parent, 'load', slow)
+        delivery = events.deliver_in_background(max_queue=1, policy='drop')
+        objs = [Parent() for i in range(5)]
+        try:
+            events.publish(objs[0], 'load', events.states.STARTED)
+            assert started.wait(5)
+            for obj in objs[1:]:
+                events.publish(obj, 'load', events.states.STARTED)
+            # one event is being delivered, one is queued, the others are dropped
+            assert delivery.dropped == 3
+            release.set()
+        finally:
+            events.deliver_synchronously()
+        assert fired == objs[:2]
+
+    def test_failing_callback(self, handlers):
+        fired = []
+        events.subscribe(Parent, 'load', lambda obj: 1 / 0, events.states.STARTED)
+        events.subscribe(Parent, 'load', fired.append)
+        delivery = events.deliver_in_background()
+        try:
+            Parent().load()
+            assert delivery.flush(timeout=5)
+            assert len(fired) == 1
+        finally:
+            events.deliver_synchronously()
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            events.BackgroundDelivery(policy='spill')
+
+    def test_shutdown(self):
+        delivered = []
+        delivery = events.BackgroundDelivery()
+        assert delivery in events._RUNNING
+
+        def publish_many():
+            for i in range(200):
+                delivery.put([lambda obj: delivered.append(obj)], i, {})
+
+        publishers = [threading.Thread(target=publish_many) for _ in range(4)]
+        for publisher in publishers:
+            publisher.start()
+        delivery.shutdown(timeout=5)
+        for publisher in publishers:
+            publisher.join()
+        # the events published during and after shutdown are delivered as well
+        assert len(delivered) == 800
+        assert delivery not in events._RUNNING
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from atlasclient import exceptions
+from atlasclient.client import Atlas
+from atlasclient.limits import ConcurrencyLimit, EndpointLimiter, TokenBucket
+from atlasclient.testing import FakeAtlasServer
+
+
+class TestTokenBucket():
+    def test_reserve(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        # the next tokens are booked in order
+        assert 0.09 < bucket.reserve() <= 0.1
+        assert 0.19 < bucket.reserve() <= 0.2
+
+    def test_acquire_timeout(self):
+        bucket = TokenBucket(rate=1)
+        assert bucket.acquire(timeout=0)
+        assert not bucket.acquire(timeout=0.1)
+        # the token booked by the timed out acquire was given back
+        assert 0.8 < bucket.reserve() <= 1
+
+    def test_rate(self):
+        bucket = TokenBucket(rate=100, burst=1)
+        start = time.time()
+        for _ in range(11):
+            bucket.acquire()
+        assert time.time() - start >= 0.09
+
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestConcurrencyLimit():
+    def test_acquire(self):
+        limit = ConcurrencyLimit(2)
+        assert limit.acquire() and limit.acquire()
+        assert not limit.acquire(timeout=0.01)
+        threading.Timer(0.02, limit.release).start()
+        assert limit.acquire(timeout=5)
+        assert limit.in_flight == 2
+
+
+class TestEndpointLimiter():
+    def test_match(self):
+        limiter = EndpointLimiter(rates={'search/basic': 5, 'search': (20, 40), '*': 100},
+                                  concurrency={'entity/bulk': 2})
+        assert limiter.bucket('search/basic').rate == 5
+        assert limiter.bucket('search/dsl').burst == 40
+        assert limiter.bucket('search/dsl') is limiter.bucket('search/fulltext')
+        assert limiter.bucket('entity/guid').rate == 100
+        assert limiter.bucket(None).rate == 100
+        assert limiter.concurrency_limit('entity/bulk').limit == 2
+        assert limiter.concurrency_limit('entity/guid') is None
+
+    def test_concurrency(self):
+        limiter = EndpointLimiter(concurrency={'entity': 2})
+        peak = []
+        lock = threading.Lock()
+        in_flight = [0]
+
+        def request():
+            with limiter.limit('entity/guid'):
+                with lock:
+                    in_flight[0] += 1
+                    peak.append(in_flight[0])
+                time.sleep(0.01)
+                with lock:
+                    in_flight[0] -= 1
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert max(peak) == 2
+        assert limiter.concurrency_limit('entity/guid').in_flight == 0
+
+    def test_timeout(self):
+        limiter = EndpointLimiter(concurrency={'*': 1}, timeout=0.01)
+        with limiter.limit('search/basic'):
+            with pytest.raises(exceptions.Timeout):
+                with limiter.limit('entity/guid'):
+                    pass
+
+    def test_timeout_returns_rate_token(self):
+        limiter = EndpointLimiter(rates={'*': (1, 2)}, concurrency={'*': 1}, timeout=0.01)
+        with limiter.limit('search/basic'):
+            for _ in range(3):
+                with pytest.raises(exceptions.Timeout):
+                    with limiter.limit('entity/guid'):
+                        pass
+        # the timed out requests did not use up the burst
+        assert limiter.bucket('entity/guid').reserve() == 0
+
+
+class TestClientLimits():
+    def test_atlas_limits(self):
+        client = Atlas('localhost', port=21000, rate_limits={'search_basic': 5, 'entity': 50},
+                       concurrency_limits={'*': 4})
+        limiter = client.client.limiter
+        assert limiter.bucket('search/basic').rate == 5
+        assert limiter.bucket('entity/bulk').rate == 50
+        assert limiter.concurrency_limit('lineage').limit == 4
+        assert Atlas('localhost', port=21000).client.limiter is None
+
+    def test_rate_limited_requests(self):
+        with FakeAtlasServer() as server:
+            client = server.client(rate_limits={'metrics': (50, 1)})
+            start = time.time()
+            for _ in range(6):
+                client.raw.admin_metrics()
+            assert time.time() - start >= 0.09
@@ -0,0 +1,49 @@
+from atlasclient.lineage import LineageGraph
+
+
+def lineage_response(base_guid, *relations):
+    guids = set([base_guid])
+    for from_guid, to_guid in relations:
+        guids.update([from_guid, to_guid])
+    return {'baseEntityGuid': base_guid,
+            'guidEntityMap': dict((guid, {'guid': guid, 'typeName': 'hive_table'}) for guid in guids),
+            'relations': [{'fromEntityId': f, 'toEntityId': t} for f, t in relations],
+            'lineageDirection': 'BOTH',
+            'lineageDepth': 3}
+
+
+# a -> p1 -> b -> p2 -> c, and a -> p3 -> c
+RELATIONS = [('a', 'p1'), ('p1', 'b'), ('b', 'p2'), ('p2', 'c'), ('a', 'p3'), ('p3', 'c')]
+
+
+class TestLineageGraph():
+    def test_build(self):
+        graph = LineageGraph([lineage_response('b', *RELATIONS[:4]),
+                              lineage_response('c', *RELATIONS[2:])])
+        assert len(graph) == 6
+        assert 'p3' in graph
+        assert graph.relations == set(RELATIONS)
+        assert graph.successors('a') == ['p1', 'p3']
+        assert graph.predecessors('c') == ['p2', 'p3']
+        assert graph.entities['a']['typeName'] == 'hive_table'
+
+    def test_closures(self):
+        graph = LineageGraph([lineage_response('a', *RELATIONS)])
+        assert graph.downstream('a') == set(['p1', 'b', 'p2', 'c', 'p3'])
+        assert graph.downstream('a', max_depth=2) == set(['p1', 'b', 'p3', 'c'])
+        assert graph.upstream('b') == set(['a', 'p1'])
+        assert graph.upstream('unknown') == set()
+        assert graph.within('b', 1) == {'b': 0, 'p1': 1, 'p2': 1}
+
+    def test_traversals(self):
+        graph = LineageGraph([lineage_response('a', *RELATIONS)])
+        assert [guid for guid, _ in graph.bfs('a')] == ['a', 'p1', 'p3', 'b', 'c', 'p2']
+        assert list(graph.dfs('a')) == [('a', 0), ('p1', 1), ('b', 2), ('p2', 3), ('c', 4), ('p3', 1)]
+        assert [guid for guid, _ in graph.dfs('a', max_depth=1)] == ['a', 'p1', 'p3']
+
+    def test_shortest_path(self):
+        graph = LineageGraph([lineage_response('a', *RELATIONS)])
+        assert graph.shortest_path('a', 'c') == ['a', 'p3', 'c']
+        assert graph.shortest_path('c', 'a') is None
+        assert graph.shortest_path('c', 'a', direction='upstream') == ['c', 'p3', 'a']
+        assert graph.shortest_path('b', 'p3', direction='both') == ['b', 'p2', 'c', 'p3']
@@ -0,0 +1,70 @@
+import threading
+
+from atlasclient.metrics import Histogram, RequestMetrics, body_size
+
+
+class TestHistogram():
+    def test_observe(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        assert histogram.counts == [2, 1, 1]
+        assert histogram.cumulative() == [(0.1, 2), (1.0, 3), ('+Inf', 4)]
+        assert histogram.sum == 2.65
+        assert histogram.quantile(0.5) == 0.1
+        assert histogram.quantile(0.75) == 1.0
+        assert histogram.quantile(1) == 1.0
+        assert Histogram().quantile(0.5) is None
+
+
+class TestRequestMetrics():
+    def test_snapshot(self):
+        metrics = RequestMetrics(buckets=(0.1, 1.0))
+        metrics.record('entity/guid', 'get', 200, 0.05, 0, 100)
+        metrics.record('entity/guid', 'get', 404, 0.5, 0, 20)
+        metrics.record('entity/bulk', 'post', None, 2.0, 50)
+        metrics.record(None, 'get', 200, 0.01)
+        metrics.record_retry('entity/bulk', 'post', 2)
+        snapshot = metrics.snapshot()
+        assert sorted(snapshot) == ['entity/bulk', 'entity/guid', 'other']
+        guid = snapshot['entity/guid']['GET']
+        assert guid['count'] == 2
+        assert guid['statuses'] == {'200': 1, '404': 1}
+        assert guid['response_bytes'] == 120
+        assert guid['latency']['buckets'] == [(0.1, 1), (1.0, 2), ('+Inf', 2)]
+        bulk = snapshot['entity/bulk']['POST']
+        assert bulk['statuses'] == {'error': 1}
+        assert bulk['request_bytes'] == 50
+        assert bulk['retries'] == 2
+        metrics.reset()
+        assert metrics.snapshot() == {}
+
+    def test_threads(self):
+        metrics = RequestMetrics()
+
+        def record():
+            for i in range(1000):
+                metrics.record('search/basic', 'get', 200, 0.01)
+
+        threads = [threading.Thread(target=record) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert metrics.snapshot()['search/basic']['GET']['count'] == 4000
+
+    def test_to_prometheus(self):
+        metrics = RequestMetrics(buckets=(0.1, 1.0))
+        metrics.record('entity/guid', 'get', 200, 0.05, 0, 100)
+        text = metrics.to_prometheus()
+        assert '# TYPE atlasclient_requests_total counter\n' in text
+        assert 'atlasclient_requests_total{endpoint="entity/guid",method="GET",status="200"} 1\n' in text
+        assert 'atlasclient_request_duration_seconds_bucket{endpoint="entity/guid",method="GET",le="0.1"} 1\n' in text
+        assert 'atlasclient_request_duration_seconds_bucket{endpoint="entity/guid",method="GET",le="+Inf"} 1\n' in text
+        assert 'atlasclient_request_duration_seconds_count{endpoint="entity/guid",method="GET"} 1\n' in text
+        assert 'atlasclient_response_bytes_total{endpoint="entity/guid",method="GET"} 100\n' in text
+
+    def test_body_size(self):
+        assert body_size(u'été') == 5
+        assert body_size(b'abc') == 3
+        assert body_size(None) == 0
@@ -3,8 +3,9 @@ from pkg_resources import resource_filename
 import json
 import pytest
 
-from atlasclient import client
+from atlasclient import base, client, models
 from atlasclient import exceptions
+from atlasclient.cache import EntityCache
 GUID = '8bbea92b-d98c-4613-ae6e-1a9d0b4f344b'
 RESPONSE_JSON_DIR = 'response_json'
 QUERY_JSON_DIR = 'query_json'
@@ -145,6 +146,27 @@ class TestEntityREST():
             for entity in bulk.entities:
                 assert entity.version == 12345
 
+    def test_entity_bulk_get_chunked(self, mocker, entity_bulk_response):
+        atlas_client = client.Atlas('localhost', port=21000, username='admin', password='admin',
+                                    bulk_chunk_size=2, max_workers=2)
+        guids = ['guid-{}'.format(i) for i in range(5)]
+
+        def get(url, params):
+            entities = [dict(entity_bulk_response['entities'][0], guid=guid) for guid in params['guid']]
+            referred = dict((guid + '-ref', {'guid': guid + '-ref'}) for guid in params['guid'])
+            return {'entities': entities, 'referredEntities': referred}
+
+        mocker.patch.object(atlas_client.client, 'get', side_effect=get)
+        bulk_collection = atlas_client.entity_bulk(guid=guids, ignoreRelationships=True)
+        bulks = list(bulk_collection)
+        assert len(bulks) == 1
+        assert [entity.guid for entity in bulks[0].entities] == guids
+        assert len(bulks[0].referredEntities) == 5
+        calls = atlas_client.client.get.call_args_list
+        assert sorted(c[1]['params']['guid'] for c in calls) == [guids[0:2], guids[2:4], guids[4:]]
+        for c in calls:
+            assert c[1]['params']['ignoreRelationships'] == 'true'
+
     def test_entity_bulk_get_with_relationships(self, mocker, atlas_client, entity_bulk_response):
         mocker.patch.object(atlas_client.client, 'get')
         atlas_client.entity_bulk.client.get.return_value =  entity_bulk_response
@@ -155,6 +177,61 @@ class TestEntityREST():
             for entity in bulk.entities_with_relationships():
                 assert entity.version == 12345
 
+    def test_entity_bulk_relationships_by_level(self, mocker):
+        def entity(guid, **relationship_attributes):
+            return {'guid': guid, 'typeName': 'hive_table', 'version': 1,
+                    'relationshipAttributes': relationship_attributes}
+        store = {'e1': entity('e1', db={'guid': 'd1'},
+                              columns=[{'guid': 'c1'}, {'guid': 'c2'}, {'guid': 'c3'}]),
+                 'c1': entity('c1', table={'guid': 'e1'}),
+                 'c2': entity('c2', table={'guid': 'e1'}),
+                 'c3': entity('c3', table={'guid': 'e1'}),
+                 'd1': entity('d1', cluster={'guid': 'k1'}),
+                 'k1': entity('k1')}
+
+        def bulk_get(url, params):
+            referred = {'c1': store['c1']} if params['guid'] == ['e1'] else {}
+            return {'entities': [json.loads(json.dumps(store[guid])) for guid in params['guid']],
+                    'referredEntities': referred}
+
+        atlas = client.Atlas('localhost', port=21000, bulk_chunk_size=2)
+        mocker.patch.object(atlas.client, 'get')
+        atlas.client.get.side_effect = bulk_get
+        bulk = next(iter(atlas.entity_bulk(guid=['e1'])))
+        entities = bulk.entities_with_relationships(max_depth=2)
+        relationships = next(iter(entities)).relationshipAttributes
+        assert [column['guid'] for column in relationships['columns']] == ['c1', 'c2', 'c3']
+        assert relationships['db']['relationshipAttributes']['cluster']['guid'] == 'k1'
+        assert relationships['db']['relationshipAttributes']['cluster']['version'] == 1
+        # the columns refer back to e1, resolved but not expanded again
+        assert relationships['columns'][1]['relationshipAttributes']['table']['guid'] == 'e1'
+        assert relationships['columns'][1]['relationshipAttributes']['table']['version'] == 1
+        assert relationships['columns'][1]['relationshipAttributes']['table']['relationshipAttributes']['db'] == {
+            'guid': 'd1'}
+        # a first round for c2, c3 and d1 in 2 chunks, a second one for e1 and k1
+        requested = [c[1]['params']['guid'] for c in atlas.client.get.call_args_list[1:]]
+        assert sorted(requested) == [['c2', 'c3'], ['d1'], ['e1', 'k1']]
+        # the referredEntities index is not modified by the deeper levels
+        assert 'relationshipAttributes' not in bulk.referredEntities['d1']['relationshipAttributes']['cluster']
+
+    def test_entity_bulk_relationships_between_entities(self, mocker):
+        store = {'e1': {'guid': 'e1', 'version': 1, 'relationshipAttributes': {'peer': {'guid': 'e2'}}},
+                 'e2': {'guid': 'e2', 'version': 2, 'relationshipAttributes': {'peer': {'guid': 'e1'}}}}
+
+        def bulk_get(url, params):
+            return {'entities': [json.loads(json.dumps(store[guid])) for guid in params['guid']],
+                    'referredEntities': {}}
+
+        atlas = client.Atlas('localhost', port=21000)
+        mocker.patch.object(atlas.client, 'get')
+        atlas.client.get.side_effect = bulk_get
+        bulk = next(iter(atlas.entity_bulk(guid=['e1', 'e2'])))
+        e1, e2 = bulk.entities_with_relationships()
+        assert e1.relationshipAttributes['peer'] == store['e2']
+        assert e2.relationshipAttributes['peer'] == store['e1']
+        assert atlas.client.get.call_args_list[1][1]['params']['guid'] == ['e1', 'e2']
+        json.dumps(bulk._data)
+
     def test_entity_bulk_delete(self, mocker, atlas_client, entity_bulk_response):
         mocker.patch.object(atlas_client.client, 'get')
         atlas_client.entity_bulk.client.get.return_value =  entity_bulk_response 
@@ -177,6 +254,112 @@ class TestEntityREST():
             bulk.create()
             atlas_client.entity_bulk.client.post.assert_called_with(bulk_collection.url, data=bulk._data)
     
+    def test_entity_bulk_create_batched(self, mocker, atlas_client):
+        def post(url, data):
+            names = [e['attributes']['name'] for e in data['entities']]
+            if 'column-3' in names:
+                raise exceptions.ServerError(details='boom')
+            return {'guidAssignments': dict(('-{}'.format(n), n) for n in names),
+                    'mutatedEntities': {'CREATE': [{'guid': n} for n in names]}}
+
+        mocker.patch.object(atlas_client.client, 'post', side_effect=post)
+        entities = ({'typeName': 'hive_column', 'attributes': {'name': 'column-{}'.format(i)}}
+                    for i in range(7))
+        result = atlas_client.entity_bulk.create_batched(entities, batch_size=2, max_workers=3)
+        assert atlas_client.client.post.call_count == 4
+        assert len(result['guidAssignments']) == 5
+        assert len(result['mutatedEntities']['CREATE']) == 5
+        assert len(result['failedBatches']) == 1
+        failed = result['failedBatches'][0]
+        assert failed['batch'] == 1
+        assert [e['attributes']['name'] for e in failed['entities']] == ['column-2', 'column-3']
+        assert isinstance(failed['error'], exceptions.ServerError)
+
+    def test_entity_batches_by_bytes(self):
+        from atlasclient.models import entity_batches
+        entities = [{'name': 'x' * 40}, {'name': 'y' * 40}, {'name': 'z' * 200}, {'name': 'w'}]
+        batches = list(entity_batches(entities, batch_size=10, batch_bytes=120))
+        assert [len(batch) for batch in batches] == [2, 1, 1]
+
+    def test_entity_cache(self, mocker, entity_guid_response):
+        atlas_client = client.Atlas('localhost', port=21000, username='admin', password='admin',
+                                    entity_cache=EntityCache())
+        referred = dict(entity_guid_response['entity'], guid='referred-guid')
+        bulk_response = {'entities': [dict(entity_guid_response['entity'], guid='guid-1'),
+                                      dict(entity_guid_response['entity'], guid='guid-2')],
+                         'referredEntities': {'referred-guid': referred}}
+        mocker.patch.object(atlas_client.client, 'get', return_value=bulk_response)
+        mocker.patch.object(atlas_client.client, 'request')
+        list(atlas_client.entity_bulk(guid=['guid-1', 'guid-2']))
+        assert len(atlas_client.entity_cache) == 3
+
+        # entity_guid is served from the cache
+        entity = atlas_client.entity_guid('guid-1')
+        assert entity.entity['guid'] == 'guid-1'
+        assert not atlas_client.client.request.called
+
+        # only the missing GUIDs are requested
+        atlas_client.client.get.return_value = {'entities': [dict(referred, guid='guid-3')],
+                                                'referredEntities': {}}
+        bulks = list(atlas_client.entity_bulk(guid=['guid-1', 'guid-2', 'guid-3']))
+        assert atlas_client.client.get.call_args[1]['params']['guid'] == ['guid-3']
+        assert sorted(e.guid for e in bulks[0].entities) == ['guid-1', 'guid-2', 'guid-3']
+
+        # fully cached lookups don't hit the server
+        atlas_client.client.get.reset_mock()
+        list(atlas_client.entity_bulk(guid=['guid-1', 'guid-3']))
+        assert not atlas_client.client.get.called
+
+        mocker.patch.object(atlas_client.client, 'delete')
+        atlas_client.entity_bulk.delete(guid=['guid-1'])
+        assert 'guid-1' not in atlas_client.entity_cache
+
+    def test_entity_cache_full_lookups_only(self, mocker):
+        atlas_client = client.Atlas('localhost', port=21000, username='admin', password='admin',
+                                    entity_cache=EntityCache())
+        table = {'guid': 'guid-1', 'typeName': 'hive_table', 'attributes': {'db': {'guid': 'db-1'}}}
+        stripped = {'guid': 'guid-1', 'typeName': 'hive_table', 'attributes': {}}
+        mocker.patch.object(atlas_client.client, 'get',
+                            return_value={'entities': [stripped], 'referredEntities': {}})
+        list(atlas_client.entity_bulk(guid=['guid-1'], ignoreRelationships=True))
+        assert len(atlas_client.entity_cache) == 0
+
+        # stripped lookups are not served from the cache
+        atlas_client.entity_cache.put(table)
+        list(atlas_client.entity_bulk(guid=['guid-1'], minExtInfo=True))
+        assert atlas_client.client.get.call_args[1]['params']['guid'] == ['guid-1']
+        mocker.patch.object(atlas_client.client, 'request', return_value={'entity': stripped})
+        atlas_client.entity_guid('guid-1?ignoreRelationships=true').inflate()
+        assert atlas_client.client.request.call_count == 1
+        assert atlas_client.entity_cache.get('guid-1') == table
+
+        # nor are the entities whose referred entities are not cached
+        atlas_client.client.request.return_value = {'entity': table, 'referredEntities': {}}
+        atlas_client.entity_guid('guid-1').inflate()
+        assert atlas_client.client.request.call_count == 2
+        atlas_client.client.get.reset_mock()
+        atlas_client.client.get.return_value = {'entities': [table], 'referredEntities': {}}
+        list(atlas_client.entity_bulk(guid=['guid-1']))
+        assert atlas_client.client.get.called
+
+        db = {'guid': 'db-1', 'typeName': 'hive_db', 'attributes': {}}
+        atlas_client.entity_cache.put(db)
+        entity = atlas_client.entity_guid('guid-1').inflate()
+        assert atlas_client.client.request.call_count == 2
+        assert entity.referredEntities == {'db-1': db}
+
+    def test_classifications_invalidate_entity_cache(self, mocker, entity_guid_response):
+        atlas_client = client.Atlas('localhost', port=21000, username='admin', password='admin',
+                                    entity_cache=EntityCache())
+        atlas_client.entity_cache.put_many([dict(entity_guid_response['entity'], guid='guid-1'),
+                                            dict(entity_guid_response['entity'], guid='guid-2')])
+        mocker.patch.object(atlas_client.client, 'post')
+        atlas_client.entity_guid('guid-1').classifications.create(data=[{'typeName': 'PII'}])
+        assert 'guid-1' not in atlas_client.entity_cache
+        atlas_client.entity_bulk_classification.create(data={'classification': {'typeName': 'PII'},
+                                                             'entityGuids': ['guid-2']})
+        assert 'guid-2' not in atlas_client.entity_cache
+
     def test_entity_bulk_classification_create(self, mocker, atlas_client, entity_bulk_classification_response):
         mocker.patch.object(atlas_client.entity_bulk_classification.client, 'post')
         atlas_client.entity_bulk_classification.client.post.return_value =  entity_bulk_classification_response 
@@ -203,6 +386,13 @@ class TestEntityREST():
         entity_guid.client.put.assert_called_with(entity_guid._href + '?name={}'.format(attribute),
                                                   data=entity_guid.entity['attributes'][attribute])
     
+    def test_model_data_not_shared_with_caller(self, atlas_client):
+        data = {'entity': {'typeName': 'hive_table'}}
+        model = atlas_client.entity_post.model_class(atlas_client.entity_post, href='url', data=data)
+        model.load({'mutatedEntities': {}})
+        assert data == {'entity': {'typeName': 'hive_table'}}
+        assert model.mutatedEntities == {}
+
     def test_create_entity_by_guid(self, mocker, entity_guid_response, entity_guid):    
         mocker.patch.object(entity_guid.client, 'post')
         entity_guid.create()
@@ -289,6 +479,18 @@ class TestTypeDefs():
         assert entity_attr_defs_values == ['...', '...', '...', '...']
         assert supertype_counter == 4 
 
+    def test_typedefs_registry(self, mocker, atlas_client, typedefs_response, tmpdir):
+        mocker.patch.object(atlas_client.client, 'get')
+        atlas_client.client.get.return_value = typedefs_response
+        path = str(tmpdir.join('types.json'))
+        registry = atlas_client.typedefs.registry(path=path)
+        assert registry['...']['category'] in ('STRUCT', 'ENUM', 'CLASSIFICATION', 'ENTITY', 'RELATIONSHIP')
+        assert atlas_client.client.get.call_count == 1
+        # the persisted registry is used instead of downloading the type system again
+        registry = atlas_client.typedefs.registry(path=path, max_age=3600)
+        assert atlas_client.client.get.call_count == 1
+        assert '...' in registry
+
     def test_typedefs_put(self, mocker, atlas_client, typedefs_response):
         mocker.patch.object(atlas_client.client, 'get')
         atlas_client.client.get.return_value = typedefs_response
@@ -394,6 +596,20 @@ class TestTypeDefs():
         c_def = atlas_client.typedef_name('name')
         assert c_def.category == 'STRUCT'
 
+    def test_typedefs_compact_models(self, mocker, typedefs_response):
+        atlas = client.Atlas('localhost', port=21000, compact_models=True)
+        mocker.patch.object(atlas.client, 'request')
+        atlas.client.request.return_value = typedefs_response
+        typedefs = next(iter(atlas.typedefs))
+        struct_def = next(iter(typedefs.structDefs))
+        assert isinstance(struct_def, base.CompactModel)
+        attribute_defs = list(struct_def.attributeDefs)
+        assert struct_def.attributeDefs is struct_def.attributeDefs
+        assert [a.name for a in attribute_defs] == ['attributeName{}'.format(i) for i in range(1, 3)]
+        assert sum(len(list(a.constraints)) for a in attribute_defs) == 4
+        assert json.loads(json.dumps(attribute_defs[0], cls=client.AtlasJsonEncoder)) == {'name': 'attributeName1'}
+
+
 class TestLineageGuid():
     def test_lineage_guid_get(self, mocker, atlas_client, lineage_guid_response):
         mocker.patch.object(atlas_client.client, 'request')
@@ -401,6 +617,42 @@ class TestLineageGuid():
         lineage = atlas_client.lineage_guid(GUID)
         assert lineage.lineageDirection == 'BOTH'
 
+    def test_lineage_guid_graph(self, mocker, atlas_client, lineage_guid_response):
+        mocker.patch.object(atlas_client.client, 'request')
+        atlas_client.client.request.return_value = lineage_guid_response
+        graph = atlas_client.lineage_guid(GUID).graph()
+        assert len(graph) == len(lineage_guid_response['guidEntityMap']) + 1
+        assert graph.successors('...') == ['...']
+
+    def test_lineage_guid_expand(self, mocker, atlas_client):
+        # a chain n0 -> n1 -> ... -> n20, with a branch b0 -> n10
+        relations = [('n%s' % i, 'n%s' % (i + 1)) for i in range(20)] + [('b0', 'n10')]
+
+        def lineage(method, url, params):
+            guid = url.rsplit('/', 1)[1]
+            found, frontier = [], set([guid])
+            for _ in range(params['depth']):
+                step = [r for r in relations if r[1] in frontier]
+                found.extend(step)
+                frontier = set(r[0] for r in step)
+            guids = set([guid]) | set(g for r in found for g in r)
+            return {'baseEntityGuid': guid,
+                    'guidEntityMap': dict((g, {'guid': g}) for g in guids),
+                    'relations': [{'fromEntityId': f, 'toEntityId': t} for f, t in found]}
+
+        mocker.patch.object(atlas_client.client, 'request')
+        atlas_client.client.request.side_effect = lineage
+        graph = atlas_client.lineage_guid.expand('n20', depth=3)
+        assert graph.upstream('n20') == set(['n%s' % i for i in range(20)] + ['b0'])
+        requested = [call[0][1].rsplit('/', 1)[1] for call in atlas_client.client.request.call_args_list]
+        assert len(requested) == len(set(requested))
+        assert atlas_client.client.request.call_args[1]['params'] == {'direction': 'INPUT', 'depth': 3}
+
+        atlas_client.client.request.reset_mock()
+        graph = atlas_client.lineage_guid.expand('n20', depth=3, max_depth=5)
+        assert graph.upstream('n20', max_depth=5) == set(['n15', 'n16', 'n17', 'n18', 'n19'])
+        assert atlas_client.client.request.call_count == 2
+
 class TestRelationshipREST():
     def test_relationship_guid_get(self, mocker, atlas_client, relationship_guid_response):
         mocker.patch.object(atlas_client.client, 'request')
@@ -500,6 +752,150 @@ class TestDiscoveryREST():
                 assert e.attributes['property1'] == {}
             assert s.flatten_attrs() == ['12', '34', '56']
 
+    def test_search_dsl_iter_pages(self, mocker, atlas_client, search_attribute_response):
+        full_page = dict(search_attribute_response, attributes={}, fullTextResult=[])
+        last_page = dict(full_page, entities=full_page['entities'][:1])
+        mocker.patch.object(atlas_client.search_dsl.client, 'get')
+        atlas_client.search_dsl.client.get.side_effect = [full_page, full_page, last_page]
+        search_results = atlas_client.search_dsl(query='hive_table', offset=4)
+        pages = list(search_results.iter_pages(page_size=2))
+        assert len(pages) == 3
+        offsets = [c[1]['params']['offset'] for c in atlas_client.search_dsl.client.get.call_args_list]
+        assert offsets == [4, 6, 8]
+        for c in atlas_client.search_dsl.client.get.call_args_list:
+            assert c[1]['params']['limit'] == 2
+            assert c[1]['params']['query'] == 'hive_table'
+        # pages are not kept around by the collection
+        assert search_results._models == []
+
+    def test_search_basic_iter_entities(self, mocker, atlas_client, search_attribute_response):
+        full_page = dict(search_attribute_response, attributes={}, fullTextResult=[])
+        empty_page = dict(full_page, entities=[])
+        mocker.patch.object(atlas_client.search_basic.client, 'get')
+        atlas_client.search_basic.client.get.side_effect = [full_page, empty_page]
+        entities = list(atlas_client.search_basic(typeName='hive_table', limit=2).iter_entities())
+        assert [e.status for e in entities] == ['ACTIVE', 'ACTIVE']
+        assert atlas_client.search_basic.client.get.call_count == 2
+
+    def test_search_fulltext_iter_entities(self, mocker, atlas_client, search_attribute_response):
+        results = [{'entity': entity, 'score': 1.0} for entity in search_attribute_response['entities']]
+        full_page = dict(search_attribute_response, attributes={}, entities=[], fullTextResult=results)
+        empty_page = dict(full_page, fullTextResult=[])
+        mocker.patch.object(atlas_client.search_fulltext.client, 'get')
+        atlas_client.search_fulltext.client.get.side_effect = [full_page, empty_page, full_page, empty_page]
+        entities = list(atlas_client.search_fulltext(query='sales', limit=2).iter_entities())
+        assert [e.guid for e in entities] == [entity['guid'] for entity in search_attribute_response['entities']]
+        raw = list(atlas_client.search_fulltext(query='sales', limit=2).iter_entities(raw=True))
+        assert raw == search_attribute_response['entities']
+
+    def test_search_entities_lazy(self, mocker, atlas_client, search_attribute_response):
+        mocker.patch.object(atlas_client.search_basic.client, 'get')
+        atlas_client.search_basic.client.get.return_value = search_attribute_response
+        page = next(iter(atlas_client.search_basic(typeName='hive_table')))
+        entities = page.entities
+        assert len(entities) == 2
+        assert entities._built == [None, None]
+        assert entities[-1].guid == search_attribute_response['entities'][1]['guid']
+        assert entities._built[0] is None
+        assert entities[0] is entities[0]
+        assert [e.status for e in entities[0:2]] == ['ACTIVE', 'ACTIVE']
+        assert entities[5:] == []
+        with pytest.raises(IndexError):
+            entities[2]
+        # the response dictionaries are not copied
+        assert entities._items is page._data['entities']
+
+    def test_search_entities_zero_copy(self, mocker, atlas_client, search_attribute_response):
+        response = json.loads(json.dumps(search_attribute_response))
+        response['entities'][0]['labels'] = ['not a field']
+        mocker.patch.object(atlas_client.search_basic.client, 'get')
+        atlas_client.search_basic.client.get.return_value = response
+        page = next(iter(atlas_client.search_basic(typeName='hive_table')))
+        assert page._data is response
+        entity = page.entities[0]
+        assert entity._data is response['entities'][0]
+        assert 'labels' not in entity.to_dict()
+        assert entity.to_dict()['guid'] == entity.guid
+        with pytest.raises(AttributeError):
+            entity.labels
+
+    def test_search_iter_raw(self, mocker, atlas_client, search_attribute_response):
+        full_page = dict(search_attribute_response, attributes={}, fullTextResult=[])
+        empty_page = dict(full_page, entities=[])
+        mocker.patch.object(atlas_client.search_dsl.client, 'get')
+        atlas_client.search_dsl.client.get.side_effect = [full_page, empty_page, full_page, empty_page]
+        pages = list(atlas_client.search_dsl(query='hive_table', limit=2).iter_pages(raw=True))
+        assert pages == [full_page, empty_page]
+        entities = list(atlas_client.search_dsl(query='hive_table', limit=2).iter_entities(raw=True))
+        assert entities == full_page['entities']
+
+    def test_search_to_columns(self, mocker, atlas_client, search_attribute_response):
+        full_page = dict(search_attribute_response, attributes={}, fullTextResult=[])
+        empty_page = dict(full_page, entities=[])
+        mocker.patch.object(atlas_client.search_basic.client, 'get')
+        atlas_client.search_basic.client.get.side_effect = [full_page, empty_page]
+        columns = atlas_client.search_basic(typeName='hive_table', limit=2).to_columns(attributes=['property1'])
+        assert len(columns) == 2
+        assert columns['status'].categories == ['ACTIVE']
+        assert columns.to_dict()['attributes.property1'] == [{}, {}]
+
+    def test_search_to_columns_select(self, mocker, atlas_client, search_attribute_response):
+        response = dict(search_attribute_response, entities=None, fullTextResult=[],
+                        attributes={'name': ['name', 'numRows'], 'values': [['t1', 10], ['t2', '20']]})
+        mocker.patch.object(atlas_client.search_dsl.client, 'get')
+        atlas_client.search_dsl.client.get.return_value = response
+        columns = atlas_client.search_dsl(query='hive_table select name, numRows').to_columns(
+            attributes={'numRows': 'int64'})
+        assert list(columns) == ['name', 'numRows']
+        assert columns.to_dict() == {'name': ['t1', 't2'], 'numRows': [10, 20]}
+
+    def test_search_to_columns_fulltext(self, mocker, atlas_client, search_attribute_response):
+        results = [{'entity': entity, 'score': 1.0} for entity in search_attribute_response['entities']]
+        response = dict(search_attribute_response, attributes={}, entities=[], fullTextResult=results)
+        mocker.patch.object(atlas_client.search_fulltext.client, 'get')
+        atlas_client.search_fulltext.client.get.return_value = response
+        columns = atlas_client.search_fulltext(query='sales').to_columns()
+        assert columns['guid'].to_list() == [entity['guid'] for entity in search_attribute_response['entities']]
+
+    def test_search_dsl_flatten_attrs_named(self, mocker, atlas_client, search_attribute_response):
+        response = dict(search_attribute_response,
+                        attributes={'name': ['name', 'owner'], 'values': [['t1', 'alice'], ['t2', 'bob']]})
+        mocker.patch.object(atlas_client.search_dsl.client, 'get')
+        atlas_client.search_dsl.client.get.return_value = response
+        page = next(iter(atlas_client.search_dsl(query='hive_table select name, owner')))
+        assert page.flatten_attrs() == ['t1', 'alice', 't2', 'bob']
+        assert page.flatten_attrs(named=True) == {'name': ['t1', 't2'], 'owner': ['alice', 'bob']}
+
+    def test_search_iter_entities_compact(self, mocker, atlas_client, search_attribute_response):
+        full_page = dict(search_attribute_response, attributes={}, fullTextResult=[])
+        empty_page = dict(full_page, entities=[])
+        mocker.patch.object(atlas_client.search_basic.client, 'get')
+        atlas_client.search_basic.client.get.side_effect = [full_page, empty_page]
+        entities = list(atlas_client.search_basic(typeName='hive_table', limit=2).iter_entities(compact=True))
+        assert [e.status for e in entities] == ['ACTIVE', 'ACTIVE']
+        assert [e.attributes['property1'] for e in entities] == [{}, {}]
+        assert entities[0].createdBy is None
+        assert not hasattr(entities[0], '__dict__')
+        assert type(entities[0]) is base.compact_model_class(models.Entity)
+        assert entities[0].to_dict() == full_page['entities'][0]
+        with pytest.raises(AttributeError):
+            entities[0].unknown_field
+
+    def test_search_dsl_iter_pages_prefetch(self, mocker, atlas_client, search_attribute_response):
+        full_page = dict(search_attribute_response, attributes={}, fullTextResult=[])
+        last_page = dict(full_page, entities=full_page['entities'][:1])
+        pages_by_offset = {0: full_page, 2: full_page, 4: last_page}
+
+        def get(url, params):
+            return pages_by_offset.get(params['offset'], dict(full_page, entities=[]))
+
+        mocker.patch.object(atlas_client.search_dsl.client, 'get', side_effect=get)
+        search_results = atlas_client.search_dsl(query='hive_table')
+        entities = list(search_results.iter_entities(page_size=2, prefetch=3))
+        assert len(entities) == 5
+        offsets = sorted(c[1]['params']['offset'] for c in atlas_client.search_dsl.client.get.call_args_list)
+        assert offsets[:3] == [0, 2, 4]
+
     def test_search_fulltext_get(self, mocker, atlas_client, search_attribute_response):
         mocker.patch.object(atlas_client.search_fulltext.client, 'get')
         search_attribute_response['queryType'] = 'ATTRIBUTE'
@@ -569,3 +965,30 @@ class TestAdminREST:
             tag_stats = metrics.tag
             assert tag_stats['tagEntities']['JdbcAccess'] == 2
             assert len(tag_stats['tagEntities'].keys()) == 7
+
+
+class TestRawAtlas():
+    def test_entity_guid(self, mocker, atlas_client, entity_guid_response):
+        mocker.patch.object(atlas_client.client, 'request')
+        atlas_client.client.request.return_value = entity_guid_response
+        response = atlas_client.raw.entity_guid(GUID)
+        assert response is entity_guid_response
+        atlas_client.client.request.assert_called_with(
+            'get', 'http://localhost:21000/api/atlas/v2/entity/guid/{}'.format(GUID))
+
+    def test_search_dsl(self, mocker, atlas_client, search_attribute_response):
+        mocker.patch.object(atlas_client.client, 'get')
+        atlas_client.client.get.return_value = search_attribute_response
+        response = atlas_client.raw.search_dsl(query='hive_table', limit=10)
+        assert response is search_attribute_response
+        atlas_client.client.get.assert_called_with('http://localhost:21000/api/atlas/v2/search/dsl',
+                                                   params={'query': 'hive_table', 'limit': '10'})
+
+    def test_entity_bulk_chunked(self, mocker, entity_bulk_response):
+        atlas = client.Atlas('localhost', port=21000, bulk_chunk_size=2)
+        mocker.patch.object(atlas.client, 'get')
+        atlas.client.get.return_value = entity_bulk_response
+        response = atlas.raw.entity_bulk(guid=['a', 'b', 'c'])
+        assert atlas.client.get.call_count == 2
+        assert len(response['entities']) == 2 * len(entity_bulk_response['entities'])
+        assert 'entity_guid' in dir(atlas.raw)
@@ -0,0 +1,65 @@
+from atlasclient.registry import TypeRegistry
+
+
+def typedefs():
+    def entity_def(name, supertypes=(), attributes=()):
+        return {'name': name, 'guid': 'guid-' + name, 'category': 'ENTITY',
+                'superTypes': list(supertypes),
+                'attributeDefs': [{'name': attr, 'typeName': 'string'} for attr in attributes]}
+
+    return {
+        'enumDefs': [{'name': 'file_action', 'guid': 'guid-file_action', 'category': 'ENUM'}],
+        'structDefs': [],
+        'classificationDefs': [{'name': 'PII', 'guid': 'guid-PII', 'category': 'CLASSIFICATION',
+                                'superTypes': []}],
+        'entityDefs': [
+            entity_def('Referenceable', attributes=['qualifiedName']),
+            entity_def('Asset', attributes=['name', 'description']),
+            entity_def('DataSet', ['Referenceable', 'Asset']),
+            entity_def('hive_table', ['DataSet'], attributes=['name', 'columns']),
+            entity_def('hive_view', ['hive_table', 'DataSet']),
+        ],
+        'relationshipDefs': [],
+    }
+
+
+class TestTypeRegistry():
+    def test_lookup(self):
+        registry = TypeRegistry(typedefs())
+        assert len(registry) == 7
+        assert 'hive_table' in registry
+        assert registry['PII']['category'] == 'CLASSIFICATION'
+        assert registry.by_guid('guid-file_action')['name'] == 'file_action'
+        assert registry.get('missing') is None
+
+    def test_supertypes(self):
+        registry = TypeRegistry(typedefs())
+        assert registry.supertypes('hive_view') == ('hive_table', 'DataSet', 'Referenceable', 'Asset')
+        assert registry.is_a('hive_view', 'Asset')
+        assert not registry.is_a('DataSet', 'hive_table')
+        assert sorted(registry.subtypes('DataSet')) == ['hive_table', 'hive_view']
+
+    def test_attribute_defs(self):
+        registry = TypeRegistry(typedefs())
+        names = [attr['name'] for attr in registry.attribute_defs('hive_view')]
+        assert names == ['name', 'columns', 'qualifiedName', 'description']
+
+    def test_save_load(self, tmpdir):
+        path = str(tmpdir.join('types.json'))
+        TypeRegistry(typedefs()).save(path)
+        registry = TypeRegistry.load(path, max_age=60)
+        assert registry.supertypes('hive_table') == ('DataSet', 'Referenceable', 'Asset')
+        assert TypeRegistry.load(str(tmpdir.join('missing.json'))) is None
+
+    def test_load_outdated(self, tmpdir, monkeypatch):
+        path = str(tmpdir.join('types.json'))
+        TypeRegistry(typedefs()).save(path)
+        monkeypatch.setattr('time.time', lambda: 10 ** 12)
+        assert TypeRegistry.load(path, max_age=60) is None
+        assert TypeRegistry.load(path) is not None
+
+    def test_load_other_format(self, tmpdir):
+        path = tmpdir.join('types.json')
+        for content in ('{"entityDefs": []}', '[1, 2]', '{"typedefs": 3}'):
+            path.write(content)
+            assert TypeRegistry.load(str(path)) is None
@@ -0,0 +1,100 @@
+import email.utils
+
+import pytest
+import requests
+
+from atlasclient import exceptions
+from atlasclient.retry import RetryPolicy, parse_retry_after
+
+
+def unavailable(retry_after=None):
+    return exceptions.ServerUnavailable(retry_after=retry_after)
+
+
+class TestRetryPolicy():
+    def test_parse_retry_after(self):
+        assert parse_retry_after('3') == 3.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after('soon') is None
+        assert parse_retry_after(email.utils.formatdate(1000, usegmt=True), now=990) == 10
+        assert parse_retry_after(email.utils.formatdate(1000, usegmt=True), now=1010) == 0
+
+    def test_is_retryable(self):
+        policy = RetryPolicy()
+        for error in (exceptions.RateLimitExceeded(), exceptions.BadGateway(), unavailable(),
+                      exceptions.GatewayTimeout(), requests.exceptions.ConnectionError()):
+            assert policy.is_retryable('get', error)
+        # POST requests are only retried when the server did not process them
+        assert policy.is_retryable('post', exceptions.RateLimitExceeded())
+        assert policy.is_retryable('post', unavailable())
+        assert not policy.is_retryable('post', exceptions.GatewayTimeout())
+        assert not policy.is_retryable('post', requests.exceptions.ReadTimeout())
+        assert not policy.is_retryable('get', exceptions.ServerError())
+        assert not policy.is_retryable('get', exceptions.NotFound())
+        assert not policy.is_retryable('get', ValueError())
+
+    def test_retry_delay(self):
+        policy = RetryPolicy(max_attempts=3, backoff=1, max_backoff=3, deadline=10)
+        for attempt, bound in ((0, 1), (1, 2)):
+            delay = policy.retry_delay('get', unavailable(), attempt, 0)
+            assert 0 <= delay <= bound
+        assert policy.retry_delay('get', unavailable(), 2, 0) is None
+        policy.max_attempts = 10
+        assert policy.retry_delay('get', unavailable(), 6, 0) <= 3
+        # Retry-After is honoured, plus some jitter
+        assert 5 <= policy.retry_delay('get', unavailable('5'), 0, 0) <= 6
+        # unless the retry would start after the deadline
+        assert policy.retry_delay('get', unavailable('5'), 0, 6) is None
+
+    def test_call(self, mocker):
+        sleep = mocker.patch('atlasclient.retry.time.sleep')
+        retries = []
+        outcomes = [exceptions.BadGateway(), unavailable('2'), 'ok']
+
+        def func():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        policy = RetryPolicy(backoff=0)
+        assert policy.call(func, 'get', lambda error, attempt, delay: retries.append(attempt)) == 'ok'
+        assert retries == [0, 1]
+        assert [call[0][0] for call in sleep.call_args_list] == [0, 2]
+
+        with pytest.raises(exceptions.GatewayTimeout):
+            policy.call(mocker.Mock(side_effect=exceptions.GatewayTimeout()), 'post')
+        failing = mocker.Mock(side_effect=unavailable())
+        with pytest.raises(exceptions.ServerUnavailable):
+            RetryPolicy(max_attempts=3, backoff=0).call(failing, 'get')
+        assert failing.call_count == 3
+
+    def test_connection_failures_left_to_the_adapter(self, mocker):
+        from urllib3.exceptions import MaxRetryError
+        from atlasclient.client import HttpClient
+
+        http = HttpClient('http://localhost:21000', 'admin', 'admin', 'atlasclient')
+        adapter_retry = http.session.get_adapter('http://localhost:21000').max_retries
+        assert adapter_retry.total == 5
+        assert adapter_retry.read is False
+        mocker.patch('atlasclient.retry.time.sleep')
+        error = requests.exceptions.ConnectionError(MaxRetryError(None, '/api/atlas/v2/entity/guid/1'))
+        mocker.patch.object(http.session, 'get', side_effect=error)
+        with pytest.raises(requests.exceptions.ConnectionError):
+            http.get('http://localhost:21000/api/atlas/v2/entity/guid/1')
+        assert http.session.get.call_count == 1
+
+    def test_read_timeouts_retried_for_idempotent_methods(self, mocker):
+        from atlasclient.client import HttpClient
+
+        http = HttpClient('http://localhost:21000', 'admin', 'admin', 'atlasclient',
+                          retry_policy=RetryPolicy(max_attempts=3, backoff=0))
+        mocker.patch('atlasclient.retry.time.sleep')
+        mocker.patch.object(http.session, 'get', side_effect=requests.exceptions.ReadTimeout())
+        mocker.patch.object(http.session, 'post', side_effect=requests.exceptions.ReadTimeout())
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            http.get('http://localhost:21000/api/atlas/v2/entity/guid/1')
+        assert http.session.get.call_count == 3
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            http.post('http://localhost:21000/api/atlas/v2/entity', data={})
+        assert http.session.post.call_count == 1
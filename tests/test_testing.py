@@ -0,0 +1,144 @@
+import time
+
+import pytest
+
+from atlasclient import exceptions
+from atlasclient.cache import EntityCache, SQLiteResponseCache
+from atlasclient.retry import RetryPolicy
+from atlasclient.testing import EntityStore, FakeAtlasServer
+
+TYPEDEFS = {'entityDefs': [{'name': 'hive_table', 'superTypes': ['DataSet'], 'attributeDefs': []}]}
+
+
+def table(guid, name):
+    return {'guid': guid, 'typeName': 'hive_table', 'attributes': {'name': name, 'qualifiedName': name + '@cl1'}}
+
+
+@pytest.fixture
+def server():
+    with FakeAtlasServer(seed=1) as fake:
+        yield fake
+
+
+class TestEntityStore():
+    def test_placeholders(self):
+        store = EntityStore()
+        response = store.add_entities([
+            table('-1', 't1'),
+            {'guid': '-2', 'typeName': 'hive_process',
+             'attributes': {'name': 'p', 'inputs': [{'guid': '-1', 'typeName': 'hive_table'}], 'outputs': []}}])
+        t1, process = response['guidAssignments']['-1'], response['guidAssignments']['-2']
+        assert len(response['mutatedEntities']['CREATE']) == 2
+        assert store.get(process)['attributes']['inputs'] == [{'guid': t1, 'typeName': 'hive_table'}]
+        # a second post of the same guid is an update
+        response = store.add_entities([dict(table(t1, 't1'), attributes={'name': 't1', 'owner': 'bob'})])
+        assert response['mutatedEntities']['UPDATE'][0]['guid'] == t1
+        assert store.get(t1)['version'] == 1
+
+    def test_lineage(self):
+        store = EntityStore([table('a', 'a'), table('b', 'b'), table('c', 'c'),
+                             {'guid': 'p1', 'typeName': 'hive_process',
+                              'attributes': {'inputs': [{'guid': 'a'}], 'outputs': [{'guid': 'b'}]}},
+                             {'guid': 'p2', 'typeName': 'hive_process',
+                              'attributes': {'inputs': [{'guid': 'b'}], 'outputs': [{'guid': 'c'}]}}])
+        lineage = store.lineage('c', 'INPUT', depth=1)
+        assert sorted(lineage['guidEntityMap']) == ['b', 'c', 'p2']
+        lineage = store.lineage('b', 'BOTH', depth=3)
+        assert sorted(lineage['guidEntityMap']) == ['a', 'b', 'c', 'p1', 'p2']
+        assert {'fromEntityId': 'a', 'toEntityId': 'p1'} in lineage['relations']
+
+
+class TestFakeAtlasServer():
+    def test_entities(self, server):
+        client = server.client()
+        response = client.entity_bulk.create_batched([table('-1', 't1'), table('-2', 't2')])
+        guid = response['guidAssignments']['-1']
+        assert client.entity_guid(guid).entity['attributes']['name'] == 't1'
+        bulk = next(iter(client.entity_bulk(guid=list(response['guidAssignments'].values()))))
+        assert sorted(e.attributes['name'] for e in bulk.entities) == ['t1', 't2']
+        unique = client.entity_unique_attribute('hive_table', qualifiedName='t2@cl1')
+        assert unique.entity['attributes']['name'] == 't2'
+        with pytest.raises(exceptions.NotFound):
+            client.raw.entity_guid('unknown')
+        assert server.requests[('POST', '/api/atlas/v2/entity/bulk')] == 1
+
+    def test_entity_cache_invalidated_by_updates(self, server):
+        client = server.client(entity_cache=EntityCache())
+        guid = client.entity_bulk.create_batched([table('-1', 'a')])['guidAssignments']['-1']
+        assert client.entity_guid(guid).entity['attributes']['name'] == 'a'
+        client.entity_bulk.create(data={'entities': [table(guid, 'b')], 'referredEntities': {}})
+        assert client.entity_guid(guid).entity['attributes']['name'] == 'b'
+        client.entity_bulk.create_batched([table(guid, 'c')])
+        assert client.entity_guid(guid).entity['attributes']['name'] == 'c'
+        client.entity_post.create(data={'entity': table(guid, 'd')})
+        assert client.entity_guid(guid).entity['attributes']['name'] == 'd'
+
+    def test_response_cache_invalidated_by_updates(self, server):
+        client = server.client(response_cache=SQLiteResponseCache())
+        guid = client.entity_bulk.create_batched([table('-1', 'a')])['guidAssignments']['-1']
+        assert client.raw.entity_guid(guid)['entity']['attributes']['name'] == 'a'
+        unique = client.raw.entity_unique_attribute('hive_table', qualifiedName='a@cl1')
+        assert unique['entity']['attributes']['name'] == 'a'
+        client.entity_bulk.create(data={'entities': [table(guid, 'b')], 'referredEntities': {}})
+        assert client.raw.entity_guid(guid)['entity']['attributes']['name'] == 'b'
+        client.entity_post.create(data={'entity': dict(table(guid, 'c'), attributes={'name': 'c',
+                                                                                     'qualifiedName': 'a@cl1'})})
+        assert client.raw.entity_guid(guid)['entity']['attributes']['name'] == 'c'
+        unique = client.raw.entity_unique_attribute('hive_table', qualifiedName='a@cl1')
+        assert unique['entity']['attributes']['name'] == 'c'
+        assert server.requests[('GET', '/api/atlas/v2/entity/guid/' + guid)] == 3
+
+    def test_pagination(self, server):
+        server.store.add_entities([table(None, 't%d' % i) for i in range(25)])
+        client = server.client()
+        names = [e.attributes['name'] for e in client.search_basic(typeName='hive_table').iter_entities(page_size=10)]
+        assert names == ['t%d' % i for i in range(25)]
+        assert server.requests[('GET', '/api/atlas/v2/search/basic')] == 3
+        dsl = client.raw.search_dsl(query='hive_table where name="t1"', limit=5, offset=20)
+        assert len(dsl['entities']) == 5
+        fulltext = client.raw.search_fulltext(query='t2', limit=5)
+        assert 'entities' not in fulltext
+        names = [result['entity']['attributes']['name'] for result in fulltext['fullTextResult']]
+        assert names == ['t2', 't20', 't21', 't22', 't23']
+        names = [e.attributes['name'] for e in client.search_fulltext(query='t1').iter_entities(page_size=4)]
+        assert names == ['t1'] + ['t1%d' % i for i in range(10)]
+
+    def test_typedefs_and_metrics(self, server):
+        server.store.add_typedefs(TYPEDEFS)
+        server.store.add_entities([table(None, 't')])
+        client = server.client()
+        typedefs = next(iter(client.typedefs))
+        assert [entity_def.name for entity_def in typedefs.entityDefs] == ['hive_table']
+        assert client.raw.entitydef_name('hive_table')['superTypes'] == ['DataSet']
+        metrics = client.raw.admin_metrics()
+        assert metrics['entity']['entityActive'] == {'hive_table': 1}
+
+    def test_injected_failures(self, server):
+        client = server.client(retry_policy=None)
+        server.fail_next(503, retry_after=7)
+        server.fail_next(429, retry_after=3)
+        with pytest.raises(exceptions.ServerUnavailable) as error:
+            client.raw.admin_metrics()
+        assert error.value.retry_after == '7'
+        with pytest.raises(exceptions.RateLimitExceeded):
+            client.raw.admin_metrics()
+        client.raw.admin_metrics()
+
+    def test_retries(self, server):
+        client = server.client(retry_policy=RetryPolicy(backoff=0.01))
+        server.fail_next(503, retry_after=0)
+        server.fail_next(502)
+        assert client.raw.admin_metrics()['general']['entityCount'] == 0
+        assert server.requests[('GET', '/api/atlas/admin/metrics')] == 3
+        assert client.metrics.snapshot()['metrics']['GET']['retries'] == 2
+
+    def test_error_rate(self):
+        with FakeAtlasServer(error_rate=1.0) as server:
+            with pytest.raises(exceptions.ServerError):
+                server.client(retry_policy=None).raw.admin_metrics()
+
+    def test_latency(self):
+        with FakeAtlasServer(latency=0.05) as server:
+            start = time.time()
+            server.client().raw.admin_metrics()
+            assert time.time() - start >= 0.05